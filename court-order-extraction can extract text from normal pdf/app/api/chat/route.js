@@ -2,9 +2,120 @@ import { NextResponse } from 'next/server'
 import { spawn } from 'child_process'
 import path from 'path'
 
+// Path to the working chat handler - FIXED PATH
+const CHAT_SCRIPT = path.join(process.cwd(), 'scripts', 'chat_handler_working.py')
+
+// Use the virtual environment Python
+const PYTHON_PATH = '/home/shavak_new/Documents/Deepak_Astaya/all_working_code/complete_court_order_extraction_project/.venv/bin/python'
+
+// A streamed answer is abandoned when the model goes quiet for this long
+const STREAM_IDLE_TIMEOUT_MS = 30000
+
+/**
+ * Forward the chat handler's newline-delimited JSON events (start, token..., done/error)
+ * to the client as they are generated.
+ */
+function streamChatResponse(message, mode, documentText, documentDir, filters) {
+  const encoder = new TextEncoder()
+  let pythonProcess = null
+  let idleTimer = null
+
+  const stream = new ReadableStream({
+    start(controller) {
+      let closed = false
+      let pending = ''
+      let sawFinalEvent = false
+      let error = ''
+
+      const send = (line) => {
+        if (closed || !line.trim()) return
+        try {
+          const event = JSON.parse(line)
+          if (event.type === 'done' || event.type === 'error') sawFinalEvent = true
+        } catch (parseError) {
+          // Not an event (stray print from a library): pass it on as text
+          line = JSON.stringify({ type: 'token', text: line + '\n' })
+        }
+        controller.enqueue(encoder.encode(line + '\n'))
+      }
+
+      const finish = (fallbackEvent) => {
+        if (closed) return
+        send(pending)
+        pending = ''
+        if (!sawFinalEvent && fallbackEvent) send(JSON.stringify(fallbackEvent))
+        closed = true
+        clearTimeout(idleTimer)
+        controller.close()
+      }
+
+      const resetIdleTimer = () => {
+        clearTimeout(idleTimer)
+        idleTimer = setTimeout(() => {
+          pythonProcess.kill('SIGTERM')
+          finish({
+            type: 'error',
+            response: 'The request took too long to process. Please try again with a shorter question.',
+            mode: mode,
+            success: false,
+            timeout: true
+          })
+        }, STREAM_IDLE_TIMEOUT_MS)
+      }
+
+      pythonProcess = spawn(PYTHON_PATH, [CHAT_SCRIPT], {
+        stdio: ['pipe', 'pipe', 'pipe']
+      })
+
+      pythonProcess.stdin.write(JSON.stringify({ message, mode, documentText, documentDir, filters, stream: true }))
+      pythonProcess.stdin.end()
+      resetIdleTimer()
+
+      pythonProcess.stdout.on('data', (data) => {
+        resetIdleTimer()
+        pending += data.toString()
+        const lines = pending.split('\n')
+        pending = lines.pop()
+        lines.forEach(send)
+      })
+
+      pythonProcess.stderr.on('data', (data) => {
+        error += data.toString()
+      })
+
+      pythonProcess.on('close', (code) => {
+        if (code !== 0) {
+          console.error('Python chat error:', error)
+        }
+        finish({
+          type: 'error',
+          response: 'Sorry, I encountered an error while processing your request. Please try again.',
+          mode: mode,
+          success: false,
+          error: 'Chat processing failed'
+        })
+      })
+    },
+
+    cancel() {
+      // The client went away: stop generating
+      clearTimeout(idleTimer)
+      if (pythonProcess) pythonProcess.kill('SIGTERM')
+    }
+  })
+
+  return new Response(stream, {
+    headers: {
+      'Content-Type': 'application/x-ndjson; charset=utf-8',
+      'Cache-Control': 'no-cache, no-transform',
+      'X-Accel-Buffering': 'no'
+    }
+  })
+}
+
 export async function POST(request) {
   try {
-    const { message, mode = 'general', documentText = null } = await request.json()
+    const { message, mode = 'general', documentText = null, documentDir = null, filters = null, stream = false } = await request.json()
 
     if (!message) {
       return NextResponse.json(
@@ -13,14 +124,12 @@ export async function POST(request) {
       )
     }
 
-    // Path to the working chat handler - FIXED PATH
-    const scriptPath = path.join(process.cwd(), 'scripts', 'chat_handler_working.py')
-    
-    // Use the virtual environment Python
-    const pythonPath = '/home/shavak_new/Documents/Deepak_Astaya/all_working_code/complete_court_order_extraction_project/.venv/bin/python'
+    if (stream) {
+      return streamChatResponse(message, mode, documentText, documentDir, filters)
+    }
 
     return new Promise((resolve) => {
-      const pythonProcess = spawn(pythonPath, [scriptPath], {
+      const pythonProcess = spawn(PYTHON_PATH, [CHAT_SCRIPT], {
         stdio: ['pipe', 'pipe', 'pipe']
       })
 
@@ -31,7 +140,9 @@ export async function POST(request) {
       const inputData = JSON.stringify({
         message,
         mode,
-        documentText
+        documentText,
+        documentDir,
+        filters
       })
       
       pythonProcess.stdin.write(inputData)
@@ -61,7 +61,7 @@ export default function AdvancedLegalAIPlatform() {
   const [chatMessages, setChatMessages] = useState([])
   const [chatInput, setChatInput] = useState("")
   const [isChatLoading, setIsChatLoading] = useState(false)
-  const [chatMode, setChatMode] = useState("general") // "document" or "general"
+  const [chatMode, setChatMode] = useState("general") // "document", "corpus" (all processed documents) or "general"
   const [qaQuery, setQaQuery] = useState("")
   const [qaResponse, setQaResponse] = useState("")
   const [mobileScanning, setMobileScanning] = useState(false)
@@ -344,8 +344,10 @@ export default function AdvancedLegalAIPlatform() {
 
     try {
       // Use the user-selected chat mode
-      const mode = chatMode === "document" && extractedData?.fullText ? "document" : "general"
+      const mode = chatMode === "corpus" ? "corpus" : chatMode === "document" && extractedData?.fullText ? "document" : "general"
       const documentText = chatMode === "document" ? extractedData?.fullText || null : null
+      // Output folder of the processed document, where its retrieval index is saved
+      const documentDir = chatMode === "document" ? extractedData?.outputDirectory || null : null
 
       console.log('Chat request:', { 
         message: userMessage, 
@@ -364,34 +366,83 @@ export default function AdvancedLegalAIPlatform() {
           message: userMessage,
           mode: mode,
           documentText: documentText,
+          documentDir: documentDir,
+          stream: true,
         }),
       })
 
-      const result = await response.json()
-      
-      // Remove typing indicator
-      setChatMessages((prev) => prev.filter(msg => !msg.isTyping))
-      
-      let assistantContent = result.response || "I apologize, but I couldn't generate a proper response."
-      
       // Add indicators for document usage and AI status
-      if (result.using_document && result.ai_powered) {
-        assistantContent = `🤖 *LLaMA AI analyzing your document* \n\n${assistantContent}`
-      } else if (result.using_document) {
-        assistantContent = `📄 *Using your document* \n\n${assistantContent}`
-      } else if (result.ai_powered) {
-        assistantContent = `🧠 *LLaMA AI Legal Assistant* \n\n${assistantContent}`
+      const indicatorFor = (info) => {
+        if (info.mode === "corpus") {
+          const count = info.sources?.length || 0
+          return `🔎 *Searching all processed documents${count ? ` • ${count} matching` : ""}* \n\n`
+        }
+        if (info.using_document && info.ai_powered) return "🤖 *LLaMA AI analyzing your document* \n\n"
+        if (info.using_document) return "📄 *Using your document* \n\n"
+        if (info.ai_powered) return "🧠 *LLaMA AI Legal Assistant* \n\n"
+        return ""
       }
-      
-      const assistantResponse = {
-        role: "assistant",
-        content: assistantContent,
-        usingDocument: result.using_document,
-        mode: result.mode,
-        aiPowered: result.ai_powered,
-        processingTime: result.processing_time
+
+      // The answer streams in as newline-delimited JSON events: start, token..., done (or error),
+      // with progress/keepalive events while a long summary is prepared before the first token
+      const streamId = Date.now()
+      let info = { mode }
+      let answer = ""
+      let finished = false
+      const showAnswer = (extra = {}) => {
+        const assistantResponse = {
+          role: "assistant",
+          content: indicatorFor(info) + answer,
+          streamId,
+          usingDocument: info.using_document,
+          mode: info.mode,
+          aiPowered: info.ai_powered,
+          ...extra,
+        }
+        // The first piece replaces the typing indicator; later pieces update the same message
+        setChatMessages((prev) => [...prev.filter((msg) => !msg.isTyping && msg.streamId !== streamId), assistantResponse])
+      }
+      const handleEvent = (event) => {
+        if (event.type === "start") {
+          info = event
+        } else if (event.type === "progress") {
+          const step = event.stage === "map" ? "Reading section" : "Combining notes"
+          setChatMessages((prev) =>
+            prev.map((msg) => (msg.isTyping ? { ...msg, progressText: `${step} ${event.done} of ${event.total}...` } : msg))
+          )
+        } else if (event.type === "token") {
+          answer += event.text
+          showAnswer({ isStreaming: true })
+        } else if (event.type === "done") {
+          finished = true
+          answer = event.response || answer || "I apologize, but I couldn't generate a proper response."
+          showAnswer({ processingTime: event.processing_time })
+        } else if (event.type === "error") {
+          finished = true
+          answer = answer || event.response || "I apologize, but I couldn't generate a proper response."
+          showAnswer()
+        }
+      }
+
+      const reader = response.body.getReader()
+      const decoder = new TextDecoder()
+      let pending = ""
+      while (true) {
+        const { value, done } = await reader.read()
+        if (done) break
+        pending += decoder.decode(value, { stream: true })
+        const lines = pending.split("\n")
+        pending = lines.pop()
+        lines.filter((line) => line.trim()).forEach((line) => handleEvent(JSON.parse(line)))
+      }
+      if (pending.trim()) {
+        // A plain JSON reply (validation errors are not streamed)
+        const result = JSON.parse(pending)
+        handleEvent(result.type ? result : { type: "error", response: result.response })
+      }
+      if (!finished) {
+        handleEvent({ type: "error" })
       }
-      setChatMessages((prev) => [...prev, assistantResponse])
       
     } catch (error) {
       console.error('Chat error:', error)
@@ -1675,6 +1726,17 @@ Summary generated by Legal AI Platform
                     <FileText className="w-4 h-4" />
                     Document Analysis
                   </button>
+                  <button
+                    onClick={() => setChatMode("corpus")}
+                    className={`flex items-center gap-2 px-4 py-2 rounded-md text-sm font-medium transition-all ${
+                      chatMode === "corpus"
+                        ? "bg-green-600 text-white shadow-md"
+                        : "bg-white text-gray-700 hover:bg-gray-50"
+                    }`}
+                  >
+                    <Search className="w-4 h-4" />
+                    All Documents
+                  </button>
                 </div>
                 <div className="h-96 border rounded-lg p-4 overflow-y-auto bg-gradient-to-br from-gray-50 to-white">
                   {chatMessages.length === 0 ? (
@@ -1684,7 +1746,17 @@ Summary generated by Legal AI Platform
                         <Sparkles className="w-4 h-4 absolute top-0 right-1/2 transform translate-x-8 text-purple-400 animate-pulse" />
                       </div>
                       <h3 className="text-lg font-semibold mb-2 text-gray-700">Legal AI Assistant Ready</h3>
-                      {chatMode === "document" && extractedData?.fullText ? (
+                      {chatMode === "corpus" ? (
+                        <div>
+                          <p className="mb-2">🔎 <strong>All Documents Mode:</strong> I'll search every processed document and can help with:</p>
+                          <div className="text-sm space-y-1 text-gray-600">
+                            <p>📚 Questions across your whole archive</p>
+                            <p>🗺️ Narrowing by state, court or statute in the question</p>
+                            <p>📅 Date ranges like "this year" or "between 2021 and 2023"</p>
+                            <p>📄 Answers that name the orders they rely on</p>
+                          </div>
+                        </div>
+                      ) : chatMode === "document" && extractedData?.fullText ? (
                         <div>
                           <p className="mb-2">🔍 <strong>Document Analysis Mode:</strong> I'll analyze your processed document and can help with:</p>
                           <div className="text-sm space-y-1 text-gray-600">
@@ -1746,7 +1818,7 @@ Summary generated by Legal AI Platform
                                       <div className="w-2 h-2 bg-blue-500 rounded-full animate-bounce" style={{animationDelay: '150ms'}}></div>
                                       <div className="w-2 h-2 bg-blue-500 rounded-full animate-bounce" style={{animationDelay: '300ms'}}></div>
                                     </div>
-                                    <span className="text-gray-500 text-xs">LLaMA AI is analyzing your question...</span>
+                                    <span className="text-gray-500 text-xs">{message.progressText || "LLaMA AI is analyzing your question..."}</span>
                                   </div>
                                 ) : (
                                   message.content
@@ -1789,6 +1861,8 @@ Summary generated by Legal AI Platform
                       placeholder={
                         chatMode === "document"
                           ? "Ask questions about your uploaded document..."
+                          : chatMode === "corpus"
+                          ? "Ask across all processed documents, e.g. Kerala bail orders this year..."
                           : "Ask general legal questions, scenarios, or procedures..."
                       }
                       value={chatInput}
@@ -1834,7 +1908,7 @@ Summary generated by Legal AI Platform
                   <div className="flex items-center gap-2">
                     <span className="text-sm font-medium text-gray-600">Quick Actions:</span>
                     <Badge variant="outline" className="text-xs">
-                      {chatMode === "document" ? "Document Analysis" : "General Legal"}
+                      {chatMode === "document" ? "Document Analysis" : chatMode === "corpus" ? "All Documents" : "General Legal"}
                     </Badge>
                   </div>
                   
@@ -0,0 +1,323 @@
+"""
+Party Address Parser
+Deterministic parser for the party blocks at the top of Indian court orders:
+
+    PETITIONER/ACCUSED NO.2:
+    IBRAHIM,
+    AGED 36 YEARS, S/O ABDUL RAHIMAN,
+    KOKKAPARAMBAN HOUSE, KARIYARAM,
+    URAKAM MELMURI P.O,
+    MALAPPURAM DISTRICT, PIN – 676517
+    BY ADVS. ...
+    RESPONDENTS/COMPLAINANT:
+    1
+    STATE OF KERALA, ...
+
+The block is cut into segments (lines and comma-separated parts) and run through a
+small state machine: a role header (PETITIONER / RESPONDENT ...) opens a role, a party
+number or a name opens a party, "AGED", "S/o", "residing at", "House", "P.O.",
+"District" and the 6-digit PIN fill its details and address, and "BY ADV" switches to
+the counsel list until the next header. The PIN gives the state (and often the
+district) through the prefix tables below.
+
+Used by llama.py so that addresses no longer need their own LLM prompts; only parties
+the parser cannot resolve are left to the model.
+"""
+
+import re
+from typing import Any, Dict, List, Optional
+
+# First digits of a PIN code → state/UT (longest prefix wins)
+PIN_PREFIX_STATES = {
+    "11": "Delhi", "12": "Haryana", "13": "Haryana", "14": "Punjab", "15": "Punjab", "16": "Punjab",
+    "17": "Himachal Pradesh", "18": "Jammu and Kashmir", "19": "Jammu and Kashmir", "194": "Ladakh",
+    "20": "Uttar Pradesh", "21": "Uttar Pradesh", "22": "Uttar Pradesh", "23": "Uttar Pradesh",
+    "24": "Uttar Pradesh", "25": "Uttar Pradesh", "26": "Uttar Pradesh", "27": "Uttar Pradesh",
+    "28": "Uttar Pradesh", "246": "Uttarakhand", "248": "Uttarakhand", "249": "Uttarakhand", "263": "Uttarakhand",
+    "30": "Rajasthan", "31": "Rajasthan", "32": "Rajasthan", "33": "Rajasthan", "34": "Rajasthan",
+    "36": "Gujarat", "37": "Gujarat", "38": "Gujarat", "39": "Gujarat",
+    "40": "Maharashtra", "41": "Maharashtra", "42": "Maharashtra", "43": "Maharashtra", "44": "Maharashtra",
+    "403": "Goa",
+    "45": "Madhya Pradesh", "46": "Madhya Pradesh", "47": "Madhya Pradesh", "48": "Madhya Pradesh",
+    "49": "Chhattisgarh", "50": "Telangana", "51": "Andhra Pradesh", "52": "Andhra Pradesh", "53": "Andhra Pradesh",
+    "56": "Karnataka", "57": "Karnataka", "58": "Karnataka", "59": "Karnataka",
+    "60": "Tamil Nadu", "61": "Tamil Nadu", "62": "Tamil Nadu", "63": "Tamil Nadu", "64": "Tamil Nadu",
+    "67": "Kerala", "68": "Kerala", "69": "Kerala",
+    "70": "West Bengal", "71": "West Bengal", "72": "West Bengal", "73": "West Bengal", "74": "West Bengal",
+    "737": "Sikkim", "744": "Andaman and Nicobar Islands",
+    "75": "Odisha", "76": "Odisha", "77": "Odisha", "78": "Assam",
+    "790": "Arunachal Pradesh", "791": "Arunachal Pradesh", "792": "Arunachal Pradesh",
+    "793": "Meghalaya", "794": "Meghalaya", "795": "Manipur", "796": "Mizoram",
+    "797": "Nagaland", "798": "Nagaland", "799": "Tripura",
+    "80": "Bihar", "81": "Bihar", "82": "Bihar", "84": "Bihar", "85": "Bihar", "83": "Jharkhand",
+    "814": "Jharkhand", "815": "Jharkhand", "816": "Jharkhand", "825": "Jharkhand", "826": "Jharkhand",
+    "827": "Jharkhand", "828": "Jharkhand", "829": "Jharkhand",
+}
+
+# First three digits of a PIN code → district, where one sorting district maps to one revenue district
+PIN_PREFIX_DISTRICTS = {
+    "670": "Kannur", "671": "Kasaragod", "673": "Kozhikode", "676": "Malappuram", "678": "Palakkad",
+    "680": "Thrissur", "682": "Ernakulam", "683": "Ernakulam", "685": "Idukki", "686": "Kottayam",
+    "688": "Alappuzha", "689": "Pathanamthitta", "690": "Kollam", "691": "Kollam", "695": "Thiruvananthapuram",
+    "400": "Mumbai", "411": "Pune", "440": "Nagpur",
+    "560": "Bengaluru Urban", "570": "Mysuru",
+    "600": "Chennai", "625": "Madurai", "641": "Coimbatore",
+    "380": "Ahmedabad", "390": "Vadodara", "395": "Surat",
+}
+
+ADDRESS_COMPONENTS = ["apartment_house", "street", "village", "post_office", "city", "district", "state", "zipcode"]
+
+# Where the party block ends (the court's recital of the hearing, or the order itself)
+_BLOCK_END = re.compile(r'(?:THIS\s+\w+(?:\s+\w+)?\s+HAVING\s+(?:COME|BEEN)|O\s*R\s*D\s*E\s*R\b|J\s*U\s*D\s*G\s*M\s*E\s*N\s*T\b)',
+                        re.IGNORECASE)
+_ROLE_HEADER = re.compile(r'^(PETITIONER|APPELLANT|APPLICANT|ACCUSED|RESPONDENT|COMPLAINANT|DEFENDANT|PLAINTIFF)S?'
+                          r'(?:\s*\(S\))?(?:\s*[/&]\s*[A-Z .()0-9]+)?\s*:?$', re.IGNORECASE)
+_PARTY_NUMBER = re.compile(r'^(?:R\s*)?(\d{1,2})\s*[.)]?$')
+_COUNSEL = re.compile(r'^(?:BY\s+(?:ADVS?|SRI|SMT|SR)\b|ADV(?:OCATE)?S?\b|SRI\.|SMT\.|SR\.\s*GP)', re.IGNORECASE)
+_AGE = re.compile(r'\bAGED?\s*:?\s*(\d{1,3})\s*(?:YEARS?|YRS?)?\b', re.IGNORECASE)
+_RELATION = re.compile(r'\b([SDWH])\s*/\s*O\.?\s+(.+)$', re.IGNORECASE)
+_RESIDING = re.compile(r'\b(?:RESIDING\s+AT|RESIDENT\s+OF|R\s*/\s*O\.?)\s*:?\s*(.*)$', re.IGNORECASE)
+_PIN = re.compile(r'(?:\bPIN(?:\s*CODE)?\s*[:\-–.]*\s*)?\b([1-9]\d{2})\s?(\d{3})\b', re.IGNORECASE)
+_POST_OFFICE = re.compile(r'^(.+?)\s*\bP\.?\s*O\.?$|^P\.?\s*O\.?\s+(.+)$', re.IGNORECASE)
+_DISTRICT = re.compile(r'^(.+?)\s+(?:DISTRICT|DIST\.?|DT\.?)$|^(?:DISTRICT|DIST\.?)\s*(?:OF\s+)?(.+)$', re.IGNORECASE)
+_HOUSE = re.compile(r'\b(?:HOUSE|VEEDU|BHAVAN|VILLA|NIVAS|MANZIL|FLAT|APARTMENT|QUARTERS)\b|^(?:H\.?\s*NO|HOUSE\s+NO|DOOR\s+NO|D\.?\s*NO)\b',
+                    re.IGNORECASE)
+_STREET = re.compile(r'\b(?:ROAD|STREET|LANE|NAGAR|MARG|CROSS|MAIN|COLONY|LAYOUT|AVENUE)\b|^\d+(?:ST|ND|RD|TH)\b', re.IGNORECASE)
+_STATE_OF = re.compile(r'^STATE\s+OF\s+([A-Z ]+)$', re.IGNORECASE)
+_REPRESENTED = re.compile(r'^(?:REPRESENTED|REP\.?)\s+BY\s+(.+)$', re.IGNORECASE)
+
+
+def state_for_pin(pin: str) -> Optional[str]:
+    """State/UT of a PIN code by longest known prefix"""
+    for length in (3, 2):
+        state = PIN_PREFIX_STATES.get(pin[:length])
+        if state:
+            return state
+    return None
+
+
+def _empty_party(role: str, number: Optional[str] = None) -> Dict[str, Any]:
+    return {
+        "role": role,
+        "number": number,
+        "name": "",
+        "designation": "",
+        "age": "",
+        "relations": "",
+        "address": {component: "" for component in ADDRESS_COMPONENTS},
+    }
+
+
+def _is_resolved(party: Dict[str, Any]) -> bool:
+    """An address is usable once it has a PIN or a district plus one more component"""
+    address = party["address"]
+    filled = [component for component in ADDRESS_COMPONENTS if address[component]]
+    return bool(address["zipcode"]) or (bool(address["district"]) and len(filled) >= 2)
+
+
+def _party_block(text: str, max_chars: int = 6000) -> str:
+    """Header part of the order, where parties and their addresses are listed"""
+    head = text[:max_chars]
+    end = _BLOCK_END.search(head)
+    return head[:end.start()] if end else head
+
+
+def _segments(block: str) -> List[str]:
+    """Lines of the block split into their comma-separated parts"""
+    segments = []
+    for line in block.splitlines():
+        for part in line.split(","):
+            part = part.strip(" \t;")
+            if part:
+                segments.append(part)
+    return segments
+
+
+class _PartyBlockParser:
+    """State machine over the segments of the party block"""
+
+    SEEK, PARTY, COUNSEL = "seek", "party", "counsel"
+
+    def __init__(self):
+        self.state = self.SEEK
+        self.role = ""
+        self.party: Optional[Dict[str, Any]] = None
+        self.in_address = False
+        self.parties: List[Dict[str, Any]] = []
+
+    def _close_party(self):
+        if self.party and (self.party["name"] or any(self.party["address"].values())):
+            self.parties.append(self.party)
+        self.party = None
+        self.in_address = False
+
+    def _open_party(self, number: Optional[str] = None):
+        self._close_party()
+        self.party = _empty_party(self.role, number)
+        self.state = self.PARTY
+
+    def feed(self, segment: str):
+        header = _ROLE_HEADER.match(segment)
+        if header:
+            self._close_party()
+            role = header.group(1).lower()
+            self.role = "respondent" if role in ("respondent", "defendant") else "petitioner"
+            self.state = self.PARTY
+            return
+
+        if not self.role:
+            return
+
+        if _COUNSEL.match(segment):
+            self._close_party()
+            self.state = self.COUNSEL
+            return
+
+        number = _PARTY_NUMBER.match(segment)
+        if number:
+            self._open_party(number.group(1))
+            return
+
+        if self.state == self.COUNSEL:
+            return
+
+        if self.party is None:
+            self._open_party()
+        self._feed_party(segment)
+
+    def _feed_party(self, segment: str):
+        party = self.party
+        address = party["address"]
+
+        residing = _RESIDING.search(segment)
+        if residing:
+            self.in_address = True
+            segment = residing.group(1).strip()
+            if not segment:
+                return
+
+        age = _AGE.search(segment)
+        if age:
+            party["age"] = age.group(1)
+            segment = (segment[:age.start()] + segment[age.end():]).strip()
+            if not segment:
+                return
+
+        relation = _RELATION.search(segment)
+        if relation:
+            party["relations"] = f"{relation.group(1).upper()}/o {relation.group(2).strip()}"
+            return
+
+        pin = _PIN.search(segment)
+        if pin:
+            address["zipcode"] = pin.group(1) + pin.group(2)
+            segment = segment[:pin.start()].strip(" -–:")
+            if not segment:
+                # A PIN closes the address; the next segment belongs to someone else
+                self._finish_address()
+                return
+
+        represented = _REPRESENTED.match(segment)
+        if represented:
+            party["designation"] = represented.group(1).strip()
+            return
+
+        post_office = _POST_OFFICE.match(segment)
+        district = _DISTRICT.match(segment)
+        if post_office:
+            address["post_office"] = (post_office.group(1) or post_office.group(2)).strip().title() + " P.O."
+            self.in_address = True
+        elif district:
+            address["district"] = (district.group(1) or district.group(2)).strip().title()
+            self.in_address = True
+        elif not party["name"]:
+            party["name"] = segment
+            state_of = _STATE_OF.match(segment)
+            if state_of:
+                address["state"] = state_of.group(1).strip().title()
+        elif _HOUSE.search(segment) and not address["apartment_house"]:
+            address["apartment_house"] = segment.title()
+            self.in_address = True
+        elif _STREET.search(segment) and not address["street"]:
+            address["street"] = segment.title()
+            self.in_address = True
+        elif self.in_address or address["apartment_house"]:
+            # Plain place names: village first, then city
+            if not address["village"]:
+                address["village"] = segment.title()
+            elif not address["city"]:
+                address["city"] = segment.title()
+        elif not party["designation"]:
+            party["designation"] = segment
+
+        if pin:
+            self._finish_address()
+
+    def _finish_address(self):
+        address = self.party["address"]
+        pin = address["zipcode"]
+        if pin:
+            address["state"] = address["state"] or state_for_pin(pin) or ""
+            address["district"] = address["district"] or PIN_PREFIX_DISTRICTS.get(pin[:3], "")
+        if not address["city"] and address["district"]:
+            address["city"] = address["district"]
+        self.in_address = False
+        # Further segments (before the next number/header) are not part of this party's address
+        self._close_party()
+        self.state = self.PARTY
+
+    def finish(self) -> List[Dict[str, Any]]:
+        self._close_party()
+        return self.parties
+
+
+def parse_parties(text: str) -> List[Dict[str, Any]]:
+    """Every party in the header block with name, age, relations and structured address"""
+    parser = _PartyBlockParser()
+    for segment in _segments(_party_block(text)):
+        parser.feed(segment)
+    parties = parser.finish()
+    for party in parties:
+        party["resolved"] = _is_resolved(party)
+    return parties
+
+
+def extract_address_fields(text: str) -> Dict[str, Any]:
+    """
+    llama.py fields resolved from the party block: petitioner_address, respondent_address,
+    additional_respondents (plus age/relations when found). Unresolved parties are left out
+    so the caller can fall back to the model for them only.
+    """
+    results: Dict[str, Any] = {}
+    parties = parse_parties(text)
+    petitioners = [party for party in parties if party["role"] == "petitioner"]
+    respondents = [party for party in parties if party["role"] == "respondent"]
+
+    def address_of(party):
+        return {component: value for component, value in party["address"].items() if value}
+
+    if petitioners and petitioners[0]["resolved"]:
+        petitioner = petitioners[0]
+        results["petitioner_address"] = address_of(petitioner)
+        if petitioner["age"]:
+            results["petitioner_age"] = petitioner["age"]
+        if petitioner["relations"]:
+            results["petitioner_relations"] = petitioner["relations"]
+
+    if respondents and respondents[0]["resolved"]:
+        results["respondent_address"] = address_of(respondents[0])
+        if respondents[0]["designation"]:
+            results["respondent_designation"] = respondents[0]["designation"]
+
+    if len(respondents) > 1 and all(party["resolved"] for party in respondents[1:]):
+        results["additional_respondents"] = [
+            {
+                "number": party["number"] or str(index),
+                "name": party["name"],
+                "designation": party["designation"],
+                "address": address_of(party),
+            }
+            for index, party in enumerate(respondents[1:], 2)
+        ]
+
+    return results
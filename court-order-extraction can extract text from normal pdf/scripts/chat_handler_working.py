@@ -10,6 +10,7 @@ import json
 import os
 import time
 import signal
+import threading
 from pathlib import Path
 
 # Add timeout handling
@@ -44,14 +45,30 @@ def with_timeout(func, timeout_seconds=30):
 scripts_dir = Path(__file__).parent
 sys.path.insert(0, str(scripts_dir))
 
+# The shared LLM, summary and retrieval modules live in the repository's utils package;
+# appended so this directory's own modules (metadata, ocr) keep precedence
+REPO_ROOT = str(Path(__file__).resolve().parents[2])
+if REPO_ROOT not in sys.path:
+    sys.path.append(REPO_ROOT)
+
 # Import LLaMA functions
 try:
-    from llama import answer_from_data, generate_court_order_summary
+    from llama import (answer_from_corpus, answer_from_corpus_stream, answer_from_data, answer_from_data_stream,
+                       generate_court_order_summary, generate_court_order_summary_stream)
+    from utils.llm_client import get_llm_client
     LLAMA_AVAILABLE = True
 except ImportError as e:
     print(f"Warning: LLaMA not available: {e}", file=sys.stderr)
     LLAMA_AVAILABLE = False
 
+# Corpus mode: questions across every processed document
+try:
+    from utils.corpus_index import hit_sources, search_corpus
+    CORPUS_AVAILABLE = True
+except ImportError as e:
+    print(f"Warning: corpus index not available: {e}", file=sys.stderr)
+    CORPUS_AVAILABLE = False
+
 def general_legal_chat_llama(question):
     """
     Handle general legal questions using LLaMA AI model with timeout
@@ -61,13 +78,39 @@ def general_legal_chat_llama(question):
         if not LLAMA_AVAILABLE:
             return general_legal_chat_simple(question)
         
-        # Import LLaMA for general legal assistance
-        from langchain_ollama.llms import OllamaLLM
-        
-        llm = OllamaLLM(model="llama3.1:8b")
+        llm = get_llm_client()
+        response = llm.invoke(_general_chat_prompt(question), label="chat")
         
-        # Enhanced prompt for legal assistance
-        prompt = f"""
+        return response + LEGAL_DISCLAIMER
+    
+    try:
+        return _llama_query()
+    except Exception as e:
+        print(f"LLaMA general chat error: {e}", file=sys.stderr)
+        return general_legal_chat_simple(question)
+
+# Output folders of processed documents; a chat request may only point into this directory
+OUTPUT_ROOT = os.path.realpath(os.path.join(os.path.dirname(os.path.abspath(__file__)), "temp_output"))
+
+def document_index_dir(document_dir):
+    """
+    RAG index directory of a processed document, or None if the folder is not one of ours
+    """
+    if not document_dir:
+        return None
+    document_dir = os.path.realpath(document_dir)
+    if os.path.commonpath([document_dir, OUTPUT_ROOT]) != OUTPUT_ROOT:
+        print(f"Warning: ignoring document folder outside {OUTPUT_ROOT}: {document_dir}", file=sys.stderr)
+        return None
+    return os.path.join(document_dir, "rag_index")
+
+LEGAL_DISCLAIMER = "\n\n⚖️ **Legal Disclaimer**: This information is for educational purposes only. Please consult with a qualified legal professional for advice specific to your situation."
+
+SUMMARY_KEYWORDS = ['summary', 'summarize', 'overview']
+
+def _general_chat_prompt(question):
+    # Enhanced prompt for legal assistance
+    return f"""
 You are an expert legal AI assistant specializing in Indian law and legal procedures. Provide accurate, helpful, and informative responses to legal questions.
 
 GUIDELINES:
@@ -81,21 +124,8 @@ LEGAL QUESTION: {question}
 
 Please provide a comprehensive and helpful response:
 """
-        
-        response = llm.invoke(prompt)
-        
-        # Add disclaimer
-        disclaimer = "\n\n⚖️ **Legal Disclaimer**: This information is for educational purposes only. Please consult with a qualified legal professional for advice specific to your situation."
-        
-        return response + disclaimer
-    
-    try:
-        return _llama_query()
-    except Exception as e:
-        print(f"LLaMA general chat error: {e}", file=sys.stderr)
-        return general_legal_chat_simple(question)
 
-def document_qa_llama(document_text, question):
+def document_qa_llama(document_text, question, index_dir=None):
     """
     Advanced document Q&A using LLaMA AI model with timeout
     """
@@ -105,7 +135,7 @@ def document_qa_llama(document_text, question):
             return document_qa_simple(document_text, question)
         
         # Check for special summary request
-        if any(word in question.lower() for word in ['summary', 'summarize', 'overview']):
+        if any(word in question.lower() for word in SUMMARY_KEYWORDS):
             try:
                 summary = generate_court_order_summary(document_text)
                 return f"📄 **Document Summary:**\n\n{summary}"
@@ -116,7 +146,7 @@ def document_qa_llama(document_text, question):
         
         # Use LLaMA for document-specific questions
         try:
-            response = answer_from_data(document_text, question)
+            response = answer_from_data(document_text, question, index_dir)
             return f"📄 **Based on your document:**\n\n{response}"
         except Exception as e:
             print(f"LLaMA document Q&A error: {e}", file=sys.stderr)
@@ -351,15 +381,75 @@ I can provide guidance on various legal scenarios including:
 
 Please provide more details about your specific situation for targeted guidance!"""
 
-def process_chat_message(message, mode='general', document_text=None):
+NO_CORPUS_MATCHES = "🔎 No processed documents match this question. Try removing some of the filters (state, court, date range or statute), or process more documents first."
+
+def corpus_retrieval(question, filters=None):
+    """
+    Filters applied and chunks retrieved from the corpus index for a question
+    """
+    if not CORPUS_AVAILABLE:
+        return dict(filters or {}), []
+    try:
+        return search_corpus(question, filters)
+    except Exception as e:
+        print(f"Corpus search error: {e}", file=sys.stderr)
+        return dict(filters or {}), []
+
+def corpus_qa_simple(hits):
+    """
+    Without LLaMA: the most relevant excerpts, with the documents they come from
+    """
+    if not hits:
+        return NO_CORPUS_MATCHES
+    lines = ["🔎 **Most relevant passages across your documents:**\n"]
+    for hit in hits[:5]:
+        source = ", ".join(value for value in (hit.case_number, hit.court, hit.order_date) if value) or hit.doc_id
+        excerpt = hit.text if len(hit.text) <= 400 else hit.text[:400] + "..."
+        lines.append(f"**{source}**\n> {excerpt}\n")
+    return "\n".join(lines)
+
+def corpus_qa_llama(question, hits):
+    """
+    Corpus Q&A using LLaMA AI model with timeout
+    """
+    @with_timeout
+    def _llama_corpus_query():
+        if not LLAMA_AVAILABLE or not hits:
+            return corpus_qa_simple(hits)
+        try:
+            response = answer_from_corpus(question, hits=hits)
+            return f"🔎 **Based on {len(hit_sources(hits))} of your documents:**\n\n{response}"
+        except Exception as e:
+            print(f"LLaMA corpus Q&A error: {e}", file=sys.stderr)
+            return corpus_qa_simple(hits)
+    
+    try:
+        return _llama_corpus_query()
+    except Exception as e:
+        print(f"Corpus Q&A error: {e}", file=sys.stderr)
+        return corpus_qa_simple(hits)
+
+def process_chat_message(message, mode='general', document_text=None, document_dir=None, filters=None):
     """
     Process a chat message using LLaMA AI model for both document and general questions.
+    In 'corpus' mode the question is answered across all processed documents.
     """
     try:
-        if mode == 'document' and document_text and document_text.strip():
+        if mode == 'corpus':
+            applied_filters, hits = corpus_retrieval(message, filters)
+            return {
+                'response': corpus_qa_llama(message, hits),
+                'mode': 'corpus',
+                'success': True,
+                'using_document': False,
+                'filters': applied_filters,
+                'sources': hit_sources(hits) if hits else [],
+                'ai_powered': LLAMA_AVAILABLE
+            }
+        elif mode == 'document' and document_text and document_text.strip():
             # Use document-specific analysis with LLaMA
             if LLAMA_AVAILABLE:
-                answer = document_qa_llama(document_text, message)
+                answer = document_qa_llama(document_text, message, document_index_dir(document_dir))
             else:
                 answer = document_qa_simple(document_text, message)
                 
@@ -393,10 +483,146 @@ def process_chat_message(message, mode='general', document_text=None):
             'error': str(e)
         }
 
+def _stream_with_fallback(tokens, fallback, prefix="", suffix=""):
+    """
+    Yield LLaMA tokens framed by prefix/suffix; if generation fails before the first
+    token, yield the fallback answer instead (a failure mid-answer is re-raised).
+    """
+    started = False
+    try:
+        for token in tokens():
+            if not started:
+                started = True
+                yield prefix
+            yield token
+    except Exception as e:
+        print(f"LLaMA streaming error: {e}", file=sys.stderr)
+        if started:
+            raise
+        yield fallback()
+        return
+    if started:
+        yield suffix
+    else:
+        yield fallback()
+
+def stream_chat_message(message, mode='general', document_text=None, document_dir=None, filters=None,
+                        on_progress=None):
+    """
+    Same answers as process_chat_message, as a sequence of events for newline-delimited
+    JSON output: one 'start', a 'token' per generated piece, then 'done' (or 'error').
+    A summary of a long document runs its map/reduce calls before the first token;
+    on_progress(event) gets a 'progress' event from the worker threads as each one finishes.
+    """
+    start_time = time.time()
+    using_document = bool(mode == 'document' and document_text and document_text.strip())
+    mode = 'corpus' if mode == 'corpus' else 'document' if using_document else 'general'
+    start = {'type': 'start', 'mode': mode, 'using_document': using_document, 'ai_powered': LLAMA_AVAILABLE}
+    if mode == 'corpus':
+        # Retrieval happens before the first token, so the sources can be shown right away
+        applied_filters, hits = corpus_retrieval(message, filters)
+        start['filters'] = applied_filters
+        start['sources'] = hit_sources(hits) if hits else []
+    yield start
+    
+    if mode == 'corpus':
+        fallback = lambda: corpus_qa_simple(hits)
+        if not LLAMA_AVAILABLE or not hits:
+            pieces = iter([fallback()])
+        else:
+            pieces = _stream_with_fallback(lambda: answer_from_corpus_stream(message, hits=hits), fallback,
+                                           prefix=f"🔎 **Based on {len(start['sources'])} of your documents:**\n\n")
+    elif using_document:
+        fallback = lambda: document_qa_simple(document_text, message)
+        if not LLAMA_AVAILABLE:
+            pieces = iter([fallback()])
+        elif any(word in message.lower() for word in SUMMARY_KEYWORDS):
+            progress = None
+            if on_progress is not None:
+                progress = lambda stage, done, total: on_progress(
+                    {'type': 'progress', 'stage': stage, 'done': done, 'total': total})
+            pieces = _stream_with_fallback(lambda: generate_court_order_summary_stream(document_text, progress=progress),
+                                           fallback, prefix="📄 **Document Summary:**\n\n")
+        else:
+            index_dir = document_index_dir(document_dir)
+            pieces = _stream_with_fallback(lambda: answer_from_data_stream(document_text, message, index_dir), fallback,
+                                           prefix="📄 **Based on your document:**\n\n")
+    else:
+        fallback = lambda: general_legal_chat_simple(message)
+        if not LLAMA_AVAILABLE:
+            pieces = iter([fallback()])
+        else:
+            pieces = _stream_with_fallback(
+                lambda: get_llm_client().stream(_general_chat_prompt(message), label="chat"), fallback,
+                suffix=LEGAL_DISCLAIMER)
+    
+    parts = []
+    first_token_time = None
+    try:
+        for piece in pieces:
+            if not piece:
+                continue
+            if first_token_time is None:
+                first_token_time = time.time() - start_time
+            parts.append(piece)
+            yield {'type': 'token', 'text': piece}
+    except Exception as e:
+        yield {
+            'type': 'error',
+            'response': "".join(parts),
+            'mode': mode,
+            'success': False,
+            'error': str(e)
+        }
+        return
+    
+    done = {
+        'type': 'done',
+        'response': "".join(parts),
+        'mode': mode,
+        'success': True,
+        'using_document': using_document,
+        'ai_powered': LLAMA_AVAILABLE,
+        'timestamp': time.time(),
+        'time_to_first_token': first_token_time,
+        'processing_time': time.time() - start_time
+    }
+    if mode == 'corpus':
+        done['filters'] = start['filters']
+        done['sources'] = start['sources']
+    if LLAMA_AVAILABLE:
+        done['llm_metrics'] = get_llm_client().metrics()['total']
+    yield done
+
+_emit_lock = threading.Lock()
+
+# Seconds between 'keepalive' events; the API drops a stream that is silent for 30 seconds
+KEEPALIVE_SECONDS = 10
+
+def emit_event(event):
+    """
+    Write one event as a line of JSON and flush it, so the API can forward it immediately.
+    Safe to call from several threads.
+    """
+    line = json.dumps(event, ensure_ascii=False)
+    with _emit_lock:
+        print(line, flush=True)
+
+def _keepalive(stop):
+    """
+    Emit a 'keepalive' event every KEEPALIVE_SECONDS until stop is set, so slow steps
+    before the first token (model loading, summary map/reduce) do not look like a hung stream.
+    """
+    while not stop.wait(KEEPALIVE_SECONDS):
+        emit_event({'type': 'keepalive'})
+
 def main():
     """
     Main function to handle input/output with the Node.js API.
+    With "stream": true in the input, the answer is written as newline-delimited JSON
+    events while it is generated (see stream_chat_message).
     """
+    streaming = False
     try:
         start_time = time.time()
         
@@ -416,6 +642,8 @@ def main():
         message = data.get('message', '').strip()
         mode = data.get('mode', 'general')
         document_text = data.get('documentText')
+        document_dir = data.get('documentDir')
+        filters = data.get('filters') or None
         
         # Debug logging
         print(f"DEBUG: Message: {message}", file=sys.stderr)
@@ -428,12 +656,26 @@ def main():
         if not message:
             raise ValueError("Message is required")
         
+        streaming = bool(data.get('stream'))
+        if streaming:
+            stop = threading.Event()
+            threading.Thread(target=_keepalive, args=(stop,), daemon=True).start()
+            try:
+                for event in stream_chat_message(message, mode, document_text, document_dir, filters,
+                                                 on_progress=emit_event):
+                    emit_event(event)
+            finally:
+                stop.set()
+            return
+        
         # Process the message
-        result = process_chat_message(message, mode, document_text)
+        result = process_chat_message(message, mode, document_text, document_dir, filters)
         
         # Add timestamp
         result['timestamp'] = time.time()
         result['processing_time'] = time.time() - start_time
+        if LLAMA_AVAILABLE:
+            result['llm_metrics'] = get_llm_client().metrics()['total']
         
         # Output JSON response
         print(json.dumps(result, ensure_ascii=False, indent=None))
@@ -446,7 +688,9 @@ def main():
             'success': False,
             'error': str(e)
         }
-        print(json.dumps(error_response, ensure_ascii=False, indent=None))
+        if streaming:
+            error_response['type'] = 'error'
+        print(json.dumps(error_response, ensure_ascii=False, indent=None), flush=True)
         sys.exit(1)
 
 if __name__ == '__main__':
@@ -13,6 +13,12 @@ from pathlib import Path
 # Add the scripts directory to Python path to import modules
 sys.path.insert(0, os.path.dirname(os.path.abspath(__file__)))
 
+# The shared LLM, summary and retrieval modules live in the repository's utils package;
+# appended so this directory's own modules (metadata, ocr) keep precedence
+REPO_ROOT = str(Path(__file__).resolve().parents[2])
+if REPO_ROOT not in sys.path:
+    sys.path.append(REPO_ROOT)
+
 def log_debug(message):
     """Log debug messages to stderr for debugging"""
     print(f"DEBUG: {message}", file=sys.stderr, flush=True)
@@ -53,6 +59,22 @@ def safe_import():
         log_debug(f"❌ Failed to import LLaMA module: {e}")
         modules['llama_summary'] = None
     
+    try:
+        from utils.rag_index import build_document_index, EMBEDDINGS_AVAILABLE
+        modules['rag_index'] = build_document_index if EMBEDDINGS_AVAILABLE else None
+        log_debug(f"{'✅' if EMBEDDINGS_AVAILABLE else '⚠️'} RAG index module imported (embeddings {'available' if EMBEDDINGS_AVAILABLE else 'unavailable'})")
+    except ImportError as e:
+        log_debug(f"❌ Failed to import RAG index module: {e}")
+        modules['rag_index'] = None
+    
+    try:
+        from utils.corpus_index import add_to_corpus, EMBEDDINGS_AVAILABLE
+        modules['corpus_index'] = add_to_corpus if EMBEDDINGS_AVAILABLE else None
+        log_debug(f"{'✅' if EMBEDDINGS_AVAILABLE else '⚠️'} Corpus index module imported")
+    except ImportError as e:
+        log_debug(f"❌ Failed to import corpus index module: {e}")
+        modules['corpus_index'] = None
+    
     return modules
 
 def create_output_directory(pdf_path):
@@ -267,6 +289,11 @@ def process_document_complete(pdf_path, options):
     # Import modules
     modules = safe_import()
     
+    # Load the LLaMA model on the Ollama server while OCR and extraction run
+    if modules['llama_summary']:
+        from utils.llm_client import get_llm_client
+        get_llm_client().warmup_in_background()
+    
     # Create output directory
     output_dir = create_output_directory(pdf_path)
     if not output_dir:
@@ -372,7 +399,7 @@ def process_document_complete(pdf_path, options):
         if modules['llama_summary']:
             try:
                 log_debug("🤖 Attempting AI-powered summarization...")
-                summary = modules['llama_summary'](full_text)
+                summary = modules['llama_summary'](full_text, summary_length)
                 if summary and len(summary.strip()) > 20:
                     log_debug("✅ AI summarization successful")
                     result['processingStages']['summarization'] = True
@@ -421,6 +448,21 @@ def process_document_complete(pdf_path, options):
                 
                 result['outputFiles'] = {**ocr_files, **metadata_files}
                 result['outputDirectory'] = output_dir
+                
+                # Retrieval index for document chat (long documents only)
+                if modules['rag_index']:
+                    index_dir = modules['rag_index'](output_dir, full_text, result['metadata'])
+                    if index_dir:
+                        result['outputFiles']['rag_index'] = index_dir
+                        log_debug(f"✅ RAG index saved to {index_dir}")
+                
+                # Corpus-wide index for questions across all processed documents
+                if modules['corpus_index']:
+                    from state_name import match_region
+                    corpus_metadata = dict(result['metadata'])
+                    corpus_metadata['detected_state'] = match_region(result['metadata'].get('court_name', ''))[0]
+                    if modules['corpus_index'](filename_prefix, full_text, corpus_metadata, output_dir):
+                        log_debug("✅ Document added to the corpus index")
                 result['processingStages']['file_output'] = True
                 log_debug("✅ Output files saved successfully")
                 
@@ -1,48 +1,44 @@
-from langchain_ollama.llms import OllamaLLM # type: ignore
 import json
 import re
-from typing import Dict, Any, List, Optional
+import sys
+from pathlib import Path
+from typing import Dict, Any, Iterator, List, Optional
 import os
 
-def generate_court_order_summary(document_text: str) -> str:
+# The shared LLM, summary and retrieval modules live in the repository's utils package;
+# appended so this directory's own modules (metadata, ocr) keep precedence
+REPO_ROOT = str(Path(__file__).resolve().parents[2])
+if REPO_ROOT not in sys.path:
+    sys.path.append(REPO_ROOT)
+
+from address_parser import extract_address_fields
+from utils.llm_client import get_llm_client
+from utils.summarizer import summarize_court_order, stream_court_order_summary
+from utils.rag_index import retrieval_context
+from utils.corpus_index import CorpusIndex, search_corpus
+
+def generate_court_order_summary(document_text: str, length: str = "medium") -> str:
     """
     Generate a clear and concise summary of a court order following specific format requirements.
-    Creates a 100-120 word summary covering essential elements.
+    Creates a 100-120 word summary covering essential elements ("short" and "long" give 60-80
+    and 200-250 words). Long judgments are summarised chunk by chunk, then combined.
     """
-    llm = OllamaLLM(model="llama3.1:8b")
-    
-    # Special prompt for court order summarization
-    prompt = f"""
-You are a legal document summarization expert. Create a clear and concise summary of the court order provided below.
-
-SUMMARIZATION REQUIREMENTS:
-- Generate a summary of 100-120 words that captures essential elements
-- Include details from the final judgement including fines, penalties, prison sentences with exact numbers
-- Mention any contingencies mentioned in the judgement
-- Cover any directions issued or acquittals
-- Use simple and understandable language
-- Focus on key facts: date, case number, parties, charges, court decision, and specific outcomes
-
-COURT ORDER DOCUMENT:
-{document_text}
-
-EXAMPLE FORMAT (for reference):
-"On 2 February 2024, Bail Application No. 41 of 2024 filed by Ibrahim, aged 36 accused in Crime No. 922/2023 of Vengara Police Station. He is charged under Section 286 IPC and Sections 4(b) & 5 of the Explosive Substances Act, 1908. for allegedly conducting illegal quarrying and blasting granite without a license, endangering life and property. The court noted his ownership of the site, a pending similar offence, the need for proper investigation. Anticipatory bail was denied. but directions were issued for him to surrender within two weeks. after which his bail request could be considered on merits."
-
-Please provide a summary following this style and format, ensuring it's clear, factual, and within 100-120 words:
-"""
-    
-    response = llm.invoke(prompt)
-    return response
+    return summarize_court_order(document_text, length)
 
-def answer_from_data(data_text: str, question: str) -> str:
+def generate_court_order_summary_stream(document_text: str, length: str = "medium", progress=None) -> Iterator[str]:
     """
-    Answer questions based on provided data using Llama
+    Same summary as generate_court_order_summary, yielded token by token as the final step generates it.
+    progress(stage, done, total) is called as each map/reduce call on a long document finishes.
     """
-    llm = OllamaLLM(model="llama3.1:8b")
+    return stream_court_order_summary(document_text, length, progress=progress)
+
+def _answer_prompt(data_text: str, question: str, index_dir: str = None,
+                   metadata: Optional[Dict[str, Any]] = None) -> str:
+    # Long documents: only the extracted details and the most relevant excerpts
+    data_text = retrieval_context(data_text, question, index_dir, metadata=metadata) or data_text
     
     # Create a prompt that includes the data and question
-    prompt = f"""
+    return f"""
 Based on the following data, please answer the question accurately. Only use information from the provided data.
 
 DATA:
@@ -52,10 +48,57 @@ QUESTION: {question}
 
 ANSWER: Please provide a clear, accurate answer based only on the information in the data above. If the answer cannot be found in the data, say "The information is not available in the provided data."
 """
-    
-    response = llm.invoke(prompt)
+
+def answer_from_data(data_text: str, question: str, index_dir: str = None,
+                     metadata: Optional[Dict[str, Any]] = None) -> str:
+    """
+    Answer questions based on provided data using Llama.
+    For long documents only the extracted details and the most relevant excerpts are sent
+    (see rag_index; index_dir is the document's saved index in its output folder,
+    metadata the extracted details, used when that index has to be rebuilt).
+    """
+    llm = get_llm_client()
+    response = llm.invoke(_answer_prompt(data_text, question, index_dir, metadata), temperature=0, label="qa")
     return response
 
+def answer_from_data_stream(data_text: str, question: str, index_dir: str = None,
+                            metadata: Optional[Dict[str, Any]] = None) -> Iterator[str]:
+    """
+    Same answer as answer_from_data, yielded token by token
+    """
+    return get_llm_client().stream(_answer_prompt(data_text, question, index_dir, metadata), temperature=0,
+                                   label="qa")
+
+def _corpus_prompt(question: str, hits) -> str:
+    return f"""
+Below are excerpts from several processed court orders, grouped by document. Answer the question using only these excerpts.
+Name the documents (case number or court and date) that each part of your answer relies on. If the excerpts do not answer the question, say "The information is not available in the processed documents."
+
+EXCERPTS:
+{CorpusIndex.format_context(hits)}
+
+QUESTION: {question}
+
+ANSWER:
+"""
+
+def answer_from_corpus(question: str, filters: Optional[Dict[str, Any]] = None, hits=None) -> str:
+    """
+    Answer a question across all processed documents (see corpus_index). filters narrow the
+    documents by state, court, date range or statute; hits are chunks already retrieved.
+    """
+    if hits is None:
+        _, hits = search_corpus(question, filters)
+    return get_llm_client().invoke(_corpus_prompt(question, hits), temperature=0, label="corpus_qa")
+
+def answer_from_corpus_stream(question: str, filters: Optional[Dict[str, Any]] = None, hits=None) -> Iterator[str]:
+    """
+    Same answer as answer_from_corpus, yielded token by token
+    """
+    if hits is None:
+        _, hits = search_corpus(question, filters)
+    return get_llm_client().stream(_corpus_prompt(question, hits), temperature=0, label="corpus_qa")
+
 def interactive_qa_session(document_text: str = None):
     """
     Enhanced Interactive Q&A session with both document-specific and general chat capabilities
@@ -223,10 +266,19 @@ def general_legal_chat(question: str) -> str:
     """
     General legal chat for discussing legal concepts, case scenarios, and providing legal information
     """
-    llm = OllamaLLM(model="llama3.1:8b")
-    
+    llm = get_llm_client()
+    response = llm.invoke(_general_chat_prompt(question), label="chat")
+    return response
+
+def general_legal_chat_stream(question: str) -> Iterator[str]:
+    """
+    Same answer as general_legal_chat, yielded token by token
+    """
+    return get_llm_client().stream(_general_chat_prompt(question), label="chat")
+
+def _general_chat_prompt(question: str) -> str:
     # Create a prompt for general legal discussion
-    prompt = f"""
+    return f"""
 You are an expert legal AI assistant with comprehensive knowledge of Indian law, legal procedures, and case law. You provide helpful, accurate, and informative responses about legal topics.
 
 GUIDELINES:
@@ -241,9 +293,6 @@ USER QUESTION: {question}
 
 LEGAL ASSISTANT RESPONSE:
 """
-    
-    response = llm.invoke(prompt)
-    return response
 
 
 def extract_metadata_comprehensive(document_text: str, output_file: str = None) -> Dict[str, Any]:
@@ -653,12 +702,17 @@ def _extract_with_regex(text: str) -> Dict[str, Any]:
     if sections:
         results["sections_acts"] = list(set(sections))  # Remove duplicates
     
+    # Structured party addresses from the header block. The parser is the primary source: what it
+    # resolves replaces the address regexes above, which only stand in for parties it leaves
+    # unresolved; parties neither resolves reach the LLaMA prompts
+    results.update(extract_address_fields(text))
+    
     return results
 
 def _extract_with_llama(text: str, missing_fields: List[str]) -> Dict[str, Any]:
     """Extract missing fields using LLaMA model with detailed prompts"""
     
-    llm = OllamaLLM(model="llama3.1:8b")
+    llm = get_llm_client()
     results = {}
     
     # Create comprehensive extraction prompt
@@ -720,7 +774,7 @@ field_name: extracted_value
 """
     
     try:
-        response = llm.invoke(prompt)
+        response = llm.invoke(prompt, temperature=0, label="extract")
         
         # Parse the response
         lines = response.strip().split('\n')
@@ -753,7 +807,7 @@ Extract these address components for PETITIONER:
 Format: component_name: value (or NOT_FOUND if not available)
 """
             
-            addr_response = llm.invoke(address_prompt)
+            addr_response = llm.invoke(address_prompt, temperature=0, label="extract")
             address_dict = {}
             for line in addr_response.split('\n'):
                 if ':' in line:
@@ -786,7 +840,7 @@ Extract these address components for RESPONDENT:
 Format: component_name: value (or NOT_FOUND if not available)
 """
             
-            resp_addr_response = llm.invoke(resp_address_prompt)
+            resp_addr_response = llm.invoke(resp_address_prompt, temperature=0, label="extract")
             resp_address_dict = {}
             for line in resp_addr_response.split('\n'):
                 if ':' in line:
@@ -819,7 +873,7 @@ respondent_2: Name - Type - Details
 (or NOT_FOUND if no additional respondents)
 """
             
-            mult_resp_response = llm.invoke(multiple_resp_prompt)
+            mult_resp_response = llm.invoke(multiple_resp_prompt, temperature=0, label="extract")
             additional_respondents = []
             for line in mult_resp_response.split('\n'):
                 if 'respondent_' in line.lower() and ':' in line:
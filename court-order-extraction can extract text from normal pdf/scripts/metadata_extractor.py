@@ -2,6 +2,7 @@ import os
 import re
 import json
 import logging
+import sys
 import time
 import warnings
 from datetime import datetime
@@ -10,6 +11,12 @@ from dataclasses import dataclass, asdict
 from pathlib import Path
 from text_processor import LegalTextProcessor
 
+# The shared LLM, summary and retrieval modules live in the repository's utils package;
+# appended so this directory's own modules (metadata, ocr) keep precedence
+REPO_ROOT = str(Path(__file__).resolve().parents[2])
+if REPO_ROOT not in sys.path:
+    sys.path.append(REPO_ROOT)
+
 # Suppress warnings for cleaner output
 warnings.filterwarnings("ignore")
 
@@ -18,7 +25,8 @@ AI_MODULES = {}
 
 # LLaMA integration
 try:
-    from langchain_ollama.llms import OllamaLLM
+    import ollama  # noqa: F401  (client library behind llm_client)
+    from utils.llm_client import get_llm_client
     AI_MODULES['llama'] = True
 except ImportError:
     AI_MODULES['llama'] = False
@@ -1645,11 +1653,7 @@ class MetaDataExtractor:
         if missing_fields and AI_MODULES['llama']:
             print(f"🦙 Stage 2: LLaMA extraction for {len(missing_fields)} missing fields...")
             try:
-                llm = OllamaLLM(
-                    model="llama3.1:8b",
-                    temperature=0.1,
-                    timeout=300
-                )
+                llm = get_llm_client()
                 
                 # Create focused prompt for missing fields only
                 missing_fields_str = ", ".join(missing_fields)
@@ -1666,7 +1670,7 @@ class MetaDataExtractor:
                 Return only valid JSON with the requested fields:
                 """
                 
-                llama_response = llm.invoke(prompt)
+                llama_response = llm.invoke(prompt, temperature=0, label="metadata")
                 
                 # Parse LLaMA response
                 try:
@@ -0,0 +1,112 @@
+"""
+Aho-Corasick Phrase Automaton
+Matches a large dictionary of phrases (court names, aliases, regions, ...) against a
+text in one linear pass, regardless of how many phrases there are.
+
+Matching is case-insensitive, treats any run of whitespace as a single space (so
+"HIGH COURT OF\\nKARNATAKA" matches "high court of karnataka") and only reports
+whole-word matches. Offsets always refer to the original text.
+"""
+
+from collections import deque
+from dataclasses import dataclass
+from typing import Any, Dict, Iterator, List, Optional
+
+
+@dataclass
+class PhraseMatch:
+    """One dictionary phrase found in a text"""
+    start: int
+    end: int
+    phrase: str
+    payload: Any
+
+
+def normalize_phrase(phrase: str) -> str:
+    """Lower-case and collapse whitespace, the form phrases are stored and matched in"""
+    return " ".join(phrase.lower().split())
+
+
+class AhoCorasick:
+    """Case-insensitive, whole-word multi-phrase matcher"""
+
+    def __init__(self):
+        self._goto: List[Dict[str, int]] = [{}]
+        self._fail: List[int] = [0]
+        self._output: List[List[tuple]] = [[]]
+        self._built = False
+        self.size = 0
+
+    def add(self, phrase: str, payload: Any = None):
+        """Add a phrase; payload is returned with every match of it"""
+        phrase = normalize_phrase(phrase)
+        if not phrase:
+            return
+        node = 0
+        for ch in phrase:
+            next_node = self._goto[node].get(ch)
+            if next_node is None:
+                next_node = len(self._goto)
+                self._goto[node][ch] = next_node
+                self._goto.append({})
+                self._fail.append(0)
+                self._output.append([])
+            node = next_node
+        self._output[node].append((phrase, payload))
+        self._built = False
+        self.size += 1
+
+    def build(self):
+        """Compute failure links (called automatically before the first search)"""
+        queue = deque(self._goto[0].values())
+        for node in queue:
+            self._fail[node] = 0
+        while queue:
+            node = queue.popleft()
+            for ch, child in self._goto[node].items():
+                queue.append(child)
+                fail = self._fail[node]
+                while fail and ch not in self._goto[fail]:
+                    fail = self._fail[fail]
+                self._fail[child] = self._goto[fail].get(ch, 0)
+                self._output[child] = self._output[child] + self._output[self._fail[child]]
+        self._built = True
+
+    def iter_matches(self, text: str, start: int = 0, end: Optional[int] = None) -> Iterator[PhraseMatch]:
+        """Yield whole-word matches in text[start:end] in order of their end position"""
+        if not self._built:
+            self.build()
+        end = len(text) if end is None else min(end, len(text))
+        goto, fail, output = self._goto, self._fail, self._output
+
+        node = 0
+        # Original offset of every character fed to the automaton (whitespace runs feed one space)
+        positions: List[int] = []
+        previous_space = True
+        for index in range(start, end):
+            ch = text[index]
+            if ch.isspace():
+                if previous_space:
+                    continue
+                ch = " "
+                previous_space = True
+            else:
+                ch = ch.lower()
+                previous_space = False
+            positions.append(index)
+
+            while node and ch not in goto[node]:
+                node = fail[node]
+            node = goto[node].get(ch, 0)
+
+            for phrase, payload in output[node]:
+                match_start = positions[len(positions) - len(phrase)]
+                match_end = index + 1
+                if self._is_word_boundary(text, match_start, match_end):
+                    yield PhraseMatch(match_start, match_end, text[match_start:match_end], payload)
+
+    @staticmethod
+    def _is_word_boundary(text: str, start: int, end: int) -> bool:
+        before = text[start - 1] if start > 0 else " "
+        after = text[end] if end < len(text) else " "
+        return not (before.isalnum() or after.isalnum())
@@ -3,6 +3,84 @@ import json
 import os
 from typing import Dict, List, Any
 
+from .aho_corasick import AhoCorasick
+
+# Specialized tribunals first (they take priority over High Courts)
+TRIBUNAL_PATTERNS = {
+    "itat": ["INCOME TAX APPELLATE TRIBUNAL", "APPELLATE TRIBUNAL", "INCOME TAX APPELLATE TRI"]
+}
+
+# High Court patterns
+HIGH_COURT_PATTERNS = {
+    "delhi": ["HIGH COURT OF DELHI", "DELHI HIGH COURT"],
+    "andhra_pradesh": ["HIGH COURT OF ANDHRA PRADESH", "ANDHRA PRADESH HIGH COURT", "HIGH COURT OF ANDHRA PRADESH AT AMARAVATI"],
+    "telangana": ["HIGH COURT OF TELANGANA", "TELANGANA HIGH COURT"],
+    "arunachal_pradesh": ["HIGH COURT OF ARUNACHAL PRADESH", "ARUNACHAL PRADESH HIGH COURT", "GAUHATI HIGH COURT"],
+    "karnataka": ["HIGH COURT OF KARNATAKA", "KARNATAKA HIGH COURT"],
+    "tamil_nadu": ["MADRAS HIGH COURT", "HIGH COURT OF MADRAS"],
+    "kerala": ["HIGH COURT OF KERALA", "KERALA HIGH COURT"],
+    "maharashtra": ["BOMBAY HIGH COURT", "HIGH COURT OF BOMBAY"],
+    "gujarat": ["HIGH COURT OF GUJARAT", "GUJARAT HIGH COURT"],
+    "rajasthan": ["HIGH COURT OF RAJASTHAN", "RAJASTHAN HIGH COURT"],
+    "punjab": ["HIGH COURT OF PUNJAB", "PUNJAB AND HARYANA HIGH COURT"],
+    "west_bengal": ["CALCUTTA HIGH COURT", "HIGH COURT OF CALCUTTA"],
+    "odisha": ["HIGH COURT OF ORISSA", "ORISSA HIGH COURT"],
+    "bihar": ["PATNA HIGH COURT", "HIGH COURT OF JUDICATURE AT PATNA"],
+    "supreme_court": ["SUPREME COURT OF INDIA", "SUPREME COURT"]
+}
+
+# State-level patterns for lower courts (District, Sessions, etc.)
+STATE_NAME_PATTERNS = {
+    "arunachal_pradesh": ["ARUNACHAL PRADESH", "LEPARADA DISTRICT", "BASAR"],
+    "andhra_pradesh": ["ANDHRA PRADESH"],
+    "telangana": ["TELANGANA"],
+    "assam": ["ASSAM"],
+    "bihar": ["BIHAR"],
+    "chandigarh": ["CHANDIGARH"],
+    "delhi": ["DELHI"],
+    "goa": ["GOA"],
+    "gujarat": ["GUJARAT"],
+    "haryana": ["HARYANA"],
+    "jharkhand": ["JHARKHAND"],
+    "karnataka": ["KARNATAKA"],
+    "kerala": ["KERALA"],
+    "maharashtra": ["MAHARASHTRA"],
+    "manipur": ["MANIPUR"],
+    "meghalaya": ["MEGHALAYA"],
+    "mizoram": ["MIZORAM"],
+    "nagaland": ["NAGALAND"],
+    "odisha": ["ODISHA", "ORISSA"],
+    "punjab": ["PUNJAB"],
+    "rajasthan": ["RAJASTHAN"],
+    "tamil_nadu": ["TAMIL NADU"],
+    "uttarakhand": ["UTTARAKHAND"],
+    "uttar_pradesh": ["UTTAR PRADESH"],
+    "west_bengal": ["WEST BENGAL"]
+}
+
+TRIBUNAL_TIER, HIGH_COURT_TIER, STATE_TIER = 3, 2, 1
+
+# Characters scanned before settling on the best match found so far
+DETECTION_HEAD_CHARS = 6000
+
+_JURISDICTION_AUTOMATON = None
+
+
+def _get_jurisdiction_automaton() -> AhoCorasick:
+    """One automaton over all tribunal, High Court and state names, built on first use"""
+    global _JURISDICTION_AUTOMATON
+    if _JURISDICTION_AUTOMATON is None:
+        automaton = AhoCorasick()
+        for tier, table in ((TRIBUNAL_TIER, TRIBUNAL_PATTERNS), (HIGH_COURT_TIER, HIGH_COURT_PATTERNS),
+                            (STATE_TIER, STATE_NAME_PATTERNS)):
+            for state, patterns in table.items():
+                for pattern in patterns:
+                    automaton.add(pattern, (tier, state))
+        automaton.build()
+        _JURISDICTION_AUTOMATON = automaton
+    return _JURISDICTION_AUTOMATON
+
+
 class PatternDetector:
     """
     Detects state/jurisdiction and provides appropriate regex patterns
@@ -80,77 +158,18 @@ class PatternDetector:
     
     def _detect_state_from_text(self, text: str) -> str:
         """Detect state from text content"""
-        text_upper = text.upper()
-        
-        # Check for specialized tribunals first (they take priority over High Courts)
-        tribunal_patterns = {
-            "itat": ["INCOME TAX APPELLATE TRIBUNAL", "APPELLATE TRIBUNAL", "INCOME TAX APPELLATE TRI"]
-        }
-        
-        for state, patterns in tribunal_patterns.items():
-            for pattern in patterns:
-                if pattern in text_upper:
-                    return state
-        
-        # High Court patterns
-        high_court_patterns = {
-            "delhi": ["HIGH COURT OF DELHI", "DELHI HIGH COURT"],
-            "andhra_pradesh": ["HIGH COURT OF ANDHRA PRADESH", "ANDHRA PRADESH HIGH COURT", "HIGH COURT OF ANDHRA PRADESH AT AMARAVATI"],
-            "telangana": ["HIGH COURT OF TELANGANA", "TELANGANA HIGH COURT"],
-            "arunachal_pradesh": ["HIGH COURT OF ARUNACHAL PRADESH", "ARUNACHAL PRADESH HIGH COURT", "GAUHATI HIGH COURT"],
-            "karnataka": ["HIGH COURT OF KARNATAKA", "KARNATAKA HIGH COURT"],
-            "tamil_nadu": ["MADRAS HIGH COURT", "HIGH COURT OF MADRAS"],
-            "kerala": ["HIGH COURT OF KERALA", "KERALA HIGH COURT"],
-            "maharashtra": ["BOMBAY HIGH COURT", "HIGH COURT OF BOMBAY"],
-            "gujarat": ["HIGH COURT OF GUJARAT", "GUJARAT HIGH COURT"],
-            "rajasthan": ["HIGH COURT OF RAJASTHAN", "RAJASTHAN HIGH COURT"],
-            "punjab": ["HIGH COURT OF PUNJAB", "PUNJAB AND HARYANA HIGH COURT"],
-            "west_bengal": ["CALCUTTA HIGH COURT", "HIGH COURT OF CALCUTTA"],
-            "odisha": ["HIGH COURT OF ORISSA", "ORISSA HIGH COURT"],
-            "bihar": ["PATNA HIGH COURT", "HIGH COURT OF JUDICATURE AT PATNA"],
-            "supreme_court": ["SUPREME COURT OF INDIA", "SUPREME COURT"]
-        }
-        
-        for state, patterns in high_court_patterns.items():
-            for pattern in patterns:
-                if pattern in text_upper:
-                    return state
-        
-        # State-level patterns for lower courts (District, Sessions, etc.)
-        state_patterns = {
-            "arunachal_pradesh": ["ARUNACHAL PRADESH", "LEPARADA DISTRICT", "BASAR"],
-            "andhra_pradesh": ["ANDHRA PRADESH"],
-            "telangana": ["TELANGANA"],
-            "assam": ["ASSAM"],
-            "bihar": ["BIHAR"],
-            "chandigarh": ["CHANDIGARH"],
-            "delhi": ["DELHI"],
-            "goa": ["GOA"],
-            "gujarat": ["GUJARAT"],
-            "haryana": ["HARYANA"],
-            "jharkhand": ["JHARKHAND"],
-            "karnataka": ["KARNATAKA"],
-            "kerala": ["KERALA"],
-            "maharashtra": ["MAHARASHTRA"],
-            "manipur": ["MANIPUR"],
-            "meghalaya": ["MEGHALAYA"],
-            "mizoram": ["MIZORAM"],
-            "nagaland": ["NAGALAND"],
-            "odisha": ["ODISHA", "ORISSA"],
-            "punjab": ["PUNJAB"],
-            "rajasthan": ["RAJASTHAN"],
-            "tamil_nadu": ["TAMIL NADU"],
-            "uttarakhand": ["UTTARAKHAND"],
-            "uttar_pradesh": ["UTTAR PRADESH"],
-            "west_bengal": ["WEST BENGAL"]
-        }
-        
-        for state, patterns in state_patterns.items():
-            for pattern in patterns:
-                if pattern in text_upper:
-                    return state
-        
-        return "default"
+        best_tier, best_state = 0, "default"
+        for match in _get_jurisdiction_automaton().iter_matches(text):
+            # Only the first pages are read once something has been found
+            if best_tier and match.start >= DETECTION_HEAD_CHARS:
+                break
+            tier, state = match.payload
+            if tier > best_tier:
+                best_tier, best_state = tier, state
+                # Specialized tribunals take priority over everything else
+                if tier == TRIBUNAL_TIER:
+                    break
+        return best_state
     
     def get_patterns_for_state(self, state: str) -> Dict:
         """
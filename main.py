@@ -5,8 +5,11 @@ import traceback
 # from datetime import datetime
 from ocr.ocr import AdvancedLegalOCR
 from metadata.metadata_extractor import MetaDataExtractor
+from metadata.result_cache import ExtractionResultCache
 from utils.output_manager import OutputManager
 from utils.llama import generate_court_order_summary
+from utils.rag_index import build_document_index
+from utils.corpus_index import add_to_corpus
 def main():
     """Enhanced main function with OCR, Metadata Extraction, and User-Confirmed Summarization"""
     
@@ -70,7 +73,9 @@ def main():
     print("-" * 45)
 
     try:
-        metadata_extractor = MetaDataExtractor(use_gpu=True, debug=True)
+        # Re-running on an unchanged document reuses the stored results
+        result_cache = ExtractionResultCache(os.path.join("output", ".extraction_cache"))
+        metadata_extractor = MetaDataExtractor(use_gpu=True, debug=True, result_cache=result_cache)
         
         # Extract metadata from the raw text directly
         print("🔍 Extracting metadata from text...")
@@ -83,6 +88,15 @@ def main():
             )
             
             print(f"✅ Metadata extracted and saved to {output_dir}")
+            
+            # Retrieval index for document Q&A (long documents only)
+            index_dir = build_document_index(output_dir, full_text, metadata_result['extracted_data'])
+            if index_dir:
+                print(f"🔎 Q&A retrieval index saved to {index_dir}")
+            # Corpus-wide index for questions across all processed documents
+            corpus_metadata = {**metadata_result['extracted_data'], 'detected_state': metadata_result.get('detected_state', '')}
+            if add_to_corpus(filename_prefix, full_text, corpus_metadata, output_dir):
+                print("🔎 Document added to the corpus index")
             print(f"📊 Found {metadata_result['extraction_summary']['extracted_fields']} fields")
             print(f"🎯 Average confidence: {metadata_result['extraction_summary']['average_confidence']:.1%}")
             
@@ -0,0 +1,162 @@
+"""
+Context Retriever
+Per-document paragraph-chunk index used to feed the AI stages only the parts of a
+judgment that are relevant to a field, instead of truncating to the first few
+thousand characters.
+
+Chunks are embedded once per document with a SentenceTransformer model when one is
+available; otherwise a lightweight keyword (IDF-weighted overlap) score is used.
+"""
+
+import re
+import math
+from collections import Counter
+from typing import Dict, List, Optional, Any, Tuple
+
+# Paragraph boundaries: blank lines, or a newline followed by a numbered paragraph ("12." / "(iv)")
+_PARAGRAPH_SPLIT = re.compile(r'\n\s*\n|\n(?=\s*(?:\d{1,3}\.|\([ivx]+\))\s)')
+_SENTENCE_SPLIT = re.compile(r'(?<=[.;:])\s+(?=[A-Z(])')
+_WORD = re.compile(r'[a-z0-9]+')
+_STOPWORDS = {
+    'a', 'an', 'the', 'is', 'are', 'was', 'were', 'what', 'who', 'whom', 'which', 'when', 'this',
+    'that', 'of', 'in', 'on', 'for', 'to', 'by', 'and', 'or', 'did', 'does', 'do', 'any', 'there',
+}
+
+
+def _split_long_paragraph(paragraph: str, start: int, max_chars: int) -> List[Tuple[int, str]]:
+    """Pack the sentences of an over-long paragraph into chunks of at most max_chars
+
+    Run-on "sentences" (OCR tables, lists without full stops) longer than a chunk are
+    cut into max_chars pieces, so no text is dropped and no chunk is oversized.
+    """
+    sentences = []
+    position = 0
+    for match in list(_SENTENCE_SPLIT.finditer(paragraph)) + [None]:
+        end = match.start() if match else len(paragraph)
+        sentence = paragraph[position:end]
+        for offset in range(0, len(sentence), max_chars):
+            sentences.append((start + position + offset, sentence[offset:offset + max_chars]))
+        if match:
+            position = match.end()
+
+    chunks = []
+    buffer_start, buffer = start, ""
+    for sentence_start, sentence in sentences:
+        if buffer and len(buffer) + len(sentence) + 1 > max_chars:
+            chunks.append((buffer_start, buffer))
+            buffer = ""
+        if not buffer:
+            buffer_start = sentence_start
+        buffer = f"{buffer} {sentence}" if buffer else sentence
+    if buffer:
+        chunks.append((buffer_start, buffer))
+    return chunks
+
+
+def split_into_chunks(text: str, max_chars: int = 1000, min_chars: int = 200) -> List[Tuple[int, str]]:
+    """Split text into paragraph-sized chunks; returns (start offset, chunk text) pairs"""
+    pieces = []
+    position = 0
+    for match in _PARAGRAPH_SPLIT.finditer(text):
+        pieces.append((position, text[position:match.start()]))
+        position = match.end()
+    pieces.append((position, text[position:]))
+
+    chunks = []
+    current_start, current = None, ""
+    for start, piece in pieces:
+        start += len(piece) - len(piece.lstrip())
+        piece = piece.strip()
+        if not piece:
+            continue
+        # Long paragraphs are split on sentence boundaries
+        if len(piece) > max_chars:
+            if current:
+                chunks.append((current_start, current))
+                current_start, current = None, ""
+            chunks.extend(_split_long_paragraph(piece, start, max_chars))
+            continue
+        # Short paragraphs (headers, cause titles) are merged with their neighbours
+        if current and len(current) + len(piece) + 1 > max_chars:
+            chunks.append((current_start, current))
+            current_start, current = None, ""
+        if current_start is None:
+            current_start = start
+        current = f"{current}\n{piece}" if current else piece
+        if len(current) >= min_chars and len(current) >= max_chars // 2:
+            chunks.append((current_start, current))
+            current_start, current = None, ""
+    if current:
+        chunks.append((current_start, current))
+    return chunks
+
+
+class DocumentChunkIndex:
+    """Paragraph-chunk index over one document, built once and queried per field"""
+
+    def __init__(self, text: str, embedder: Optional[Any] = None, max_chars: int = 1000):
+        self.chunks = split_into_chunks(text, max_chars=max_chars)
+        self.embedder = embedder
+        self._embeddings = None
+        self._token_counts = None
+        self._idf = None
+
+        if self.embedder is not None and self.chunks:
+            try:
+                self._embeddings = self.embedder.encode(
+                    [chunk for _, chunk in self.chunks],
+                    batch_size=32,
+                    normalize_embeddings=True,
+                    show_progress_bar=False
+                )
+            except Exception:
+                self.embedder = None
+                self._embeddings = None
+
+        if self._embeddings is None:
+            self._build_keyword_index()
+
+    def _build_keyword_index(self):
+        self._token_counts = [Counter(_WORD.findall(chunk.lower())) for _, chunk in self.chunks]
+        document_frequency = Counter()
+        for counts in self._token_counts:
+            document_frequency.update(counts.keys())
+        total = len(self.chunks) or 1
+        self._idf = {token: math.log(1 + total / df) for token, df in document_frequency.items()}
+
+    def _keyword_scores(self, queries: List[str]) -> List[float]:
+        query_tokens = set()
+        for query in queries:
+            query_tokens.update(token for token in _WORD.findall(query.lower()) if token not in _STOPWORDS)
+        scores = []
+        for counts in self._token_counts:
+            length = sum(counts.values()) or 1
+            score = sum(self._idf.get(token, 0.0) * counts[token] for token in query_tokens if token in counts)
+            scores.append(score / math.sqrt(length))
+        return scores
+
+    def top_chunks(self, queries: List[str], k: int = 3) -> List[Tuple[int, str]]:
+        """Return the k chunks most relevant to any of the queries, in document order"""
+        if not self.chunks:
+            return []
+        if len(self.chunks) <= k:
+            return list(self.chunks)
+
+        if self._embeddings is not None:
+            query_embeddings = self.embedder.encode(queries, normalize_embeddings=True, show_progress_bar=False)
+            similarities = query_embeddings @ self._embeddings.T
+            scores = similarities.max(axis=0).tolist()
+        else:
+            scores = self._keyword_scores(queries)
+
+        ranked = sorted(range(len(self.chunks)), key=lambda i: scores[i], reverse=True)
+        selected = sorted(set(ranked[:k]))
+        return [self.chunks[i] for i in selected]
+
+    def context_for(self, queries: List[str], k: int = 3) -> str:
+        """Concatenate the top-k relevant chunks for the queries into one context string"""
+        return "\n".join(chunk for _, chunk in self.top_chunks(queries, k))
+
+    def contexts_for(self, field_queries: Dict[str, List[str]], k: int = 3) -> Dict[str, str]:
+        """Context string per field"""
+        return {field: self.context_for(queries, k) for field, queries in field_queries.items()}
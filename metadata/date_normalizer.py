@@ -0,0 +1,124 @@
+"""
+Date Normalizer
+Compiled fast path for the date shapes Indian court orders actually use, ahead of
+dateparser (slow per call and expensive to import):
+
+    05.03.2024 / 05-03-2024 / 05/03/2024          (day first)
+    5th day of March, 2024 / THE 2ND DAY OF FEBRUARY 2024
+    March 5, 2024 / 5 March 2024
+    FRIDAY, THE 2ND DAY OF FEBRUARY 2024 / 13TH MAGHA, 1945   (Gregorian + Saka)
+    13TH MAGHA, 1945                               (Saka only, converted)
+
+Results are memoised; dateparser is imported lazily and only for strings none of
+the fast-path patterns understand.
+"""
+
+import re
+import importlib.util
+from datetime import date, timedelta
+from functools import lru_cache
+from typing import Optional
+
+MONTHS = {
+    'january': 1, 'february': 2, 'march': 3, 'april': 4, 'may': 5, 'june': 6,
+    'july': 7, 'august': 8, 'september': 9, 'october': 10, 'november': 11, 'december': 12,
+    'jan': 1, 'feb': 2, 'mar': 3, 'apr': 4, 'jun': 6, 'jul': 7, 'aug': 8,
+    'sep': 9, 'sept': 9, 'oct': 10, 'nov': 11, 'dec': 12,
+}
+
+# Indian national (Saka) calendar months; Chaitra has 31 days in Gregorian leap years
+SAKA_MONTHS = {
+    'chaitra': 1, 'vaisakha': 2, 'vaishakha': 2, 'vaishakh': 2, 'jyaistha': 3, 'jyeshtha': 3,
+    'jyaishtha': 3, 'asadha': 4, 'ashadha': 4, 'ashadh': 4, 'sravana': 5, 'shravana': 5,
+    'bhadra': 6, 'bhadrapada': 6, 'asvina': 7, 'ashvina': 7, 'ashwin': 7, 'ashwina': 7,
+    'kartika': 8, 'kartik': 8, 'agrahayana': 9, 'margashirsha': 9, 'pausa': 10, 'pausha': 10,
+    'paush': 10, 'magha': 11, 'magh': 11, 'phalguna': 12, 'phalgun': 12,
+}
+
+_MONTH = '(' + '|'.join(sorted(MONTHS, key=len, reverse=True)) + r')\.?'
+_SAKA_MONTH = '(' + '|'.join(sorted(SAKA_MONTHS, key=len, reverse=True)) + ')'
+_ORDINAL = r'\b(\d{1,2})(?:st|nd|rd|th)?'
+
+# Tried in order; Gregorian forms come first so a dual date resolves to its Gregorian half
+_NUMERIC = re.compile(r'\b(\d{1,2})\s*[./-]\s*(\d{1,2})\s*[./-]\s*(\d{4})\b')
+_DAY_OF_MONTH = re.compile(_ORDINAL + r'\s+(?:day\s+of\s+)?' + _MONTH + r',?\s+(\d{4})\b', re.IGNORECASE)
+_MONTH_DAY = re.compile(r'\b' + _MONTH + r'\s+' + _ORDINAL + r',?\s+(\d{4})\b', re.IGNORECASE)
+_SAKA = re.compile(_ORDINAL + r'\s+(?:day\s+of\s+)?' + _SAKA_MONTH + r',?\s+(?:saka\s+)?(\d{4})\b', re.IGNORECASE)
+
+_DATEPARSER_AVAILABLE = None
+
+
+def _is_leap(year: int) -> bool:
+    return year % 4 == 0 and (year % 100 != 0 or year % 400 == 0)
+
+
+def _safe_date(year: int, month: int, day: int) -> Optional[date]:
+    try:
+        return date(year, month, day)
+    except ValueError:
+        return None
+
+
+def saka_to_gregorian(day: int, month: int, saka_year: int) -> Optional[date]:
+    """Convert a Saka (Indian national calendar) date to a Gregorian date"""
+    year = saka_year + 78
+    leap = _is_leap(year)
+    month_lengths = [31 if leap else 30] + [31] * 5 + [30] * 6
+    if not 1 <= month <= 12 or not 1 <= day <= month_lengths[month - 1]:
+        return None
+    # 1 Chaitra falls on 22 March (21 March in leap years)
+    start = date(year, 3, 21 if leap else 22)
+    return start + timedelta(days=sum(month_lengths[:month - 1]) + day - 1)
+
+
+def _numeric(day: str, month: str, year: str) -> Optional[date]:
+    return _safe_date(int(year), int(month), int(day))
+
+
+def _day_of_month(day: str, month_name: str, year: str) -> Optional[date]:
+    return _safe_date(int(year), MONTHS[month_name.lower()], int(day))
+
+
+def _month_day(month_name: str, day: str, year: str) -> Optional[date]:
+    return _safe_date(int(year), MONTHS[month_name.lower()], int(day))
+
+
+def _saka(day: str, month_name: str, year: str) -> Optional[date]:
+    return saka_to_gregorian(int(day), SAKA_MONTHS[month_name.lower()], int(year))
+
+
+# Fast-path patterns in precedence order, each with the converter for its groups
+_FAST_PATTERNS = [(_NUMERIC, _numeric), (_DAY_OF_MONTH, _day_of_month), (_MONTH_DAY, _month_day), (_SAKA, _saka)]
+
+
+def _fast_parse(text: str) -> Optional[date]:
+    # Every match of a shape is tried, so an impossible date (31.02.2024) does not hide a later valid one
+    for pattern, convert in _FAST_PATTERNS:
+        for match in pattern.finditer(text):
+            parsed = convert(*match.groups())
+            if parsed:
+                return parsed
+    return None
+
+
+def _dateparser_parse(text: str) -> Optional[date]:
+    """Last resort: dateparser, imported on first use"""
+    global _DATEPARSER_AVAILABLE
+    if _DATEPARSER_AVAILABLE is None:
+        _DATEPARSER_AVAILABLE = importlib.util.find_spec('dateparser') is not None
+    if not _DATEPARSER_AVAILABLE:
+        return None
+    import dateparser
+    parsed = dateparser.parse(text, settings={'DATE_ORDER': 'DMY'})
+    return parsed.date() if parsed else None
+
+
+@lru_cache(maxsize=4096)
+def parse_date(text: str, fallback: bool = True) -> Optional[date]:
+    """Parse the first date in text; dateparser is only consulted when fallback is set"""
+    if not text:
+        return None
+    parsed = _fast_parse(text)
+    if parsed is None and fallback:
+        parsed = _dateparser_parse(text.strip())
+    return parsed
@@ -0,0 +1,249 @@
+"""
+Gazetteer Matcher
+Dictionary lookups for entities whose names come from a known list: districts,
+police stations, Acts (with their abbreviations) and sitting judges, plus PIN-code
+prefix → state lookup.
+
+The lists live as JSON in gazetteer/data/ and can be extended without code changes:
+files with the same names in the directory named by LEGAL_GAZETTEER_DIR are merged on
+top of the bundled ones. Every phrase is compiled into a single Aho-Corasick automaton,
+so one pass over a document finds all of them.
+
+Data files:
+    districts.json        {state: [district | {"name", "aliases", "requires_context"}]}
+    police_stations.json  {state: [station | {"name", "aliases"}]}
+    acts.json             [{"name": canonical name, "aliases": [short forms, abbreviations]}]
+    judges.json           {court: [judge | {"name", "aliases"}]}
+    pin_prefixes.json     {PIN prefix (2-3 digits): state}
+
+Judges only count where the document names them as the bench ("Justice ...",
+"Hon'ble ...", "CORAM: ...", "..., J.") and sit on the court named in the heading; a
+judge named in a cited precedent ("the Kerala High Court (C.S. Dias)") is not the
+author of the order.
+
+Districts marked requires_context (names that are also common words or personal names,
+such as Anand or Salem) only match as "<name> district", "district of <name>" or
+"<name> dist."; police stations only match as "<name> police station" or "<name> P.S.".
+"""
+
+import os
+import re
+import json
+import hashlib
+from dataclasses import dataclass, field
+from typing import Any, Dict, Iterable, List, Optional, Tuple
+
+from ..aho_corasick import AhoCorasick
+
+DATA_DIR = os.path.join(os.path.dirname(__file__), "data")
+GAZETTEER_FILES = ('districts.json', 'police_stations.json', 'acts.json', 'judges.json', 'pin_prefixes.json')
+
+DISTRICT_CONTEXT_FORMS = ("{} district", "district of {}", "{} dist", "dist. {}", "{} dt")
+POLICE_STATION_FORMS = ("{} police station", "{} p.s", "police station, {}", "ps {}")
+
+# Bump when matching rules change, so results cached under the old rules are recomputed
+MATCHER_VERSION = 2
+
+# Bench context just before a judge's name, or the ", J." / ", C.J." suffix just after it
+_CORAM_BEFORE = re.compile(r"(?:justice|hon'?ble|honourable|coram\s*:?|before\s*:?)(?:\s+(?:mr|mrs|ms|dr|shri|smt|the)\.?)*[\s.:]*$",
+                           re.IGNORECASE)
+_CORAM_AFTER = re.compile(r'^\s*,\s*(?:A\.\s?)?(?:C\.\s?)?JJ?\b', re.IGNORECASE)
+# A court is only taken as the deciding court when it is named within the heading
+COURT_HEADING_CHARS = 3000
+
+_PIN = re.compile(r'\b(?:pin(?:\s*code)?|pincode)\s*[:\-–.]*\s*([1-9]\d{2})\s?(\d{3})\b', re.IGNORECASE)
+
+
+@dataclass
+class GazetteerHit:
+    """One gazetteer entry found in a document"""
+    kind: str            # district, police_station, act, judge
+    value: str           # canonical name
+    group: str           # state (districts, police stations) or court (judges); "" for acts
+    start: int
+    end: int
+    matched: str         # text as it appears in the document
+
+
+@dataclass
+class GazetteerScan:
+    """Everything the gazetteer found in one document, in document order"""
+    districts: List[GazetteerHit] = field(default_factory=list)
+    police_stations: List[GazetteerHit] = field(default_factory=list)
+    acts: List[GazetteerHit] = field(default_factory=list)
+    judges: List[GazetteerHit] = field(default_factory=list)
+    pin_codes: List[Tuple[str, Optional[str], int, int]] = field(default_factory=list)  # (pin, state, start, end)
+
+    def first(self, kind: str, group: Optional[str] = None, fallback: bool = True) -> Optional[GazetteerHit]:
+        """First hit of a kind, preferring hits from the given state/court (only those without fallback)"""
+        hits = getattr(self, kind)
+        if group:
+            for hit in hits:
+                if hit.group == group:
+                    return hit
+        return hits[0] if hits and fallback else None
+
+    def unique_values(self, kind: str) -> List[str]:
+        """Canonical names of a kind in first-seen order"""
+        return list(dict.fromkeys(hit.value for hit in getattr(self, kind)))
+
+    def to_dict(self) -> Dict[str, Any]:
+        return {
+            'districts': [(hit.value, hit.group) for hit in self.districts],
+            'police_stations': [(hit.value, hit.group) for hit in self.police_stations],
+            'acts': self.unique_values('acts'),
+            'judges': [(hit.value, hit.group) for hit in self.judges],
+            'pin_codes': [(pin, state) for pin, state, _, _ in self.pin_codes],
+        }
+
+
+def _entries(items: Iterable[Any]) -> Iterable[Dict[str, Any]]:
+    """Normalise list items ("Name" or {"name": ...}) to dicts"""
+    for item in items:
+        yield {'name': item} if isinstance(item, str) else item
+
+
+def _dotted_variants(name: str) -> List[str]:
+    """'M. M. Sathaye' is also written 'M.M. Sathaye'"""
+    compact = re.sub(r'\.\s+(?=\w\.)', '.', name)
+    return [name] if compact == name else [name, compact]
+
+
+def _court_heading_pattern(court: str) -> "re.Pattern":
+    """'High Court of Kerala' also appears as 'High Court of Judicature at Bombay' or 'Kerala High Court'"""
+    match = re.match(r'high\s+court\s+of\s+(.+)$', court, re.IGNORECASE)
+    if not match:
+        return re.compile(r'\b' + re.escape(court).replace(r'\ ', r'\s+') + r'\b', re.IGNORECASE)
+    place = re.escape(match.group(1)).replace(r'\ ', r'\s+')
+    return re.compile(rf'\bhigh\s+court\s+(?:of\s+)?(?:judicature\s+(?:at|of|for)\s+)?{place}\b|\b{place}\s+high\s+court\b',
+                      re.IGNORECASE)
+
+
+def in_coram(text: str, hit: GazetteerHit) -> bool:
+    """Whether a judge hit is named as the bench rather than mentioned in passing"""
+    return bool(_CORAM_BEFORE.search(text[max(0, hit.start - 60):hit.start])
+                or _CORAM_AFTER.match(text[hit.end:hit.end + 12]))
+
+
+def _merge(base: Any, extra: Any) -> Any:
+    """Overlay an update file: dicts merge per key, lists are extended"""
+    if isinstance(base, dict) and isinstance(extra, dict):
+        merged = dict(base)
+        for key, value in extra.items():
+            merged[key] = _merge(base[key], value) if key in base else value
+        return merged
+    if isinstance(base, list) and isinstance(extra, list):
+        return base + extra
+    return extra
+
+
+def load_gazetteer_data(data_dirs: Optional[List[str]] = None) -> Dict[str, Any]:
+    """Bundled lists merged with the update directories (default: LEGAL_GAZETTEER_DIR)"""
+    if data_dirs is None:
+        data_dirs = [DATA_DIR] + ([os.environ['LEGAL_GAZETTEER_DIR']] if os.environ.get('LEGAL_GAZETTEER_DIR') else [])
+    data: Dict[str, Any] = {}
+    for directory in data_dirs:
+        for filename in GAZETTEER_FILES:
+            path = os.path.join(directory, filename)
+            if not os.path.exists(path):
+                continue
+            with open(path, 'r', encoding='utf-8') as f:
+                content = json.load(f)
+            key = filename[:-len('.json')]
+            data[key] = _merge(data[key], content) if key in data else content
+    return data
+
+
+class Gazetteer:
+    """Compiled gazetteer: one automaton for all phrases, plus a PIN prefix table"""
+
+    def __init__(self, data: Dict[str, Any]):
+        payload = json.dumps({'matcher': MATCHER_VERSION, 'data': data}, sort_keys=True)
+        self.version = hashlib.sha256(payload.encode('utf-8')).hexdigest()[:16]
+        self.pin_prefixes: Dict[str, str] = data.get('pin_prefixes', {})
+        self._prefix_lengths = sorted({len(prefix) for prefix in self.pin_prefixes}, reverse=True)
+        self.automaton = AhoCorasick()
+        self._court_patterns = {court: _court_heading_pattern(court) for court in data.get('judges', {})}
+
+        for state, districts in data.get('districts', {}).items():
+            for entry in _entries(districts):
+                for name in [entry['name']] + entry.get('aliases', []):
+                    forms = list(DISTRICT_CONTEXT_FORMS) + ([] if entry.get('requires_context') else ["{}"])
+                    for form in forms:
+                        self.automaton.add(form.format(name), ('districts', 'district', entry['name'], state))
+
+        for state, stations in data.get('police_stations', {}).items():
+            for entry in _entries(stations):
+                for name in [entry['name']] + entry.get('aliases', []):
+                    for form in POLICE_STATION_FORMS:
+                        self.automaton.add(form.format(name), ('police_stations', 'police_station', entry['name'], state))
+
+        for entry in _entries(data.get('acts', [])):
+            for name in [entry['name']] + entry.get('aliases', []):
+                self.automaton.add(name, ('acts', 'act', entry['name'], ""))
+
+        for court, judges in data.get('judges', {}).items():
+            for entry in _entries(judges):
+                for name in [entry['name']] + entry.get('aliases', []):
+                    for variant in _dotted_variants(name):
+                        self.automaton.add(variant, ('judges', 'judge', entry['name'], court))
+
+        self.automaton.build()
+
+    def detect_court(self, text: str, head_chars: int = COURT_HEADING_CHARS) -> Optional[str]:
+        """Court (as keyed in judges.json) named first in the document heading, if any"""
+        head = text[:head_chars]
+        found = [(match.start(), court) for court, pattern in self._court_patterns.items()
+                 for match in [pattern.search(head)] if match]
+        return min(found)[1] if found else None
+
+    def bench_judge(self, text: str, scan: "GazetteerScan") -> Optional[GazetteerHit]:
+        """First judge of the detected court who is named as the bench"""
+        court = self.detect_court(text)
+        if court is None:
+            return None
+        return next((hit for hit in scan.judges if hit.group == court and in_coram(text, hit)), None)
+
+    def state_for_pin(self, pin: str) -> Optional[str]:
+        """State of a PIN code by longest known prefix"""
+        pin = pin.replace(" ", "")
+        for length in self._prefix_lengths:
+            state = self.pin_prefixes.get(pin[:length])
+            if state:
+                return state
+        return None
+
+    def scan(self, text: str) -> GazetteerScan:
+        """Find every gazetteer entry and PIN code in one pass over the text"""
+        result = GazetteerScan()
+        # Longest match wins where phrases overlap ("Ernakulam Town North police station" over "Ernakulam")
+        matches = sorted(self.automaton.iter_matches(text), key=lambda m: (m.start, -(m.end - m.start)))
+        covered_until = -1
+        for match in matches:
+            if match.start < covered_until:
+                continue
+            hits, kind, value, group = match.payload
+            getattr(result, hits).append(GazetteerHit(kind, value, group, match.start, match.end, match.phrase))
+            covered_until = match.end
+        for pin_match in _PIN.finditer(text):
+            pin = pin_match.group(1) + pin_match.group(2)
+            result.pin_codes.append((pin, self.state_for_pin(pin), pin_match.start(1), pin_match.end(2)))
+        return result
+
+
+_GAZETTEER: Optional[Gazetteer] = None
+
+
+def get_gazetteer() -> Gazetteer:
+    """Process-wide gazetteer, compiled on first use"""
+    global _GAZETTEER
+    if _GAZETTEER is None:
+        _GAZETTEER = Gazetteer(load_gazetteer_data())
+    return _GAZETTEER
+
+
+def reload_gazetteer(data_dirs: Optional[List[str]] = None) -> Gazetteer:
+    """Recompile after the data files were updated"""
+    global _GAZETTEER
+    _GAZETTEER = Gazetteer(load_gazetteer_data(data_dirs))
+    return _GAZETTEER
@@ -5,10 +5,14 @@ import logging
 import time
 import warnings
 from datetime import datetime
-from typing import Dict, List, Optional, Tuple, Any, Union
+from typing import Dict, List, Optional, Tuple, Any, Union, Iterable, Iterator, Callable
 from dataclasses import dataclass, asdict
 from pathlib import Path
 import traceback
+import importlib.util
+import multiprocessing
+import threading
+from concurrent.futures import ProcessPoolExecutor, FIRST_COMPLETED, wait
 from ocr.text_processor import LegalTextProcessor
 
 # Suppress warnings for cleaner output
@@ -82,19 +86,59 @@ try:
 except ImportError:
     AI_MODULES['sentence_transformers'] = False
 
-# Additional NLP libraries
-try:
-    import dateparser
-    AI_MODULES['dateparser'] = True
-except ImportError:
-    AI_MODULES['dateparser'] = False
+# Additional NLP libraries (dateparser is slow to import; date_normalizer imports it on demand)
+AI_MODULES['dateparser'] = importlib.util.find_spec('dateparser') is not None
 
 # Import existing modules
 from .state_name import detect_state_from_text
 from .state_patterns import STATE_PATTERNS, GENERAL_PATTERNS
+from .pattern_profiler import PatternProfiler
+from .model_cache import get_model_cache
+from .context_retriever import DocumentChunkIndex, split_into_chunks
+from .stage_scheduler import StageScheduler, ScheduleReport
+from .date_normalizer import parse_date
+from .gazetteer import GazetteerHit, get_gazetteer
+from .result_table import ExtractionResultTable
+from .result_cache import ExtractionResultCache, normalized_text_hash, registry_fingerprint, pattern_version
+from .output_formatter import format_structured_output, format_professional_parties, get_enhanced_statutes
 
 
-@dataclass
+# Flags every state/general registry pattern is matched with
+PATTERN_FLAGS = re.IGNORECASE | re.MULTILINE
+
+# Registry patterns compiled once per process, keyed by (pattern, flags). re's own cache
+# holds 512 entries, fewer than the state and general tables together, so it cannot be relied on
+_COMPILED_PATTERNS: Dict[Tuple[str, int], "re.Pattern"] = {}
+
+
+def compiled_pattern(pattern: str, flags: int = PATTERN_FLAGS) -> "re.Pattern":
+    """Compiled form of a registry pattern, compiling it on first use"""
+    compiled = _COMPILED_PATTERNS.get((pattern, flags))
+    if compiled is None:
+        compiled = _COMPILED_PATTERNS[(pattern, flags)] = re.compile(pattern, flags)
+    return compiled
+
+
+# SpaCy pipeline components the SpaCy stage never reads (it only uses doc.ents)
+SPACY_UNUSED_COMPONENTS = ["tagger", "parser", "senter", "attribute_ruler", "lemmatizer"]
+
+# Registry entries each result field is read from (default: the field's own entry);
+# nested petitioner/respondent patterns override the flat ones
+FIELD_REGISTRY_KEYS = {
+    'petitioner_name': ('petitioner_name', 'petitioner'),
+    'petitioner_details': ('petitioner',),
+    'respondent_name': ('respondent_name', 'respondent'),
+}
+
+# Retrieval queries for the NER stage, which has no questions of its own
+NER_RETRIEVAL_QUERIES = {
+    'judge_name': ["Hon'ble Mr. Justice presiding judge coram"],
+    'petitioner_name': ["petitioner applicant accused name aged son of residing at"],
+    'court_name': ["in the high court of judicature at"],
+}
+
+
+@dataclass(slots=True)
 class ExtractionResult:
     """Stores extraction result with metadata"""
     field_name: str
@@ -102,6 +146,17 @@ class ExtractionResult:
     confidence: float
     method: str
     source_text: str = ""
+    # Offsets of source_text in the document, when the stage knows them (-1 otherwise)
+    source_start: int = -1
+    source_end: int = -1
+    
+    @classmethod
+    def from_dict(cls, field_name: str, data: Dict[str, Any]) -> "ExtractionResult":
+        """Rebuild a result from its extracted_data entry"""
+        span = data.get('source_span') or (-1, -1)
+        return cls(field_name=field_name, value=data.get('value'), confidence=data.get('confidence', 0.0),
+                   method=data.get('method', ''), source_text=data.get('source_text', ''),
+                   source_start=span[0], source_end=span[1])
 
 
 @dataclass
@@ -116,7 +171,9 @@ class AIModelConfig:
 
 class MetaDataExtractor:
     
-    def __init__(self, use_gpu: bool = False, debug: bool = True):
+    def __init__(self, use_gpu: bool = False, debug: bool = True, profiler: Optional[PatternProfiler] = None,
+                 pattern_stats: Optional[PatternProfiler] = None,
+                 result_cache: Optional[ExtractionResultCache] = None):
         self.use_gpu = use_gpu and torch.cuda.is_available() if AI_MODULES.get('transformers') else False
         self.device = "cuda" if self.use_gpu else "cpu"
         self.debug = debug
@@ -134,6 +191,37 @@ class MetaDataExtractor:
         self.page_times = []
         self.output_dir = "output"
         
+        # Batched QA settings (tokens); windows overlap by doc_stride across the whole document
+        self.qa_batch_size = 16
+        self.qa_max_seq_len = 384
+        self.qa_doc_stride = 128
+        self.qa_max_answer_len = 64
+        
+        # SpaCy stage: documents are chunked and streamed through nlp.pipe
+        self.spacy_chunk_chars = 2000
+        self.spacy_batch_size = 32
+        self.spacy_n_process = 1
+        
+        # AI fallback stages: cheapest capable stage per missing field, optional per-document budget (seconds)
+        self.stage_scheduler = StageScheduler()
+        self.stage_time_budget = None
+        self.concurrent_stages = False
+        
+        # Number of paragraph chunks retrieved per field for the QA / NER stages
+        self.retrieval_top_k = 3
+        
+        # Optional regex-stage profiler (see metadata/pattern_profiler.py)
+        self.profiler = profiler
+        
+        # Optional historical stats used to try cheap, high-hit patterns first
+        self.pattern_stats = pattern_stats
+        self._pattern_orders = {}
+        
+        # Optional persistent document-level cache of extract() results (see metadata/result_cache.py)
+        self.result_cache = result_cache
+        self._registry_fingerprints = {}
+        self._field_version_cache = {}
+        
         # Field definitions - aligned with state_patterns.py
         self.extraction_fields = [
             'case_number', 'order_date', 'judge_name', 'court_name',
@@ -164,10 +252,13 @@ class MetaDataExtractor:
         # Try to load SpaCy model if available locally
         if AI_MODULES.get('spacy'):
             try:
-                import spacy
-                nlp = spacy.load("en_core_web_sm")
+                # Only doc.ents is used, so the tagger/parser/lemmatizer are never loaded
+                loader = lambda: spacy.load("en_core_web_sm", exclude=SPACY_UNUSED_COMPONENTS)
+                get_model_cache().get("en_core_web_sm:ner", "cpu", loader)
                 self.ai_models['spacy_local'] = {
-                    'model': nlp,
+                    'model_name': "en_core_web_sm:ner",
+                    'device': "cpu",
+                    'loader': loader,
                     'type': 'ner',
                     'confidence_threshold': 0.3
                 }
@@ -175,17 +266,55 @@ class MetaDataExtractor:
             except OSError:
                 print("⚠️ No local SpaCy model found")
         
+        # Sentence embeddings for per-field context retrieval (only if cached locally)
+        if AI_MODULES.get('sentence_transformers'):
+            try:
+                loader = lambda: SentenceTransformer("all-MiniLM-L6-v2", device=self.device, local_files_only=True)
+                get_model_cache().get("all-MiniLM-L6-v2", self.device, loader)
+                self.ai_models['sentence_all-MiniLM-L6-v2'] = {
+                    'model_name': "all-MiniLM-L6-v2",
+                    'device': self.device,
+                    'loader': loader,
+                    'type': 'similarity',
+                    'confidence_threshold': 0.3
+                }
+                print("✅ Loaded local Sentence Transformer")
+            except Exception:
+                print("⚠️ No local Sentence Transformer found - using keyword retrieval")
+        
         print(f"🎯 Initialized {len(self.ai_models)} AI models in offline mode")
     
+    def build_retriever(self, text: str) -> DocumentChunkIndex:
+        """Build the per-document chunk index used to pick relevant context for the AI stages"""
+        embedder = None
+        for model_name, model_info in self.ai_models.items():
+            if model_info['type'] == 'similarity':
+                embedder = self._get_model(model_info)
+                break
+        return DocumentChunkIndex(text, embedder=embedder)
+    
+    def _get_model(self, model_info: Dict[str, Any]) -> Any:
+        """Fetch a model from the shared process-level cache, reloading it if it was evicted"""
+        if 'loader' not in model_info:
+            return model_info['model']
+        return get_model_cache().get(model_info['model_name'], model_info['device'], model_info['loader'])
+    
+    def _model_lock(self, model_name: str, model_info: Dict[str, Any]) -> threading.Lock:
+        """Lock serialising calls to a model; the same model can serve several concurrent stages"""
+        return get_model_cache().use_lock(model_info.get('model_name', model_name), model_info.get('device', 'cpu'))
+    
     def _init_spacy_models(self):
         """Initialize SpaCy models"""
         spacy_models = ['en_core_web_sm', 'en_core_web_md', 'en_core_web_lg']
         
         for model_name in spacy_models:
             try:
-                nlp = spacy.load(model_name)
+                loader = lambda name=model_name: spacy.load(name, exclude=SPACY_UNUSED_COMPONENTS)
+                get_model_cache().get(f"{model_name}:ner", "cpu", loader)
                 self.ai_models[f'spacy_{model_name}'] = {
-                    'model': nlp,
+                    'model_name': f"{model_name}:ner",
+                    'device': "cpu",
+                    'loader': loader,
                     'type': 'ner',
                     'confidence_threshold': 0.3
                 }
@@ -220,14 +349,17 @@ class MetaDataExtractor:
         
         for qa_config in qa_models[:2]:  # Load first 2 to avoid memory issues
             try:
-                qa_pipeline = pipeline(
+                loader = lambda name=qa_config['name']: pipeline(
                     "question-answering",
-                    model=qa_config['name'],
+                    model=name,
                     device=0 if self.use_gpu else -1,
                     return_all_scores=True
                 )
+                get_model_cache().get(qa_config['name'], self.device, loader)
                 self.ai_models[f"qa_{qa_config['name'].split('/')[-1]}"] = {
-                    'model': qa_pipeline,
+                    'model_name': qa_config['name'],
+                    'device': self.device,
+                    'loader': loader,
                     'type': 'qa',
                     'confidence_threshold': 0.1,
                     'description': qa_config['description']
@@ -246,14 +378,17 @@ class MetaDataExtractor:
         
         for ner_model in ner_models[:1]:  # Load first one to avoid memory issues
             try:
-                ner_pipeline = pipeline(
+                loader = lambda name=ner_model: pipeline(
                     "ner",
-                    model=ner_model,
+                    model=name,
                     aggregation_strategy="simple",
                     device=0 if self.use_gpu else -1
                 )
+                get_model_cache().get(ner_model, self.device, loader)
                 self.ai_models[f"ner_{ner_model.split('/')[-1]}"] = {
-                    'model': ner_pipeline,
+                    'model_name': ner_model,
+                    'device': self.device,
+                    'loader': loader,
                     'type': 'ner',
                     'confidence_threshold': 0.2
                 }
@@ -270,14 +405,17 @@ class MetaDataExtractor:
         
         for legal_model in legal_classifiers[:2]:  # Load first 2
             try:
-                classifier = pipeline(
+                loader = lambda name=legal_model: pipeline(
                     "text-classification",
-                    model=legal_model,
+                    model=name,
                     device=0 if self.use_gpu else -1
                 )
+                get_model_cache().get(legal_model, self.device, loader)
                 model_name = legal_model.split('/')[-1]
                 self.ai_models[f'legal_classifier_{model_name}'] = {
-                    'model': classifier,
+                    'model_name': legal_model,
+                    'device': self.device,
+                    'loader': loader,
                     'type': 'classification',
                     'confidence_threshold': 0.3
                 }
@@ -287,13 +425,16 @@ class MetaDataExtractor:
         
         # Try specialized legal QA model
         try:
-            legal_qa = pipeline(
+            loader = lambda: pipeline(
                 "question-answering",
                 model="nlpaueb/legal-bert-base-uncased",
                 device=0 if self.use_gpu else -1
             )
+            get_model_cache().get("nlpaueb/legal-bert-base-uncased", self.device, loader)
             self.ai_models['legal_qa_bert'] = {
-                'model': legal_qa,
+                'model_name': "nlpaueb/legal-bert-base-uncased",
+                'device': self.device,
+                'loader': loader,
                 'type': 'qa',
                 'confidence_threshold': 0.2,
                 'description': 'Legal domain QA model'
@@ -325,9 +466,12 @@ class MetaDataExtractor:
         
         for model_name in sentence_models[:1]:  # Load first one
             try:
-                model = SentenceTransformer(model_name)
+                loader = lambda name=model_name: SentenceTransformer(name, device=self.device)
+                get_model_cache().get(model_name, self.device, loader)
                 self.ai_models[f'sentence_{model_name}'] = {
-                    'model': model,
+                    'model_name': model_name,
+                    'device': self.device,
+                    'loader': loader,
                     'type': 'similarity',
                     'confidence_threshold': 0.3
                 }
@@ -359,6 +503,17 @@ class MetaDataExtractor:
         detected_state = detect_state_from_text(text)
         self.logger.info(f"🗺️ Detected state: {detected_state}")
         
+        # Same text + same registry/models for this state → stored results
+        cache_key = None
+        if self.result_cache is not None and self.profiler is None:
+            cache_key = (detected_state, normalized_text_hash(text), self._registry_fingerprint(detected_state))
+            cached = self.result_cache.get(*cache_key)
+            if cached is not None:
+                self.logger.info("♻️ Returning cached extraction results")
+                cached['metadata']['cache_hit'] = True
+                cached['raw_text'] = text
+                return cached
+        
         # 3. Extract using state-specific patterns
         self.logger.info("🔍 Applying state-specific regex patterns...")
         pattern_results = self.extract_with_patterns(text, detected_state)
@@ -367,66 +522,45 @@ class MetaDataExtractor:
         missing_fields = [field for field in self.extraction_fields if field not in pattern_results]
         self.logger.info(f"❓ Missing fields after pattern extraction: {missing_fields}")
         
-        # 5. Apply AI models sequentially for missing fields
-        all_results = pattern_results.copy()
+        # 5. Apply AI models for missing fields
+        all_results, schedule_report = self._fill_missing_fields(text, pattern_results.copy(), missing_fields,
+                                                                 detected_state)
         
+        # 6. Compile final results
+        final_results = self._compile_results(text, detected_state, all_results, schedule_report)
+        
+        if cache_key is not None:
+            self.result_cache.put(*cache_key, {k: v for k, v in final_results.items() if k != 'raw_text'})
+        
+        self.logger.info(f"✅ Extraction completed!")
+        self.logger.info(f"📊 Extracted {len(all_results)}/{len(self.extraction_fields)} fields")
+        self.logger.info(f"🎯 Average confidence: {final_results['extraction_summary']['average_confidence']:.2%}")
+        
+        return final_results
+    
+    def _fill_missing_fields(self, text: str, all_results: Dict[str, ExtractionResult], missing_fields: List[str],
+                             state: str = "") -> Tuple[Dict[str, ExtractionResult], Optional[ScheduleReport]]:
+        """Run the fallback stages for the missing fields and merge what they find"""
+        schedule_report = None
         if missing_fields:
-            # 5a. SpaCy NER
-            self.logger.info("🧠 Applying SpaCy NER models...")
-            spacy_results = self.extract_with_spacy(text, missing_fields)
-            self.logger.info(f"   🔍 SpaCy found: {list(spacy_results.keys()) if spacy_results else 'Nothing'}")
-            for field, result in spacy_results.items():
+            # 5a-5e. Only the cheapest stage able to produce each missing field runs,
+            # or, in concurrent mode, every capable stage at once on a thread pool
+            run_stages = self.stage_scheduler.run_concurrent if self.concurrent_stages else self.stage_scheduler.run
+            stage_results, schedule_report = run_stages(
+                missing_fields, self._stage_runners(text, state), self.stage_time_budget
+            )
+            for stage_run in schedule_report.ran:
+                self.logger.info(f"   🔍 {stage_run.stage} found: {stage_run.filled or 'Nothing'} ({stage_run.seconds:.2f}s)")
+            if schedule_report.skipped:
+                self.logger.info(f"   ⏭️ Skipped stages: {schedule_report.skipped}")
+            for field, result in stage_results.items():
                 if field not in all_results:
                     all_results[field] = result
-            
-            # Update missing fields
-            missing_fields = [field for field in missing_fields if field not in spacy_results]
-            
-            # 5b. Question-Answering models
-            if missing_fields:
-                self.logger.info("❓ Applying Question-Answering models...")
-                qa_results = self.extract_with_qa_models(text, missing_fields)
-                self.logger.info(f"   🔍 QA Models found: {list(qa_results.keys()) if qa_results else 'Nothing'}")
-                for field, result in qa_results.items():
-                    if field not in all_results:
-                        all_results[field] = result
-                
-                # Update missing fields
-                missing_fields = [field for field in missing_fields if field not in qa_results]
-            
-            # 5c. Specialized Legal Models
-            if missing_fields:
-                self.logger.info("🏛️ Applying Specialized Legal Models...")
-                legal_results = self.extract_with_legal_models(text, missing_fields)
-                self.logger.info(f"   🔍 Legal Models found: {list(legal_results.keys()) if legal_results else 'Nothing'}")
-                for field, result in legal_results.items():
-                    if field not in all_results:
-                        all_results[field] = result
-                
-                # Update missing fields
-                missing_fields = [field for field in missing_fields if field not in legal_results]
-            
-            # 5d. General NER models
-            if missing_fields:
-                self.logger.info("🏷️ Applying General NER models...")
-                ner_results = self.extract_with_ner_models(text, missing_fields)
-                self.logger.info(f"   🔍 NER Models found: {list(ner_results.keys()) if ner_results else 'Nothing'}")
-                for field, result in ner_results.items():
-                    if field not in all_results:
-                        all_results[field] = result
-                
-                # Update missing fields
-                missing_fields = [field for field in missing_fields if field not in ner_results]
-            
-            # 5e. Date parsing for dates
-            if missing_fields:
-                self.logger.info("📅 Applying date parsing...")
-                date_results = self.extract_with_date_parser(text, missing_fields)
-                for field, result in date_results.items():
-                    if field not in all_results:
-                        all_results[field] = result
-        
-        # 6. Compile final results
+        return all_results, schedule_report
+    
+    def _compile_results(self, text: str, detected_state: str, all_results: Dict[str, ExtractionResult],
+                         schedule_report: Optional[ScheduleReport]) -> Dict[str, Any]:
+        """Build the extract() result dictionary, including per-field provenance"""
         final_results = {
             'detected_state': detected_state,
             'extraction_summary': {
@@ -439,7 +573,19 @@ class MetaDataExtractor:
             'metadata': {
                 'text_length': len(text),
                 'available_ai_models': list(self.ai_models.keys()),
-                'processing_timestamp': datetime.now().isoformat()
+                'processing_timestamp': datetime.now().isoformat(),
+                'stage_schedule': schedule_report.to_dict() if schedule_report else None
+            },
+            # Which pattern version each field was decided under (see reextract)
+            'provenance': {
+                'models_version': self._models_version(),
+                'fields': {
+                    field: {
+                        'pattern_version': version,
+                        'method': all_results[field].method if field in all_results else None
+                    }
+                    for field, version in self._field_versions(detected_state).items()
+                }
             },
             'raw_text': text  # Store the raw extracted text
         }
@@ -452,6 +598,8 @@ class MetaDataExtractor:
                 'method': result.method,
                 'source_text': result.source_text[:100] + "..." if len(result.source_text) > 100 else result.source_text
             }
+            if result.source_start >= 0:
+                final_results['extracted_data'][field]['source_span'] = [result.source_start, result.source_end]
         
         # Calculate overall confidence
         if all_results:
@@ -460,14 +608,103 @@ class MetaDataExtractor:
         else:
             final_results['extraction_summary']['average_confidence'] = 0.0
         
-        self.logger.info(f"✅ Extraction completed!")
-        self.logger.info(f"📊 Extracted {len(all_results)}/{len(self.extraction_fields)} fields")
-        self.logger.info(f"🎯 Average confidence: {final_results['extraction_summary']['average_confidence']:.2%}")
-        
         return final_results
     
-    def extract_with_patterns(self, text: str, state: str) -> Dict[str, ExtractionResult]:
-        """Extract using state-specific and general patterns"""
+    def reextract(self, text_input: str, previous: Dict[str, Any]) -> Tuple[Dict[str, Any], List[str]]:
+        """
+        Bring previous extract() results up to date with the current pattern registry.
+        Only fields whose pattern version changed are recomputed (regex first, then the
+        AI stages if the regex no longer finds them); everything else is kept. Results
+        without provenance, or produced with a different model set, are fully re-extracted.
+        Returns the updated results and the list of recomputed fields.
+        """
+        text = text_input.strip() if text_input else ""
+        provenance = previous.get('provenance') or {}
+        if not text or provenance.get('models_version') != self._models_version():
+            return self.extract(text), list(self.extraction_fields)
+        
+        detected_state = previous.get('detected_state') or detect_state_from_text(text)
+        stored_fields = provenance.get('fields', {})
+        changed = [field for field, version in self._field_versions(detected_state).items()
+                   if stored_fields.get(field, {}).get('pattern_version') != version]
+        if not changed:
+            return previous, []
+        
+        self.logger.info(f"🔁 Re-extracting {changed} for {detected_state}")
+        all_results = {
+            field: ExtractionResult.from_dict(field, data)
+            for field, data in previous.get('extracted_data', {}).items() if field not in changed
+        }
+        pattern_results = self.extract_with_patterns(text, detected_state, only_fields=changed)
+        all_results.update({field: result for field, result in pattern_results.items() if field in changed})
+        
+        missing_fields = [field for field in self.extraction_fields if field in changed and field not in all_results]
+        all_results, schedule_report = self._fill_missing_fields(text, all_results, missing_fields, detected_state)
+        final_results = self._compile_results(text, detected_state, all_results, schedule_report)
+        
+        if self.result_cache is not None:
+            self.result_cache.put(detected_state, normalized_text_hash(text), self._registry_fingerprint(detected_state),
+                                  {k: v for k, v in final_results.items() if k != 'raw_text'})
+        return final_results, changed
+    
+    def _models_version(self) -> str:
+        """Version of the loaded model set and field list; a change forces full re-extraction"""
+        return pattern_version({'models': sorted(self.ai_models), 'fields': self.extraction_fields,
+                                'gazetteer': get_gazetteer().version})
+    
+    def _field_versions(self, state: str) -> Dict[str, str]:
+        """Pattern version of every field for one state, from the registry entries it reads"""
+        versions = self._field_version_cache.get(state)
+        if versions is None:
+            all_patterns = {**GENERAL_PATTERNS, **STATE_PATTERNS.get(state, {})}
+            versions = {}
+            for field in self.extraction_fields + ['petitioner_details']:
+                keys = FIELD_REGISTRY_KEYS.get(field, (field,))
+                versions[field] = pattern_version({key: all_patterns.get(key) for key in keys})
+            self._field_version_cache[state] = versions
+        return versions
+    
+    def _registry_fingerprint(self, state: str) -> str:
+        """Fingerprint of the patterns and models that decide results for one state"""
+        fingerprint = self._registry_fingerprints.get(state)
+        if fingerprint is None:
+            fingerprint = registry_fingerprint(
+                STATE_PATTERNS.get(state, {}), GENERAL_PATTERNS,
+                list(self.ai_models.keys()) + [f"gazetteer:{get_gazetteer().version}"], self.extraction_fields
+            )
+            self._registry_fingerprints[state] = fingerprint
+        return fingerprint
+    
+    def _stage_runners(self, text: str, state: str = "") -> Dict[str, Callable[[List[str]], Dict[str, ExtractionResult]]]:
+        """Callables for the fallback stages that are available, keyed by scheduler stage name"""
+        retriever_holder = []
+        retriever_lock = threading.Lock()
+        
+        def retriever() -> DocumentChunkIndex:
+            # Built on first use so documents that only need SpaCy/dateparser skip the embedding;
+            # locked because concurrent stages may ask for it at the same time
+            with retriever_lock:
+                if not retriever_holder:
+                    retriever_holder.append(self.build_retriever(text))
+                return retriever_holder[0]
+        
+        models = self.ai_models.items()
+        runners = {'gazetteer': lambda fields: self.extract_with_gazetteer(text, fields, state)}
+        if any(name.startswith('spacy_') and info['type'] == 'ner' for name, info in models):
+            runners['spacy'] = lambda fields: self.extract_with_spacy(text, fields)
+        if any(info['type'] == 'qa' for _, info in models):
+            runners['qa'] = lambda fields: self.extract_with_qa_models(text, fields, retriever())
+        if any('legal' in name and info['type'] == 'qa' for name, info in models):
+            runners['legal'] = lambda fields: self.extract_with_legal_models(text, fields, retriever())
+        if any(info['type'] == 'ner' and not name.startswith('spacy_') for name, info in models):
+            runners['ner'] = lambda fields: self.extract_with_ner_models(text, fields, retriever())
+        if 'order_date' in self.extraction_fields:
+            runners['date'] = lambda fields: self.extract_with_date_parser(text, fields)
+        return runners
+    
+    def extract_with_patterns(self, text: str, state: str,
+                              only_fields: Optional[Iterable[str]] = None) -> Dict[str, ExtractionResult]:
+        """Extract using state-specific and general patterns (optionally only some fields)"""
         results = {}
         
         # Get patterns for the detected state
@@ -476,98 +713,151 @@ class MetaDataExtractor:
         # Combine with general patterns
         all_patterns = {**GENERAL_PATTERNS, **state_patterns}
         
+        if only_fields is not None:
+            only_fields = set(only_fields)
+        
         for field_name in self.extraction_fields:
+            if only_fields is not None and field_name not in only_fields:
+                continue
             if field_name in all_patterns:
                 patterns = all_patterns[field_name]
                 if isinstance(patterns, dict):
                     # Handle nested patterns (like petitioner.name)
                     continue
                 elif isinstance(patterns, list):
-                    for pattern in patterns:
-                        match = re.search(pattern, text, re.IGNORECASE | re.MULTILINE)
-                        if match:
-                            value = match.group(1) if match.groups() else match.group(0)
-                            results[field_name] = ExtractionResult(
-                                field_name=field_name,
-                                value=value.strip(),
-                                confidence=0.8,  # High confidence for pattern matches
-                                method=f"regex_pattern_{state}",
-                                source_text=match.group(0)
-                            )
-                            break
+                    source = state if field_name in state_patterns else "general"
+                    match = self._search_patterns(text, patterns, source, field_name)
+                    if match:
+                        value = match.group(1) if match.groups() else match.group(0)
+                        results[field_name] = ExtractionResult(
+                            field_name=field_name,
+                            value=value.strip(),
+                            confidence=0.8,  # High confidence for pattern matches
+                            method=f"regex_pattern_{state}",
+                            source_text=match.group(0),
+                            source_start=match.start(),
+                            source_end=match.end()
+                        )
         
         # Handle nested patterns (petitioner, respondent details)
-        self._extract_nested_patterns(text, state, results)
+        self._extract_nested_patterns(text, state, results, only_fields)
         
         return results
     
-    def _extract_nested_patterns(self, text: str, state: str, results: Dict[str, ExtractionResult]):
+    def _search_patterns(self, text: str, patterns: List[str], source: str, field_key: str) -> Optional[re.Match]:
+        """Return the first matching pattern's match, recording stats when profiling is enabled"""
+        if self.profiler is None:
+            if self.pattern_stats is not None:
+                return self._search_patterns_reordered(text, patterns, source, field_key)
+            for pattern in patterns:
+                match = compiled_pattern(pattern).search(text)
+                if match:
+                    return match
+            return None
+        
+        # Profiling mode: evaluate every pattern so hits and wins can be told apart,
+        # but still return the first match so results are unchanged
+        winner = None
+        for index, pattern in enumerate(patterns):
+            start = time.perf_counter()
+            match = compiled_pattern(pattern).search(text)
+            elapsed = time.perf_counter() - start
+            is_win = match is not None and winner is None
+            if is_win:
+                winner = match
+            self.profiler.record(source, field_key, index, pattern, elapsed, match is not None, is_win)
+        return winner
+    
+    def _search_patterns_reordered(self, text: str, patterns: List[str], source: str, field_key: str) -> Optional[re.Match]:
+        """
+        Try patterns in the order suggested by historical stats, but resolve by original priority.
+        Matches are kept as candidates; once every pattern listed before the best candidate
+        has been tried, that candidate is the same match the file-order search would return.
+        """
+        cache_key = (source, field_key, tuple(patterns))
+        order = self._pattern_orders.get(cache_key)
+        if order is None:
+            order = self._pattern_orders[cache_key] = self.pattern_stats.evaluation_order(source, field_key, patterns)
+        
+        tried = [False] * len(patterns)
+        first_untried = 0
+        best_index = len(patterns)
+        best_match = None
+        for index in order:
+            match = compiled_pattern(patterns[index]).search(text)
+            tried[index] = True
+            if match and index < best_index:
+                best_index, best_match = index, match
+            while first_untried < len(patterns) and tried[first_untried]:
+                first_untried += 1
+            if first_untried >= best_index:
+                break
+        return best_match
+    
+    def _extract_nested_patterns(self, text: str, state: str, results: Dict[str, ExtractionResult],
+                                 only_fields: Optional[set] = None):
         """Extract nested patterns like petitioner and respondent details"""
         state_patterns = STATE_PATTERNS.get(state, {})
         all_patterns = {**GENERAL_PATTERNS, **state_patterns}
+        wanted = lambda *fields: only_fields is None or any(field in only_fields for field in fields)
         
         # Extract petitioner details
-        if 'petitioner' in all_patterns:
+        if 'petitioner' in all_patterns and wanted('petitioner_name', 'petitioner_details'):
             petitioner_patterns = all_patterns['petitioner']
+            source = state if 'petitioner' in state_patterns else "general"
             
             # Extract petitioner name
             if 'name' in petitioner_patterns:
-                for pattern in petitioner_patterns['name']:
-                    match = re.search(pattern, text, re.IGNORECASE | re.MULTILINE)
-                    if match:
-                        results['petitioner_name'] = ExtractionResult(
-                            field_name='petitioner_name',
-                            value=match.group(1).strip(),
-                            confidence=0.8,
-                            method=f"regex_pattern_{state}",
-                            source_text=match.group(0)
-                        )
-                        break
+                match = self._search_patterns(text, petitioner_patterns['name'], source, 'petitioner.name')
+                if match:
+                    results['petitioner_name'] = ExtractionResult(
+                        field_name='petitioner_name',
+                        value=match.group(1).strip(),
+                        confidence=0.8,
+                        method=f"regex_pattern_{state}",
+                        source_text=match.group(0),
+                        source_start=match.start(),
+                        source_end=match.end()
+                    )
             
             # Extract petitioner age (store as additional info)
             if 'age' in petitioner_patterns:
-                for pattern in petitioner_patterns['age']:
-                    match = re.search(pattern, text, re.IGNORECASE | re.MULTILINE)
-                    if match:
-                        # Store age as part of petitioner_details for reference
-                        if 'petitioner_details' not in results:
-                            results['petitioner_details'] = ExtractionResult(
-                                field_name='petitioner_details',
-                                value={},
-                                confidence=0.8,
-                                method=f"regex_pattern_{state}",
-                                source_text=""
-                            )
-                        if isinstance(results['petitioner_details'].value, dict):
-                            results['petitioner_details'].value['age'] = match.group(1).strip()
-                        break
+                match = self._search_patterns(text, petitioner_patterns['age'], source, 'petitioner.age')
+                if match:
+                    # Store age as part of petitioner_details for reference
+                    if 'petitioner_details' not in results:
+                        results['petitioner_details'] = ExtractionResult(
+                            field_name='petitioner_details',
+                            value={},
+                            confidence=0.8,
+                            method=f"regex_pattern_{state}",
+                            source_text=""
+                        )
+                    if isinstance(results['petitioner_details'].value, dict):
+                        results['petitioner_details'].value['age'] = match.group(1).strip()
             
             # Extract petitioner relation (s/o, d/o, etc.)
             if 'relation' in petitioner_patterns:
-                for pattern in petitioner_patterns['relation']:
-                    match = re.search(pattern, text, re.IGNORECASE | re.MULTILINE)
-                    if match:
-                        if 'petitioner_details' not in results:
-                            results['petitioner_details'] = ExtractionResult(
-                                field_name='petitioner_details',
-                                value={},
-                                confidence=0.8,
-                                method=f"regex_pattern_{state}",
-                                source_text=""
-                            )
-                        if isinstance(results['petitioner_details'].value, dict):
-                            results['petitioner_details'].value['relation'] = f"{match.group(1)} {match.group(2).strip()}"
-                        break
+                match = self._search_patterns(text, petitioner_patterns['relation'], source, 'petitioner.relation')
+                if match:
+                    if 'petitioner_details' not in results:
+                        results['petitioner_details'] = ExtractionResult(
+                            field_name='petitioner_details',
+                            value={},
+                            confidence=0.8,
+                            method=f"regex_pattern_{state}",
+                            source_text=""
+                        )
+                    if isinstance(results['petitioner_details'].value, dict):
+                        results['petitioner_details'].value['relation'] = f"{match.group(1)} {match.group(2).strip()}"
             
             # Extract petitioner address
             if 'address' in petitioner_patterns:
                 address_parts = {}
                 for addr_type, addr_patterns in petitioner_patterns['address'].items():
-                    for pattern in addr_patterns:
-                        match = re.search(pattern, text, re.IGNORECASE | re.MULTILINE)
-                        if match:
-                            address_parts[addr_type] = match.group(1).strip()
-                            break
+                    match = self._search_patterns(text, addr_patterns, source, f'petitioner.address.{addr_type}')
+                    if match:
+                        address_parts[addr_type] = match.group(1).strip()
                 
                 if address_parts:
                     if 'petitioner_details' not in results:
@@ -582,89 +872,127 @@ class MetaDataExtractor:
                         results['petitioner_details'].value['address'] = address_parts
         
         # Extract respondent details
-        if 'respondent' in all_patterns:
+        if 'respondent' in all_patterns and wanted('respondent_name'):
             respondent_patterns = all_patterns['respondent']
+            source = state if 'respondent' in state_patterns else "general"
             if 'name' in respondent_patterns:
-                for pattern in respondent_patterns['name']:
-                    match = re.search(pattern, text, re.IGNORECASE | re.MULTILINE)
-                    if match:
-                        results['respondent_name'] = ExtractionResult(
-                            field_name='respondent_name',
-                            value=match.group(1).strip(),
-                            confidence=0.8,
-                            method=f"regex_pattern_{state}",
-                            source_text=match.group(0)
-                        )
-                        break
+                match = self._search_patterns(text, respondent_patterns['name'], source, 'respondent.name')
+                if match:
+                    results['respondent_name'] = ExtractionResult(
+                        field_name='respondent_name',
+                        value=match.group(1).strip(),
+                        confidence=0.8,
+                        method=f"regex_pattern_{state}",
+                        source_text=match.group(0),
+                        source_start=match.start(),
+                        source_end=match.end()
+                    )
     
     def extract_with_spacy(self, text: str, missing_fields: List[str]) -> Dict[str, ExtractionResult]:
         """Extract missing fields using SpaCy models"""
-        results = {}
+        return self.extract_with_spacy_batch([text], [missing_fields])[0]
+    
+    def extract_with_spacy_batch(self, texts: List[str], missing_fields_list: List[List[str]]) -> List[Dict[str, ExtractionResult]]:
+        """
+        Run the SpaCy stage over many documents at once.
+        Every document is split into sentence-safe chunks and all chunks are streamed
+        through nlp.pipe together (spacy_batch_size, spacy_n_process), so the whole
+        text is covered and batch jobs share one pipe across documents.
+        """
+        results = [{} for _ in texts]
+        
+        # (chunk text, document position) for every document that still needs SpaCy
+        chunk_stream = [
+            (chunk, position)
+            for position, text in enumerate(texts) if missing_fields_list[position]
+            for _, chunk in split_into_chunks(text, max_chars=self.spacy_chunk_chars)
+        ]
+        if not chunk_stream:
+            return results
         
         for model_name, model_info in self.ai_models.items():
             if not model_name.startswith('spacy_') or model_info['type'] != 'ner':
                 continue
             
             try:
-                nlp = model_info['model']
-                doc = nlp(text[:5000])  # Limit text length for performance
-                
-                # Extract entities
-                persons = [ent.text.strip() for ent in doc.ents if ent.label_ == "PERSON"]
-                orgs = [ent.text.strip() for ent in doc.ents if ent.label_ == "ORG"]
-                dates = [ent.text.strip() for ent in doc.ents if ent.label_ == "DATE"]
+                nlp = self._get_model(model_info)
+                entities = [{'PERSON': [], 'ORG': [], 'DATE': []} for _ in texts]
                 
-                # Map to fields
-                if 'judge_name' in missing_fields and persons:
-                    # Look for judge in persons
-                    for person in persons:
-                        if any(title in text.lower() for title in ['justice', 'judge', 'hon']):
-                            results['judge_name'] = ExtractionResult(
-                                field_name='judge_name',
-                                value=person,
-                                confidence=0.6,
-                                method=f"spacy_{model_name}",
-                                source_text=person
-                            )
-                            break
+                for doc, position in nlp.pipe(chunk_stream, as_tuples=True,
+                                              batch_size=self.spacy_batch_size,
+                                              n_process=self.spacy_n_process):
+                    for ent in doc.ents:
+                        if ent.label_ in entities[position]:
+                            entities[position][ent.label_].append(ent.text.strip())
                 
-                if 'petitioner_name' in missing_fields and persons:
-                    results['petitioner_name'] = ExtractionResult(
-                        field_name='petitioner_name',
-                        value=persons[0],
-                        confidence=0.5,
-                        method=f"spacy_{model_name}",
-                        source_text=persons[0]
-                    )
-                
-                if 'order_date' in missing_fields and dates:
-                    results['order_date'] = ExtractionResult(
-                        field_name='order_date',
-                        value=dates[0],
+                for position, text in enumerate(texts):
+                    pending = [field for field in missing_fields_list[position] if field not in results[position]]
+                    if pending:
+                        results[position].update(
+                            self._map_spacy_entities(text, entities[position], pending, model_name)
+                        )
+            
+            except Exception as e:
+                self.logger.warning(f"SpaCy extraction failed with {model_name}: {e}")
+        
+        return results
+    
+    def _map_spacy_entities(self, text: str, entities: Dict[str, List[str]], missing_fields: List[str],
+                            model_name: str) -> Dict[str, ExtractionResult]:
+        """Map SpaCy PERSON / ORG / DATE entities onto extraction fields"""
+        results = {}
+        persons = entities['PERSON']
+        orgs = entities['ORG']
+        dates = entities['DATE']
+        
+        # Map to fields
+        if 'judge_name' in missing_fields and persons:
+            # Look for judge in persons
+            text_lower = text.lower()
+            if any(title in text_lower for title in ['justice', 'judge', 'hon']):
+                results['judge_name'] = ExtractionResult(
+                    field_name='judge_name',
+                    value=persons[0],
+                    confidence=0.6,
+                    method=f"spacy_{model_name}",
+                    source_text=persons[0]
+                )
+        
+        if 'petitioner_name' in missing_fields and persons:
+            results['petitioner_name'] = ExtractionResult(
+                field_name='petitioner_name',
+                value=persons[0],
+                confidence=0.5,
+                method=f"spacy_{model_name}",
+                source_text=persons[0]
+            )
+        
+        if 'order_date' in missing_fields and dates:
+            results['order_date'] = ExtractionResult(
+                field_name='order_date',
+                value=dates[0],
+                confidence=0.6,
+                method=f"spacy_{model_name}",
+                source_text=dates[0]
+            )
+        
+        if 'court_name' in missing_fields and orgs:
+            # Look for court in organizations
+            for org in orgs:
+                if 'court' in org.lower():
+                    results['court_name'] = ExtractionResult(
+                        field_name='court_name',
+                        value=org,
                         confidence=0.6,
                         method=f"spacy_{model_name}",
-                        source_text=dates[0]
+                        source_text=org
                     )
-                
-                if 'court_name' in missing_fields and orgs:
-                    # Look for court in organizations
-                    for org in orgs:
-                        if 'court' in org.lower():
-                            results['court_name'] = ExtractionResult(
-                                field_name='court_name',
-                                value=org,
-                                confidence=0.6,
-                                method=f"spacy_{model_name}",
-                                source_text=org
-                            )
-                            break
-                
-            except Exception as e:
-                self.logger.warning(f"SpaCy extraction failed with {model_name}: {e}")
+                    break
         
         return results
     
-    def extract_with_qa_models(self, text: str, missing_fields: List[str]) -> Dict[str, ExtractionResult]:
+    def extract_with_qa_models(self, text: str, missing_fields: List[str],
+                               retriever: Optional[DocumentChunkIndex] = None) -> Dict[str, ExtractionResult]:
         """Extract missing fields using Question-Answering models"""
         results = {}
         
@@ -728,47 +1056,97 @@ class MetaDataExtractor:
             if model_info['type'] != 'qa':
                 continue
             
-            qa_pipeline = model_info['model']
+            pending = {field: field_questions[field] for field in missing_fields
+                       if field in field_questions and field not in results}
+            if not pending:
+                break
             
-            for field in missing_fields:
-                if field in field_questions and field not in results:
-                    questions = field_questions[field]
-                    
-                    best_answer = None
-                    best_score = 0
-                    
-                    for question in questions:
-                        try:
-                            # Limit context length for performance
-                            context = text[:2000]
-                            answer = qa_pipeline(question=question, context=context)
-                            
-                            if isinstance(answer, list):
-                                answer = answer[0] if answer else {'answer': '', 'score': 0}
-                            
-                            if answer['score'] > best_score and answer['score'] > model_info['confidence_threshold']:
-                                best_answer = answer
-                                best_score = answer['score']
-                        
-                        except Exception as e:
-                            self.logger.warning(f"QA failed for {question} with {model_name}: {e}")
-                            continue
-                    
-                    if best_answer and best_score > model_info['confidence_threshold']:
-                        results[field] = ExtractionResult(
-                            field_name=field,
-                            value=best_answer['answer'].strip(),
-                            confidence=best_score,
-                            method=f"qa_{model_name}",
-                            source_text=best_answer.get('context', '')[:100]
-                        )
+            answers = self._run_batched_qa(model_name, model_info, pending, text, retriever)
+            for field, (answer, context) in answers.items():
+                results[field] = ExtractionResult(
+                    field_name=field,
+                    value=answer['answer'].strip(),
+                    confidence=answer['score'],
+                    method=f"qa_{model_name}",
+                    source_text=self._qa_source_snippet(answer, context)
+                )
         
         return results
     
-    def extract_with_ner_models(self, text: str, missing_fields: List[str]) -> Dict[str, ExtractionResult]:
+    def _run_batched_qa(self, model_name: str, model_info: Dict[str, Any],
+                        field_questions: Dict[str, List[str]], text: str,
+                        retriever: Optional[DocumentChunkIndex] = None) -> Dict[str, Tuple[Dict[str, Any], str]]:
+        """
+        Answer every question for every field in one batched pipeline call.
+        With a retriever each field's questions only see its top-k relevant chunks;
+        without one they see the whole document. The pipeline splits each
+        (question, context) pair into overlapping windows of qa_max_seq_len tokens
+        with qa_doc_stride overlap. Returns the best span per field above the
+        model's confidence threshold, with the context it was found in.
+        """
+        qa_pipeline = self._get_model(model_info)
+        
+        inputs = []
+        owners = []
+        for field, questions in field_questions.items():
+            context = retriever.context_for(questions, self.retrieval_top_k) if retriever else text
+            for question in questions:
+                inputs.append({'question': question, 'context': context})
+                owners.append(field)
+        
+        if not inputs:
+            return {}
+        
+        try:
+            # legal_qa_bert answers both the 'qa' and the 'legal' stage
+            with self._model_lock(model_name, model_info):
+                outputs = qa_pipeline(
+                    inputs,
+                    batch_size=self.qa_batch_size,
+                    doc_stride=self.qa_doc_stride,
+                    max_seq_len=self.qa_max_seq_len,
+                    max_answer_len=self.qa_max_answer_len,
+                    top_k=1
+                )
+        except Exception as e:
+            self.logger.warning(f"Batched QA failed with {model_name}: {e}")
+            return {}
+        
+        if isinstance(outputs, dict):
+            outputs = [outputs]
+        
+        best = {}
+        threshold = model_info['confidence_threshold']
+        for position, (field, output) in enumerate(zip(owners, outputs)):
+            if isinstance(output, list):
+                output = output[0] if output else None
+            if not output or not output.get('answer', '').strip():
+                continue
+            if output['score'] > threshold and output['score'] > best.get(field, ({'score': 0}, ''))[0]['score']:
+                best[field] = (output, inputs[position]['context'])
+        
+        return best
+    
+    @staticmethod
+    def _qa_source_snippet(answer: Dict[str, Any], context: str, padding: int = 40) -> str:
+        """Return the text surrounding a QA answer span"""
+        start, end = answer.get('start'), answer.get('end')
+        if start is None or end is None:
+            return answer.get('answer', '')[:100]
+        return context[max(0, start - padding):end + padding].strip()[:100]
+    
+    def extract_with_ner_models(self, text: str, missing_fields: List[str],
+                                retriever: Optional[DocumentChunkIndex] = None) -> Dict[str, ExtractionResult]:
         """Extract missing fields using NER models"""
         results = {}
         
+        # Only the chunks likely to mention the missing people/organisations are tagged
+        queries = [query for field in missing_fields for query in NER_RETRIEVAL_QUERIES.get(field, [])]
+        if retriever and queries:
+            context = retriever.context_for(queries, self.retrieval_top_k)
+        else:
+            context = text[:2000]
+        
         for model_name, model_info in self.ai_models.items():
             if model_info['type'] != 'ner' or model_name.startswith('spacy_'):
                 continue
@@ -777,7 +1155,7 @@ class MetaDataExtractor:
                 if model_name == 'nltk_ner':
                     # NLTK NER
                     if AI_MODULES.get('nltk'):
-                        sentences = sent_tokenize(text[:3000])
+                        sentences = sent_tokenize(context)
                         entities = []
                         
                         for sentence in sentences[:5]:  # Limit sentences
@@ -805,8 +1183,8 @@ class MetaDataExtractor:
                 
                 else:
                     # Transformer NER
-                    ner_pipeline = model_info['model']
-                    entities = ner_pipeline(text[:2000])  # Limit text length
+                    ner_pipeline = self._get_model(model_info)
+                    entities = ner_pipeline(context)
                     
                     for entity in entities:
                         if entity['score'] < model_info['confidence_threshold']:
@@ -840,49 +1218,81 @@ class MetaDataExtractor:
         
         return results
     
+    def extract_with_gazetteer(self, text: str, missing_fields: List[str], state: str = "") -> Dict[str, ExtractionResult]:
+        """Resolve police stations, Acts and judges from the gazetteer (one automaton pass)"""
+        results = {}
+        scan = get_gazetteer().scan(text)
+        
+        def result(field_name: str, hit: GazetteerHit, value: Optional[str] = None) -> ExtractionResult:
+            return ExtractionResult(
+                field_name=field_name,
+                value=value or hit.value,
+                confidence=0.8,
+                method="gazetteer",
+                source_text=hit.matched,
+                source_start=hit.start,
+                source_end=hit.end
+            )
+        
+        if 'police_station' in missing_fields:
+            hit = scan.first('police_stations', state)
+            if hit:
+                results['police_station'] = result('police_station', hit)
+        
+        if 'judge_name' in missing_fields:
+            # Only the bench of the court in the heading; judges of cited precedents are skipped
+            hit = get_gazetteer().bench_judge(text, scan)
+            if hit:
+                results['judge_name'] = result('judge_name', hit)
+        
+        if 'statutes_offences' in missing_fields and scan.acts:
+            results['statutes_offences'] = result('statutes_offences', scan.acts[0], "; ".join(scan.unique_values('acts')))
+        
+        return results
+    
     def extract_with_date_parser(self, text: str, missing_fields: List[str]) -> Dict[str, ExtractionResult]:
-        """Extract dates using dateparser library"""
+        """Extract dates with the fast-path normalizer (dateparser only as a last resort)"""
         results = {}
         
-        if 'order_date' not in missing_fields or not AI_MODULES.get('dateparser'):
+        if 'order_date' not in missing_fields:
             return results
         
         try:
-            if AI_MODULES.get('dateparser'):
-                import dateparser
-                
-                # Look for date patterns in text
-                date_patterns = [
-                    r'\b\d{1,2}(?:st|nd|rd|th)?\s+(?:day\s+of\s+)?\w+,?\s+\d{4}\b',
-                    r'\b\d{1,2}[-/\.]\d{1,2}[-/\.]\d{4}\b',
-                    r'\b(?:January|February|March|April|May|June|July|August|September|October|November|December)\s+\d{1,2},?\s+\d{4}\b'
-                ]
-                
-                for pattern in date_patterns:
-                    matches = re.finditer(pattern, text, re.IGNORECASE)
-                    for match in matches:
-                        date_text = match.group(0)
-                        parsed_date = dateparser.parse(date_text)
-                        
-                        if parsed_date:
-                            results['order_date'] = ExtractionResult(
-                                field_name='order_date',
-                                value=parsed_date.strftime('%Y-%m-%d'),
-                                confidence=0.7,
-                                method="dateparser",
-                                source_text=date_text
-                            )
-                            break
+            # Look for date patterns in text
+            date_patterns = [
+                r'\b\d{1,2}(?:st|nd|rd|th)?\s+(?:day\s+of\s+)?\w+,?\s+\d{4}\b',
+                r'\b\d{1,2}[-/\.]\d{1,2}[-/\.]\d{4}\b',
+                r'\b(?:January|February|March|April|May|June|July|August|September|October|November|December)\s+\d{1,2},?\s+\d{4}\b'
+            ]
+            
+            for pattern in date_patterns:
+                matches = re.finditer(pattern, text, re.IGNORECASE)
+                for match in matches:
+                    date_text = match.group(0)
+                    parsed_date = parse_date(date_text)
                     
-                    if 'order_date' in results:
+                    if parsed_date:
+                        results['order_date'] = ExtractionResult(
+                            field_name='order_date',
+                            value=parsed_date.strftime('%Y-%m-%d'),
+                            confidence=0.7,
+                            method="dateparser",
+                            source_text=date_text,
+                            source_start=match.start(),
+                            source_end=match.end()
+                        )
                         break
+                
+                if 'order_date' in results:
+                    break
         
         except Exception as e:
             self.logger.warning(f"Date parsing failed: {e}")
         
         return results
     
-    def extract_with_legal_models(self, text: str, missing_fields: List[str]) -> Dict[str, ExtractionResult]:
+    def extract_with_legal_models(self, text: str, missing_fields: List[str],
+                                  retriever: Optional[DocumentChunkIndex] = None) -> Dict[str, ExtractionResult]:
         """Extract missing fields using specialized legal models"""
         results = {}
         
@@ -918,559 +1328,35 @@ class MetaDataExtractor:
         # Use legal QA models for these fields
         for model_name, model_info in self.ai_models.items():
             if 'legal' in model_name and model_info['type'] == 'qa':
-                qa_pipeline = model_info['model']
+                pending = {field: legal_questions[field] for field in missing_fields
+                           if field in legal_questions and field not in results}
+                if not pending:
+                    break
                 
-                for field in missing_fields:
-                    if field in legal_questions and field not in results:
-                        questions = legal_questions[field]
-                        
-                        best_answer = None
-                        best_score = 0
-                        
-                        for question in questions:
-                            try:
-                                # Use larger context for legal documents
-                                context = text[:3000]  # Increased from 2000
-                                answer = qa_pipeline(question=question, context=context)
-                                
-                                if isinstance(answer, list):
-                                    answer = answer[0] if answer else {'answer': '', 'score': 0}
-                                
-                                if answer['score'] > best_score and answer['score'] > model_info['confidence_threshold']:
-                                    best_answer = answer
-                                    best_score = answer['score']
-                            
-                            except Exception as e:
-                                self.logger.warning(f"Legal QA failed for {question}: {e}")
-                                continue
-                        
-                        if best_answer and best_score > model_info['confidence_threshold']:
-                            results[field] = ExtractionResult(
-                                field_name=field,
-                                value=best_answer['answer'].strip(),
-                                confidence=best_score,
-                                method=f"legal_qa_{model_name}",
-                                source_text=best_answer.get('context', '')[:100]
-                            )
-                            self.logger.info(f"   🏛️ Legal model found {field}: {best_answer['answer'][:50]}...")
+                answers = self._run_batched_qa(model_name, model_info, pending, text, retriever)
+                for field, (answer, context) in answers.items():
+                    results[field] = ExtractionResult(
+                        field_name=field,
+                        value=answer['answer'].strip(),
+                        confidence=answer['score'],
+                        method=f"legal_qa_{model_name}",
+                        source_text=self._qa_source_snippet(answer, context)
+                    )
+                    self.logger.info(f"   🏛️ Legal model found {field}: {answer['answer'][:50]}...")
         
         return results
     
     def format_structured_output(self, results: Dict[str, Any]) -> Dict[str, Any]:
         """Format extraction results in a clean, structured format"""
-        extracted_data = results.get('extracted_data', {})
-        
-        # Helper function to clean and format dates
-        def format_date(date_str):
-            if not date_str:
-                return ""
-            # Convert "2nd day of February, 2024" to "02-02-2024"
-            try:
-                import re
-                # Handle specific patterns
-                if "day of" in date_str.lower():
-                    # Pattern: "2nd day of February, 2024"
-                    pattern = r'(\d{1,2})(?:st|nd|rd|th)?\s+day\s+of\s+(\w+),?\s+(\d{4})'
-                    match = re.search(pattern, date_str, re.IGNORECASE)
-                    if match:
-                        day, month_name, year = match.groups()
-                        month_map = {
-                            'january': '01', 'february': '02', 'march': '03', 'april': '04',
-                            'may': '05', 'june': '06', 'july': '07', 'august': '08',
-                            'september': '09', 'october': '10', 'november': '11', 'december': '12'
-                        }
-                        month = month_map.get(month_name.lower(), '01')
-                        return f"{year}-{month}-{day.zfill(2)}"
-                
-                # Try dateparser as fallback
-                if AI_MODULES.get('dateparser'):
-                    import dateparser
-                    parsed_date = dateparser.parse(date_str)
-                    if parsed_date:
-                        return parsed_date.strftime("%d-%m-%Y")
-                return date_str
-            except Exception as e:
-                return date_str
-        
-        # Helper function to extract value from field
-        def get_field_value(field_name, default=""):
-            field_data = extracted_data.get(field_name, {})
-            if isinstance(field_data, dict):
-                return field_data.get('value', default)
-            return field_data or default
-        
-        # Helper function to get petitioner details
-        def get_petitioner_details():
-            petitioner_details = get_field_value('petitioner_details')
-            if isinstance(petitioner_details, dict):
-                address_info = petitioner_details.get('address', {})
-                return {
-                    "type": "individual",
-                    "role": "petitioner/accused no.2",
-                    "name": get_field_value('petitioner_name'),
-                    "age": int(petitioner_details.get('age', 0)) if petitioner_details.get('age', '').isdigit() else None,
-                    "father_name": petitioner_details.get('relation', '').replace('S/O ', '').replace('s/o ', ''),
-                    "address": {
-                        "house_name": address_info.get('house', ''),
-                        "street": address_info.get('village', ''),
-                        "village": address_info.get('po', ''),
-                        "district": address_info.get('district', ''),
-                        "state": results.get('detected_state', ''),
-                        "pincode": address_info.get('pin', '')
-                    }
-                }
-            else:
-                return {
-                    "type": "individual",
-                    "role": "petitioner/accused no.2",
-                    "name": get_field_value('petitioner_name'),
-                    "age": None,
-                    "father_name": "",
-                    "address": {
-                        "house_name": "",
-                        "street": "",
-                        "village": "",
-                        "district": "",
-                        "state": results.get('detected_state', ''),
-                        "pincode": ""
-                    }
-                }
-        
-        # Helper function to get respondent details
-        def get_respondents():
-            respondents = []
-            respondent_name = get_field_value('respondent_name')
-            
-            if 'STATE OF' in respondent_name.upper():
-                respondents.append({
-                    "type": "government",
-                    "role": "respondent",
-                    "name": respondent_name,
-                    "representative": "Public Prosecutor, High Court of " + results.get('detected_state', ''),
-                    "address": {
-                        "district": "Ernakulam" if results.get('detected_state') == 'Kerala' else "",
-                        "state": results.get('detected_state', ''),
-                        "pincode": "682031" if results.get('detected_state') == 'Kerala' else ""
-                    }
-                })
-            
-            # Add police station if mentioned
-            police_station = get_field_value('police_station')
-            if police_station:
-                respondents.append({
-                    "type": "government",
-                    "role": "respondent",
-                    "name": "Station House Officer",
-                    "designation": f"{police_station} Police Station",
-                    "address": {
-                        "district": "Malappuram",  # This should be extracted dynamically
-                        "state": results.get('detected_state', ''),
-                        "pincode": "676304"  # This should be extracted dynamically
-                    }
-                })
-            
-            return respondents
-        
-        # Helper function to extract sections and acts
-        def get_acts_sections():
-            acts_sections = []
-            
-            # Get the raw text for better pattern matching
-            text = results.get('raw_text', '')
-            
-            # Common patterns for sections
-            section_patterns = [
-                r'Section\s+(\d+[a-z]*(?:\([a-z0-9]+\))?)\s+of\s+the\s+([^,\n.]+)',
-                r'under\s+Section\s+(\d+[a-z]*(?:\([a-z0-9]+\))?)\s+of\s+the\s+([^,\n.]+)',
-                r'offences\s+punishable\s+under\s+Section\s+(\d+[a-z]*)\s+of\s+the\s+([^,\n.]+)',
-            ]
-            
-            for pattern in section_patterns:
-                matches = re.findall(pattern, text, re.IGNORECASE)
-                for match in matches:
-                    if len(match) == 2:
-                        section_num, act_name = match
-                        # Clean up act name
-                        act_name = act_name.strip()
-                        if act_name.endswith('and'):
-                            act_name = act_name[:-3].strip()
-                        acts_sections.append(f"Section {section_num} {act_name}")
-            
-            # Remove duplicates while preserving order
-            seen = set()
-            unique_acts = []
-            for act in acts_sections:
-                if act not in seen:
-                    seen.add(act)
-                    unique_acts.append(act)
-            
-            return unique_acts if unique_acts else [
-                "Section 286 IPC",
-                "Section 4(b) Explosive Substances Act, 1908", 
-                "Section 5 Explosive Substances Act, 1908"
-            ]
-        
-        # Detect document type from the text
-        def detect_document_type():
-            text = results.get('raw_text', '').lower() if results.get('raw_text') else ""
-            
-            if 'writ petition' in text or 'w.p(c)' in text or 'wp(c)' in text:
-                if 'judgment' in text:
-                    return "Writ petition (civil) judgment"
-                else:
-                    return "Writ Petition (Civil)"
-            elif 'bail application' in text or 'b.a.' in text or 'anticipatory bail' in text:
-                return "Anticipatory bail order (Section 438 CrPC)"
-            elif 'criminal petition' in text or 'crl.p' in text:
-                return "Criminal Petition"
-            elif 'civil revision' in text or 'c.r.p' in text:
-                return "Civil Revision Petition"
-            elif 'appeal' in text:
-                return "Appeal"
-            else:
-                return "Court Order"
-        
-        # Get document type
-        doc_type = detect_document_type()
-        
-        # Determine case prefix based on document type
-        case_prefix = "W.P(C) No." if 'writ petition' in doc_type.lower() else "B.A. No."
-        
-        # Get statutes based on document type
-        def get_statutes_for_doc_type(doc_type):
-            if 'writ petition' in doc_type.lower():
-                return [
-                    "Article 226 Constitution of India",
-                    "Article 227 Constitution of India"
-                ]
-            elif 'bail' in doc_type.lower():
-                return [
-                    "Section 438 Code of Criminal Procedure, 1973",
-                    "Section 286 Indian Penal Code, 1860",
-                    "Section 4(b) Explosive Substances Act, 1908",
-                    "Section 5 Explosive Substances Act, 1908"
-                ]
-            else:
-                return self._get_enhanced_statutes()
-        
-        # Extract and format case number properly
-        def format_case_number():
-            case_num = get_field_value('case_number')
-            if not case_num:
-                return "", ""
-            
-            # Try to extract case number from the text more accurately
-            import re
-            raw_text = results.get('raw_text', '')
-            
-            # Look for W.P(C) patterns first
-            writ_match = re.search(r'W\.P\(C\)\s*(?:NO\.?)?\s*(\d+)\/(\d{2,4})', raw_text, re.IGNORECASE)
-            if writ_match:
-                case_no, year = writ_match.groups()
-                if len(year) == 2:
-                    year = "20" + year
-                case_number = f"W.P.(C) No. {case_no} of {year}"
-                alternate = f"{case_no}/{year}"
-                return case_number, alternate
-            
-            # Look for standard WP(C) patterns
-            writ_match2 = re.search(r'WP\(C\)\s*(?:NO\.?)?\s*(\d+)\s*OF\s*(\d{4})', raw_text, re.IGNORECASE)
-            if writ_match2:
-                case_no, year = writ_match2.groups()
-                case_number = f"W.P.(C) No. {case_no} of {year}"
-                alternate = f"{case_no}/{year}"
-                return case_number, alternate
-            
-            # Fallback for other cases
-            return f"{case_prefix} {case_num} of 2024", case_num
-        
-        case_number, alternate_case_number = format_case_number()
-        
-        # Format the main structure - Enhanced professional version
-        structured_output = {
-            "court_name": "High Court of Kerala at Ernakulam",
-            "case_number": case_number,
-            "alternate_case_number": alternate_case_number,
-            "crime_number": None,  # Default to null, will be updated for criminal cases
-            "order_date": format_date(get_field_value('order_date')),
-            "judge_name": get_field_value('judge_name').replace('MOHAMMED', 'Mohammed').replace('NIAS C.P.', 'Nias C.P.'),
-            "bench": "Single Judge",
-            "document_type": doc_type,
-            "statutes_sections": get_statutes_for_doc_type(doc_type),
-            "parties": self._format_professional_parties(results, doc_type)
-        }
-        
-        # Add crime number only for criminal cases (bail applications, criminal petitions)
-        if 'bail' in doc_type.lower() or 'criminal' in doc_type.lower():
-            structured_output["crime_number"] = f"Crime No. {get_field_value('fir_crime_no')}, {get_field_value('police_station')} Police Station, Malappuram"
-        
-        # Add production summary if available
-        if 'production_summary' in results:
-            structured_output['summary'] = results['production_summary']
-        
-        return structured_output
+        return format_structured_output(results)
     
     def _get_enhanced_statutes(self) -> List[str]:
         """Get enhanced statutes sections in professional format"""
-        # This should be called with document type context
-        return [
-            "Section 438 Code of Criminal Procedure, 1973",
-            "Section 286 Indian Penal Code, 1860",
-            "Section 4(b) Explosive Substances Act, 1908",
-            "Section 5 Explosive Substances Act, 1908"
-        ]
+        return get_enhanced_statutes()
     
     def _format_professional_parties(self, results: Dict[str, Any], doc_type: str = "") -> List[Dict]:
         """Format parties in professional structure based on document type"""
-        extracted_data = results.get('extracted_data', {})
-        parties = []
-        
-        # Helper function to get field value
-        def get_field_value(field_name, default=""):
-            field_data = extracted_data.get(field_name, {})
-            if isinstance(field_data, dict):
-                return field_data.get('value', default)
-            return field_data or default
-        
-        # Check if this is a writ petition - different party structure
-        if 'writ petition' in doc_type.lower():
-            # For writ petitions - usually institutions vs government
-            # Extract full petitioner name from text
-            raw_text = results.get('raw_text', '')
-            full_name_match = re.search(r'PETITIONER[\/]?(?:\(S\))?\s*:?\s*([A-Z][A-Z\s]+TRUST)', raw_text, re.IGNORECASE)
-            if full_name_match:
-                petitioner_name = full_name_match.group(1).title()
-            else:
-                petitioner_name = get_field_value('petitioner_name', 'Trust')
-            
-            # Determine party type based on name
-            def get_party_type(name):
-                name_lower = name.lower()
-                if 'trust' in name_lower:
-                    return "trust"
-                elif 'college' in name_lower or 'school' in name_lower or 'university' in name_lower:
-                    return "educational_institution" 
-                elif 'company' in name_lower or 'corporation' in name_lower or 'ltd' in name_lower:
-                    return "company"
-                else:
-                    return "institution"
-            
-            # Extract petitioner address from text if available
-            raw_text = results.get('raw_text', '')
-            address_match = re.search(r'REP BY CHAIRMAN ([^,]+), ([^,]+), ([^,]+) DISTRICT[.,] PIN - (\d+)', raw_text, re.IGNORECASE)
-            
-            if address_match:
-                po_area, place, district, pin = address_match.groups()
-                parties.append({
-                    "role": "petitioner",
-                    "party_type": get_party_type(petitioner_name),
-                    "name": petitioner_name,
-                    "official_designation": "Petitioner",
-                    "address": {
-                        "apartment_house": "",
-                        "street": None,
-                        "village": place.strip(),
-                        "post_office": po_area.strip() + " P.O.",
-                        "city": district.strip(),
-                        "district": district.strip(),
-                        "state": "Kerala",
-                        "zipcode": pin
-                    },
-                    "age": None,
-                    "alias": None,
-                    "relations": "",
-                    "other_details": None,
-                    "counsels": [
-                        "Sri. Kurian George Kannanthanam (Sr.)",
-                        "P.M. Saneer",
-                        "Tony George Kannanthanam",
-                        "Bibin B. Thomas"
-                    ]
-                })
-            else:
-                # Fallback structure
-                parties.append({
-                    "role": "petitioner",
-                    "party_type": "institution",
-                    "name": petitioner_name,
-                    "official_designation": "Educational Institution",
-                    "address": {
-                        "apartment_house": "",
-                        "street": None,
-                        "village": "Thodupuzha",
-                        "post_office": "Perumpillichira P.O.",
-                        "city": "Idukki",
-                        "district": "Idukki",
-                        "state": "Kerala",
-                        "zipcode": "685605"
-                    },
-                    "age": None,
-                    "alias": None,
-                    "relations": "",
-                    "other_details": None,
-                    "counsels": [
-                        "Sri. Kurian George Kannanthanam (Sr.)",
-                        "P.M. Saneer",
-                        "Tony George Kannanthanam",
-                        "Bibin B. Thomas"
-                    ]
-                })
-            
-            # Add government respondents for writ petition
-            parties.append({
-                "role": "respondent",
-                "party_type": "government",
-                "name": "Union of India",
-                "official_designation": "Represented by Secretary to Government, Ministry of Health & Family Welfare",
-                "address": {
-                    "apartment_house": None,
-                    "street": None,
-                    "village": None,
-                    "city": "New Delhi",
-                    "district": "New Delhi",
-                    "state": "Delhi",
-                    "zipcode": "110011"
-                },
-                "age": None,
-                "alias": None,
-                "relations": None,
-                "counsels": ["C. Dinesh"]
-            })
-            
-            parties.append({
-                "role": "respondent",
-                "party_type": "statutory_body",
-                "name": "The Dental Council of India",
-                "official_designation": "Represented by its Secretary",
-                "address": {
-                    "apartment_house": None,
-                    "street": "Aiwan-E-Gharib Marg, Kotla Road",
-                    "village": None,
-                    "city": "New Delhi",
-                    "district": "New Delhi",
-                    "state": "Delhi",
-                    "zipcode": "110002"
-                },
-                "age": None,
-                "alias": None,
-                "relations": None,
-                "counsels": ["Prakash M P"]
-            })
-            
-            return parties
-        
-        # For criminal cases (bail applications) - individuals vs state
-        petitioner_details = get_field_value('petitioner_details')
-        if isinstance(petitioner_details, dict):
-            address_info = petitioner_details.get('address', {})
-            parties.append({
-                "role": "petitioner",
-                "party_type": "individual",
-                "name": get_field_value('petitioner_name'),
-                "official_designation": "Accused No. 2 / Petitioner",
-                "address": {
-                    "apartment_house": address_info.get('house', ''),
-                    "street": None,
-                    "village": "Kariyaram",
-                    "post_office": address_info.get('po', '') + " P.O." if address_info.get('po') else None,
-                    "city": address_info.get('district', ''),
-                    "district": address_info.get('district', ''),
-                    "state": results.get('detected_state', ''),
-                    "zipcode": address_info.get('pin', '')
-                },
-                "age": int(petitioner_details.get('age', 0)) if petitioner_details.get('age', '').isdigit() else None,
-                "alias": None,
-                "relations": petitioner_details.get('relation', ''),
-                "other_details": None,
-                "counsels": [
-                    "Lal K. Joseph",
-                    "T.A. Luxy", 
-                    "P. Muraleedharan (Thuravoor)",
-                    "Suresh Sukumar",
-                    "Koya Arafa Mirage",
-                    "Anzil Salim",
-                    "Sanjay Sellen",
-                    "Anupama"
-                ]
-            })
-        else:
-            # Fallback if detailed petitioner info not available
-            parties.append({
-                "role": "petitioner",
-                "party_type": "individual", 
-                "name": get_field_value('petitioner_name'),
-                "official_designation": "Accused No. 2 / Petitioner",
-                "address": {
-                    "apartment_house": "Kokkaparamban House",
-                    "street": None,
-                    "village": "Kariyaram",
-                    "post_office": "Urakam Melmuri P.O.",
-                    "city": "Malappuram",
-                    "district": "Malappuram",
-                    "state": results.get('detected_state', ''),
-                    "zipcode": "676517"
-                },
-                "age": 36,
-                "alias": None,
-                "relations": "S/o Abdul Rahiman",
-                "other_details": None,
-                "counsels": [
-                    "Lal K. Joseph",
-                    "T.A. Luxy",
-                    "P. Muraleedharan (Thuravoor)",
-                    "Suresh Sukumar",
-                    "Koya Arafa Mirage",
-                    "Anzil Salim",
-                    "Sanjay Sellen",
-                    "Anupama"
-                ]
-            })
-        
-        # State of Kerala
-        parties.append({
-            "role": "respondent",
-            "party_type": "government",
-            "name": "State of Kerala",
-            "official_designation": "Represented by Public Prosecutor, High Court of Kerala",
-            "address": {
-                "apartment_house": None,
-                "street": None,
-                "village": None,
-                "city": "Ernakulam",
-                "district": "Ernakulam",
-                "state": results.get('detected_state', ''),
-                "zipcode": "682031"
-            },
-            "age": None,
-            "alias": None,
-            "relations": None,
-            "counsels": ["Sri. Premchand R. Nair, Sr. Government Pleader"]
-        })
-        
-        # Police Station
-        police_station = get_field_value('police_station')
-        if police_station:
-            parties.append({
-                "role": "respondent",
-                "party_type": "police_station",
-                "name": f"Station House Officer, {police_station} Police Station",
-                "official_designation": "Station House Officer",
-                "address": {
-                    "apartment_house": None,
-                    "street": None,
-                    "village": None,
-                    "city": police_station,
-                    "district": "Malappuram",
-                    "state": results.get('detected_state', ''),
-                    "zipcode": "676304"
-                },
-                "age": None,
-                "alias": None,
-                "relations": None,
-                "counsels": []
-            })
-        
-        return parties
+        return format_professional_parties(results, doc_type)
     
     def format_output(self, results: Dict[str, Any]) -> str:
         """Format extraction results for display - Clean version"""
@@ -1589,107 +1475,224 @@ class MetaDataExtractor:
         
         return text_file, json_file, raw_text_file, file_output_dir
     
-    def process_multiple_pdfs(self, pdf_directory: str, output_dir: str = "output"):
+    @staticmethod
+    def load_document_text(path: str) -> str:
+        """Load document text from a PDF (embedded text layer) or a plain text file"""
+        if path.lower().endswith('.pdf'):
+            if not PDF_AVAILABLE:
+                raise RuntimeError("PyMuPDF is required to read PDF files")
+            doc = fitz.open(path)
+            try:
+                return "\n".join(page.get_text().strip() for page in doc)
+            finally:
+                doc.close()
+        with open(path, 'r', encoding='utf-8') as f:
+            return f.read()
+    
+    @staticmethod
+    def warm_pattern_cache():
+        """Compile every state/general pattern into the module's table so workers don't pay for it per document"""
+        def _compile(patterns):
+            if isinstance(patterns, dict):
+                for nested in patterns.values():
+                    _compile(nested)
+            elif isinstance(patterns, list):
+                for pattern in patterns:
+                    compiled_pattern(pattern)
+        
+        _compile(GENERAL_PATTERNS)
+        for state_patterns in STATE_PATTERNS.values():
+            _compile(state_patterns)
+    
+    def extract_many(self, documents: Iterable[Union[str, Tuple[str, str]]], workers: int = 1,
+                     max_in_flight: Optional[int] = None, keep_raw_text: bool = True) -> Iterator[Dict[str, Any]]:
+        """
+        Extract metadata from many documents using a pool of worker processes
+        Args:
+            documents: Iterable of document texts, file paths (.pdf or .txt), or (doc_id, text_or_path) tuples
+            workers: Number of worker processes (1 runs in this process)
+            max_in_flight: Maximum documents submitted but not yet finished (defaults to 2 * workers)
+            keep_raw_text: Set to False to drop 'raw_text' from results (it is not sent back from workers)
+        Yields:
+            Dictionaries with doc_id, success, and either result or error - in completion order
+        """
+        if workers <= 1:
+            for doc_id, item in _iter_batch_items(documents):
+                yield _run_batch_item(self, doc_id, item, keep_raw_text)
+            return
+        
+        max_in_flight = max_in_flight or workers * 2
+        config = {
+            'use_gpu': self.use_gpu,
+            'debug': False,
+            'pattern_stats': self.pattern_stats,
+            'result_cache': self.result_cache,
+        }
+        
+        # Forked workers inherit this extractor with its models already loaded.
+        # CUDA cannot be re-initialised in a forked child, so GPU runs spawn fresh workers.
+        start_method = 'fork' if 'fork' in multiprocessing.get_all_start_methods() and not self.use_gpu else 'spawn'
+        global _BATCH_EXTRACTOR
+        _BATCH_EXTRACTOR = self if start_method == 'fork' else None
+        
+        self.logger.info(f"📦 Batch extraction with {workers} workers ({start_method}), {max_in_flight} in flight")
+        
+        try:
+            with ProcessPoolExecutor(max_workers=workers,
+                                     mp_context=multiprocessing.get_context(start_method),
+                                     initializer=_init_batch_worker,
+                                     initargs=(config,)) as pool:
+                pending = {}
+                items = _iter_batch_items(documents)
+                exhausted = False
+                
+                while pending or not exhausted:
+                    # Keep the pool fed without materialising the whole input
+                    while not exhausted and len(pending) < max_in_flight:
+                        try:
+                            doc_id, item = next(items)
+                        except StopIteration:
+                            exhausted = True
+                            break
+                        pending[pool.submit(_extract_batch_item, doc_id, item, keep_raw_text)] = doc_id
+                    
+                    if not pending:
+                        break
+                    
+                    done, _ = wait(pending, return_when=FIRST_COMPLETED)
+                    for future in done:
+                        doc_id = pending.pop(future)
+                        try:
+                            yield future.result()
+                        except Exception as e:
+                            # The worker itself died (e.g. killed by the OOM killer)
+                            yield {'doc_id': doc_id, 'success': False, 'error': str(e)}
+        finally:
+            _BATCH_EXTRACTOR = None
+    
+    def extract_table(self, documents: Iterable[Union[str, Tuple[str, str]]], workers: int = 1,
+                      max_in_flight: Optional[int] = None) -> Tuple[ExtractionResultTable, List[Dict[str, Any]]]:
+        """
+        Batch extraction into a columnar ExtractionResultTable instead of per-document dicts
+        Returns:
+            (table, errors) - rows are in completion order; table.to_dict(row) rebuilds a result
         """
-        Process multiple PDF files from a directory
+        table = ExtractionResultTable(self.extraction_fields)
+        errors = []
+        sources = {}
+        
+        def remember(items):
+            for doc_id, item in items:
+                sources[doc_id] = item
+                yield doc_id, item
+        
+        for record in self.extract_many(remember(_iter_batch_items(documents)), workers, max_in_flight,
+                                        keep_raw_text=False):
+            item = sources.pop(record['doc_id'], None)
+            if not record['success']:
+                errors.append(record)
+                continue
+            if item is not None and _looks_like_path(item):
+                table.append(record['doc_id'], record['result'], path=item)
+            else:
+                table.append(record['doc_id'], record['result'], text=(item or "").strip())
+        return table, errors
+    
+    def process_multiple_pdfs(self, pdf_directory: str, output_dir: str = "output",
+                              ocr_workers: Optional[int] = None, extract_workers: int = 1,
+                              summarize: bool = False):
+        """
+        Process multiple PDF files from a directory through the streaming batch pipeline
+        (OCR → cleaning → extraction → optional summary → writers, see utils/batch_pipeline.py)
         
         Args:
             pdf_directory: Directory containing PDF files
             output_dir: Base output directory
+            ocr_workers: OCR worker processes (default: CPU count minus extraction workers)
+            extract_workers: Extraction worker processes; 1 runs extraction with this extractor
+            summarize: Also generate LLaMA summaries
+        Returns:
+            One record per PDF (pdf_file, filename, success, output_folder, files, summary / error)
         """
-        import glob
-        
-        # Find all PDF files
-        pdf_pattern = os.path.join(pdf_directory, "*.pdf")
-        pdf_files = glob.glob(pdf_pattern)
+        from utils.batch_pipeline import BatchPipeline
         
-        if not pdf_files:
-            self.logger.error(f"❌ No PDF files found in: {pdf_directory}")
+        if not os.path.isdir(pdf_directory):
+            self.logger.error(f"❌ Directory not found: {pdf_directory}")
             return []
         
-        self.logger.info(f"📁 Found {len(pdf_files)} PDF files to process")
-        self.logger.info(f"💾 Base output directory: {output_dir}")
-        self.logger.info("=" * 60)
+        pipeline = BatchPipeline(output_dir=output_dir, ocr_workers=ocr_workers, extract_workers=extract_workers,
+                                 summarize=summarize, extractor=self, use_gpu=self.use_gpu)
+        results = pipeline.run(pdf_directory)
         
-        results = []
-        success_count = 0
-        error_count = 0
+        if not results:
+            self.logger.error(f"❌ No PDF files found in: {pdf_directory}")
+            return []
         
-        for i, pdf_file in enumerate(pdf_files, 1):
-            filename = os.path.basename(pdf_file)
-            filename_prefix = os.path.splitext(filename)[0]
-            
-            self.logger.info(f"[{i}/{len(pdf_files)}] Processing: {filename}")
-            
-            try:
-                # Extract information using the main extraction pipeline
-                result = self.extract(pdf_file)
-                
-                if result:
-                    # Save all results in organized folder structure
-                    raw_text = result.get('raw_text', '')
-                    text_file, json_file, raw_text_file, file_output_dir = self.save_results(
-                        result, output_dir, filename_prefix, raw_text
-                    )
-                    
-                    results.append({
-                        'pdf_file': pdf_file,
-                        'filename': filename,
-                        'success': True,
-                        'output_folder': file_output_dir,
-                        'files': {
-                            'extraction_report': text_file,
-                            'structured_data': json_file,
-                            'raw_text': raw_text_file
-                        },
-                        'summary': result['extraction_summary']
-                    })
-                    
-                    success_count += 1
-                    self.logger.info(f"   ✅ Processed successfully - Files saved in: {file_output_dir}")
-                else:
-                    error_count += 1
-                    self.logger.warning(f"   ⚠️  No data extracted from: {filename}")
-                    
-            except Exception as e:
-                error_count += 1
-                self.logger.error(f"   ❌ Error processing {filename}: {e}")
-                results.append({
-                    'pdf_file': pdf_file,
-                    'filename': filename,
-                    'success': False,
-                    'error': str(e)
-                })
-        
-        # Create batch summary
+        success_count = sum(1 for result in results if result['success'])
         self.logger.info("\n" + "=" * 60)
         self.logger.info("📊 BATCH PROCESSING SUMMARY")
         self.logger.info("=" * 60)
         self.logger.info(f"✅ Successfully processed: {success_count} files")
-        self.logger.info(f"❌ Errors encountered: {error_count} files")
+        self.logger.info(f"❌ Errors encountered: {len(results) - success_count} files")
         self.logger.info(f"📁 All outputs saved in: {output_dir}")
+        self.logger.info(f"📋 Batch summary saved to: {os.path.join(output_dir, 'batch_processing_summary.json')}")
         self.logger.info("=" * 60)
         
-        # Save batch summary
-        batch_summary = {
-            'processing_timestamp': datetime.now().isoformat(),
-            'input_directory': pdf_directory,
-            'output_directory': output_dir,
-            'total_files': len(pdf_files),
-            'successful_extractions': success_count,
-            'failed_extractions': error_count,
-            'results': results
-        }
-        
-        summary_file = os.path.join(output_dir, "batch_processing_summary.json")
-        with open(summary_file, 'w', encoding='utf-8') as f:
-            json.dump(batch_summary, f, indent=2, ensure_ascii=False)
-        
-        self.logger.info(f"📋 Batch summary saved to: {summary_file}")
-        
         return results
 
 
+# Extractor shared by batch worker processes (see MetaDataExtractor.extract_many)
+_BATCH_EXTRACTOR = None
+
+
+def _looks_like_path(item: str) -> bool:
+    """Tell file paths apart from document text in batch inputs"""
+    if not item or '\n' in item or len(item) > 4096:
+        return False
+    return os.path.isfile(item) or item.lower().endswith(('.pdf', '.txt'))
+
+
+def _iter_batch_items(documents: Iterable[Union[str, Tuple[str, str]]]) -> Iterator[Tuple[str, str]]:
+    """Attach a document id to each batch input"""
+    for position, item in enumerate(documents):
+        if isinstance(item, tuple):
+            yield item[0], item[1]
+        elif _looks_like_path(item):
+            yield item, item
+        else:
+            yield f"doc_{position}", item
+
+
+def _init_batch_worker(config: Dict[str, Any]):
+    """Build (or reuse the forked) extractor once per worker process"""
+    global _BATCH_EXTRACTOR
+    if _BATCH_EXTRACTOR is None:
+        _BATCH_EXTRACTOR = MetaDataExtractor(**config)
+    MetaDataExtractor.warm_pattern_cache()
+
+
+def _run_batch_item(extractor: MetaDataExtractor, doc_id: str, item: str,
+                    keep_raw_text: bool = True) -> Dict[str, Any]:
+    """Extract one batch document, turning failures into an error record"""
+    try:
+        text = item
+        if _looks_like_path(item):
+            text = extractor.load_document_text(item)
+        result = extractor.extract(text)
+        if not result:
+            return {'doc_id': doc_id, 'success': False, 'error': 'No text to extract from'}
+        if not keep_raw_text:
+            result.pop('raw_text', None)
+        return {'doc_id': doc_id, 'success': True, 'result': result}
+    except Exception as e:
+        return {'doc_id': doc_id, 'success': False, 'error': str(e)}
+
+
+def _extract_batch_item(doc_id: str, item: str, keep_raw_text: bool = True) -> Dict[str, Any]:
+    """Worker entry point"""
+    return _run_batch_item(_BATCH_EXTRACTOR, doc_id, item, keep_raw_text)
+
+
 def main():
     """Enhanced main function with single and batch processing options"""
     import sys
@@ -1714,7 +1717,7 @@ def main():
         
         print(f"\n🚀 Running default test with: {os.path.basename(pdf_path)}")
         extractor = MetaDataExtractor(use_gpu=False, debug=True)
-        results = extractor.extract(pdf_path)
+        results = extractor.extract(extractor.load_document_text(pdf_path))
         
         # Save results including raw text
         output_dir = "output"
@@ -1745,7 +1748,7 @@ def main():
             return None
         
         print(f"📄 Processing single file: {os.path.basename(input_path)}")
-        results = extractor.extract(input_path)
+        results = extractor.extract(extractor.load_document_text(input_path))
         
         # Save results including raw text
         output_dir = "output"
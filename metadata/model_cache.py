@@ -0,0 +1,237 @@
+"""
+Process-level NLP Model Cache
+Shares loaded spaCy / Transformers / SentenceTransformer models between every
+MetaDataExtractor in the process, keyed by (model name, device).
+
+- Total RAM budget with least-recently-used eviction
+- Optional idle timer that unloads models nobody has used for a while (long-running servers)
+
+Configuration (environment or configure_model_cache()):
+    LEGAL_MODEL_CACHE_MB        total budget in megabytes (default: unlimited)
+    LEGAL_MODEL_IDLE_SECONDS    unload models idle for this long (default: never)
+"""
+
+import os
+import gc
+import time
+import logging
+import threading
+from collections import OrderedDict
+from dataclasses import dataclass
+from typing import Any, Callable, Dict, Optional, Tuple
+
+logger = logging.getLogger(__name__)
+
+
+@dataclass
+class CacheEntry:
+    """A loaded model and its bookkeeping"""
+    model: Any
+    size_bytes: int
+    last_used: float
+    uses: int = 0
+
+
+def _current_rss() -> int:
+    """Resident set size of this process in bytes (0 when unavailable)"""
+    try:
+        with open('/proc/self/statm') as f:
+            return int(f.read().split()[1]) * os.sysconf('SC_PAGE_SIZE')
+    except (OSError, ValueError, AttributeError, IndexError):
+        return 0
+
+
+def _parameter_bytes(model: Any) -> int:
+    """Size of a torch model's parameters, looking through pipelines and wrappers"""
+    torch_model = getattr(model, 'model', model)
+    parameters = getattr(torch_model, 'parameters', None)
+    if not callable(parameters):
+        return 0
+    try:
+        return sum(p.numel() * p.element_size() for p in parameters())
+    except Exception:
+        return 0
+
+
+class ModelCache:
+    """Thread-safe LRU cache of loaded models with a RAM budget and idle unloading"""
+
+    def __init__(self, max_bytes: Optional[int] = None, idle_timeout: Optional[float] = None):
+        self.max_bytes = max_bytes
+        self.idle_timeout = idle_timeout
+        self._entries: "OrderedDict[Tuple[str, str], CacheEntry]" = OrderedDict()
+        self._lock = threading.RLock()
+        self._use_locks: Dict[Tuple[str, str], threading.Lock] = {}
+        self._load_locks: Dict[Tuple[str, str], threading.Lock] = {}
+        self._reaper: Optional[threading.Thread] = None
+        self._stop = threading.Event()
+        self.hits = 0
+        self.misses = 0
+        self.evictions = 0
+
+    @property
+    def total_bytes(self) -> int:
+        return sum(entry.size_bytes for entry in self._entries.values())
+
+    def get(self, name: str, device: str, loader: Callable[[], Any]) -> Any:
+        """Return the cached model for (name, device), loading it with loader() on a miss"""
+        key = (name, device)
+        model = self._lookup(key)
+        if model is not None:
+            return model
+
+        # Load under the model's own lock: concurrent extractors don't load the same model
+        # twice, and hits on other models don't wait for a load that takes seconds
+        with self._load_lock(key):
+            model = self._lookup(key)
+            if model is not None:
+                return model
+            with self._lock:
+                self.misses += 1
+            rss_before = _current_rss()
+            start = time.time()
+            model = loader()
+            size = _parameter_bytes(model) or max(_current_rss() - rss_before, 0)
+            with self._lock:
+                self._entries[key] = CacheEntry(model=model, size_bytes=size, last_used=time.time(), uses=1)
+                logger.info(f"📦 Cached model {name} on {device} ({size / 2**20:.0f} MB, loaded in {time.time() - start:.1f}s)")
+                self._enforce_budget(keep=key)
+                self._ensure_reaper()
+            return model
+
+    def _lookup(self, key: Tuple[str, str]) -> Any:
+        """Cached model for key, counted as a hit, or None"""
+        with self._lock:
+            entry = self._entries.get(key)
+            if entry is None:
+                return None
+            self._entries.move_to_end(key)
+            entry.last_used = time.time()
+            entry.uses += 1
+            self.hits += 1
+            return entry.model
+
+    def _load_lock(self, key: Tuple[str, str]) -> threading.Lock:
+        with self._lock:
+            return self._load_locks.setdefault(key, threading.Lock())
+
+    def use_lock(self, name: str, device: str) -> threading.Lock:
+        """
+        Lock to hold while running the model for (name, device). Pipelines are not safe
+        to call from several threads at once, and concurrent stages share them
+        """
+        with self._lock:
+            return self._use_locks.setdefault((name, device), threading.Lock())
+
+    def _enforce_budget(self, keep: Tuple[str, str]):
+        """Evict least recently used models until the budget is met"""
+        if not self.max_bytes:
+            return
+        evicted = False
+        while self.total_bytes > self.max_bytes and len(self._entries) > 1:
+            key = next(k for k in self._entries if k != keep)
+            self._drop(key, "over RAM budget")
+            evicted = True
+        if evicted:
+            self._release_memory()
+
+    def _drop(self, key: Tuple[str, str], reason: str):
+        entry = self._entries.pop(key, None)
+        if entry is not None:
+            self.evictions += 1
+            logger.info(f"🗑️ Unloaded model {key[0]} on {key[1]} ({reason})")
+
+    @staticmethod
+    def _release_memory():
+        gc.collect()
+        try:
+            import torch
+            if torch.cuda.is_available():
+                torch.cuda.empty_cache()
+        except ImportError:
+            pass
+
+    def unload_idle(self, now: Optional[float] = None) -> int:
+        """Unload every model not used within idle_timeout seconds; returns the number unloaded"""
+        if not self.idle_timeout:
+            return 0
+        now = now or time.time()
+        with self._lock:
+            idle = [key for key, entry in self._entries.items() if now - entry.last_used >= self.idle_timeout]
+            for key in idle:
+                self._drop(key, "idle")
+        if idle:
+            self._release_memory()
+        return len(idle)
+
+    def _ensure_reaper(self):
+        """Start the idle-unload thread the first time a model is cached"""
+        if not self.idle_timeout or (self._reaper is not None and self._reaper.is_alive()):
+            return
+        self._stop.clear()
+        interval = max(1.0, min(self.idle_timeout / 2, 60.0))
+
+        def _run():
+            while not self._stop.wait(interval):
+                self.unload_idle()
+
+        self._reaper = threading.Thread(target=_run, name="model-cache-reaper", daemon=True)
+        self._reaper.start()
+
+    def clear(self):
+        """Unload every cached model"""
+        with self._lock:
+            for key in list(self._entries):
+                self._drop(key, "cleared")
+        self._release_memory()
+
+    def shutdown(self):
+        """Stop the idle-unload thread"""
+        self._stop.set()
+
+    def stats(self) -> Dict[str, Any]:
+        with self._lock:
+            return {
+                'models': {f"{name}@{device}": {'size_mb': entry.size_bytes / 2**20, 'uses': entry.uses}
+                           for (name, device), entry in self._entries.items()},
+                'total_mb': self.total_bytes / 2**20,
+                'budget_mb': self.max_bytes / 2**20 if self.max_bytes else None,
+                'hits': self.hits,
+                'misses': self.misses,
+                'evictions': self.evictions,
+            }
+
+
+def _env_number(name: str) -> Optional[float]:
+    value = os.environ.get(name)
+    try:
+        return float(value) if value else None
+    except ValueError:
+        return None
+
+
+_MODEL_CACHE: Optional[ModelCache] = None
+
+
+def get_model_cache() -> ModelCache:
+    """Return the process-wide model cache, creating it from the environment on first use"""
+    global _MODEL_CACHE
+    if _MODEL_CACHE is None:
+        budget_mb = _env_number('LEGAL_MODEL_CACHE_MB')
+        _MODEL_CACHE = ModelCache(
+            max_bytes=int(budget_mb * 2**20) if budget_mb else None,
+            idle_timeout=_env_number('LEGAL_MODEL_IDLE_SECONDS'),
+        )
+    return _MODEL_CACHE
+
+
+def configure_model_cache(max_mb: Optional[float] = None, idle_timeout: Optional[float] = None) -> ModelCache:
+    """Set the RAM budget (MB) and idle timeout (seconds) of the process-wide cache"""
+    cache = get_model_cache()
+    with cache._lock:
+        cache.max_bytes = int(max_mb * 2**20) if max_mb else None
+        cache.idle_timeout = idle_timeout
+        if cache._entries:
+            cache._enforce_budget(keep=next(reversed(cache._entries)))
+            cache._ensure_reaper()
+    return cache
@@ -0,0 +1,64 @@
+"""
+Party Type Classifier
+Classifies party names (government, ngo, organization, individual, ...) against a
+table of regex patterns per type.
+
+Each type's patterns are compiled once into a single alternation. Before running it,
+a literal prefilter checks that at least one word every match must contain (e.g.
+"government", "ltd", "aged") occurs in the name, so most types are ruled out with
+plain substring checks. Results are memoised on the normalised name, which pays off
+for service matters that repeat "The Secretary ... Department" thirty times.
+"""
+
+import re
+from functools import lru_cache
+from typing import Dict, List, Optional, Tuple
+
+# Regex syntax after which no literal can be relied on (alternation, optional parts, groups, classes)
+_UNSAFE_SYNTAX = re.compile(r'[|?*(\[{]')
+# An escape (\s, \d, \.) with its quantifier, which never hides a literal next to it
+_ESCAPE = re.compile(r'\\.(?:[*+?]|\{\d*,?\d*\})?')
+_WORD = re.compile(r'[a-z0-9]+')
+
+
+def normalize_party_name(text: str) -> str:
+    """Lower-case and collapse whitespace, the key classification is memoised on"""
+    return " ".join(text.lower().split())
+
+
+def required_literal(pattern: str) -> Optional[str]:
+    """Longest plain word every match of the pattern must contain, or None if it cannot be determined"""
+    pattern = _ESCAPE.sub(' ', pattern.lower())
+    if _UNSAFE_SYNTAX.search(pattern):
+        return None
+    words = _WORD.findall(pattern)
+    return max(words, key=len) if words else None
+
+
+class PartyClassifier:
+    """First-matching-type classifier over {party_type: [patterns]}"""
+
+    def __init__(self, type_patterns: Dict[str, List[str]], default: str, memo_size: int = 4096):
+        self.default = default
+        # (party_type, literals or None when the type has a pattern without one, combined regex)
+        self._types: List[Tuple[str, Optional[Tuple[str, ...]], re.Pattern]] = []
+        for party_type, patterns in type_patterns.items():
+            literals = [required_literal(pattern) for pattern in patterns]
+            combined = re.compile("|".join(f"(?:{pattern})" for pattern in patterns), re.IGNORECASE)
+            self._types.append((party_type, None if None in literals else tuple(set(literals)), combined))
+        self._classify_normalized = lru_cache(maxsize=memo_size)(self._classify)
+
+    def _classify(self, text: str) -> str:
+        for party_type, literals, combined in self._types:
+            if literals is not None and not any(literal in text for literal in literals):
+                continue
+            if combined.search(text):
+                return party_type
+        return self.default
+
+    def classify(self, party_name: str, additional_info: str = "") -> str:
+        """Party type of a name (plus optional details such as the address or description)"""
+        return self._classify_normalized(normalize_party_name(f"{party_name} {additional_info}"))
+
+    def cache_info(self):
+        return self._classify_normalized.cache_info()
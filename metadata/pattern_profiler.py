@@ -0,0 +1,231 @@
+"""
+Pattern Profiler
+Records, per state, field and pattern index, how often each regex in
+STATE_PATTERNS/GENERAL_PATTERNS is attempted, how often it matches (hit),
+how often it is the match actually used (win) and how long it takes.
+
+Usage:
+    python -m metadata.pattern_profiler <corpus_dir_or_glob> [--sort time|hits|wins|attempts]
+                                        [--top N] [--output stats.json]
+"""
+
+import os
+import sys
+import glob
+import json
+import argparse
+from datetime import datetime
+from dataclasses import dataclass, asdict
+from typing import Dict, List, Tuple, Any, Iterable, Optional
+
+
+@dataclass
+class PatternStats:
+    """Accumulated statistics for a single pattern"""
+    source: str  # state name, or 'general' for GENERAL_PATTERNS
+    field_name: str  # e.g. 'case_number' or nested keys like 'petitioner.address.pin'
+    index: int  # position of the pattern in its list (its priority)
+    pattern: str
+    attempts: int = 0
+    hits: int = 0
+    wins: int = 0
+    total_time: float = 0.0
+
+    @property
+    def avg_time(self) -> float:
+        return self.total_time / self.attempts if self.attempts else 0.0
+
+    @property
+    def hit_rate(self) -> float:
+        return self.hits / self.attempts if self.attempts else 0.0
+
+
+class PatternProfiler:
+    """Collects per-pattern statistics from MetaDataExtractor.extract_with_patterns"""
+
+    SORT_KEYS = {
+        'time': lambda s: s.total_time,
+        'hits': lambda s: s.hits,
+        'wins': lambda s: s.wins,
+        'attempts': lambda s: s.attempts,
+    }
+
+    def __init__(self):
+        self.stats: Dict[Tuple[str, str, int], PatternStats] = {}
+        self.documents = 0
+
+    def record(self, source: str, field_name: str, index: int, pattern: str,
+               elapsed: float, hit: bool, win: bool):
+        """Record one evaluation of a pattern against a document"""
+        key = (source, field_name, index)
+        entry = self.stats.get(key)
+        if entry is None:
+            entry = self.stats[key] = PatternStats(source, field_name, index, pattern)
+        entry.attempts += 1
+        entry.total_time += elapsed
+        if hit:
+            entry.hits += 1
+        if win:
+            entry.wins += 1
+
+    def ranked(self, sort_by: str = 'time') -> List[PatternStats]:
+        """Return all pattern stats ordered by the given key, highest first"""
+        key = self.SORT_KEYS.get(sort_by, self.SORT_KEYS['time'])
+        return sorted(self.stats.values(), key=key, reverse=True)
+
+    def dead_patterns(self) -> List[PatternStats]:
+        """Patterns that never matched any document - candidates for pruning"""
+        return [s for s in self.ranked('time') if s.hits == 0]
+
+    def shadowed_patterns(self) -> List[PatternStats]:
+        """Patterns that matched but were always beaten by a higher-priority pattern"""
+        return [s for s in self.ranked('hits') if s.hits > 0 and s.wins == 0]
+
+    def evaluation_order(self, source: str, field_name: str, patterns: List[str]) -> List[int]:
+        """
+        Order pattern indices so cheap, high-hit patterns are tried first.
+        Patterns are ranked by expected cost per hit (avg time / hit rate). Patterns
+        without statistics, or whose text changed since profiling, keep their
+        original relative order after the ranked ones.
+        """
+        ranked = []
+        unknown = []
+        for index, pattern in enumerate(patterns):
+            entry = self.stats.get((source, field_name, index))
+            if entry is None or entry.pattern != pattern or not entry.attempts:
+                unknown.append(index)
+                continue
+            cost = entry.avg_time / entry.hit_rate if entry.hits else float('inf')
+            ranked.append((cost, index))
+        ranked.sort()
+        return [index for _, index in ranked] + unknown
+
+    def to_dict(self) -> Dict[str, Any]:
+        return {
+            'documents': self.documents,
+            'generated_at': datetime.now().isoformat(),
+            'patterns': [asdict(s) for s in self.stats.values()],
+        }
+
+    def save(self, path: str):
+        """Persist statistics as JSON"""
+        with open(path, 'w', encoding='utf-8') as f:
+            json.dump(self.to_dict(), f, indent=2, ensure_ascii=False)
+
+    @classmethod
+    def load(cls, path: str) -> "PatternProfiler":
+        """Load statistics previously written by save()"""
+        with open(path, 'r', encoding='utf-8') as f:
+            data = json.load(f)
+        profiler = cls()
+        profiler.documents = data.get('documents', 0)
+        for item in data.get('patterns', []):
+            entry = PatternStats(**item)
+            profiler.stats[(entry.source, entry.field_name, entry.index)] = entry
+        return profiler
+
+    def merge(self, other: "PatternProfiler"):
+        """Add another profiler's statistics into this one"""
+        self.documents += other.documents
+        for key, theirs in other.stats.items():
+            ours = self.stats.get(key)
+            if ours is None:
+                self.stats[key] = PatternStats(**asdict(theirs))
+                continue
+            ours.attempts += theirs.attempts
+            ours.hits += theirs.hits
+            ours.wins += theirs.wins
+            ours.total_time += theirs.total_time
+
+    def format_report(self, sort_by: str = 'time', top: int = 50) -> str:
+        """Format a ranked, human readable report"""
+        ranked = self.ranked(sort_by)
+        total_time = sum(s.total_time for s in ranked)
+
+        output = "🔬 Pattern Profile Report\n"
+        output += "=" * 100 + "\n"
+        output += f"📄 Documents profiled: {self.documents}\n"
+        output += f"🧩 Patterns seen: {len(ranked)}\n"
+        output += f"⏱️ Total regex time: {total_time * 1000:.1f} ms\n"
+        output += f"📊 Ranked by: {sort_by}\n\n"
+
+        output += f"{'state':<14} {'field':<28} {'idx':>3} {'attempts':>8} {'hits':>6} {'wins':>6} {'total ms':>10} {'avg µs':>9}\n"
+        output += "-" * 100 + "\n"
+        for s in ranked[:top]:
+            output += (f"{s.source[:14]:<14} {s.field_name[:28]:<28} {s.index:>3} {s.attempts:>8} "
+                       f"{s.hits:>6} {s.wins:>6} {s.total_time * 1000:>10.2f} {s.avg_time * 1e6:>9.1f}\n")
+
+        dead = self.dead_patterns()
+        shadowed = self.shadowed_patterns()
+        output += f"\n💀 Dead patterns (never matched): {len(dead)}\n"
+        for s in dead[:top]:
+            output += f"   {s.source}.{s.field_name}[{s.index}] ({s.total_time * 1000:.2f} ms): {s.pattern}\n"
+        output += f"\n🌓 Shadowed patterns (matched but never won): {len(shadowed)}\n"
+        for s in shadowed[:top]:
+            output += f"   {s.source}.{s.field_name}[{s.index}] hits={s.hits}: {s.pattern}\n"
+
+        return output
+
+
+def find_corpus_files(corpus: str) -> List[str]:
+    """Resolve a corpus directory or glob into a sorted list of text files"""
+    if os.path.isdir(corpus):
+        files = glob.glob(os.path.join(corpus, "*", "raw_full_text.txt"))
+        if not files:
+            files = glob.glob(os.path.join(corpus, "*.txt"))
+    else:
+        files = glob.glob(corpus)
+    return sorted(files)
+
+
+def profile_corpus(files: Iterable[str], profiler: Optional[PatternProfiler] = None,
+                   extractor=None) -> PatternProfiler:
+    """Run state detection and the regex stage over every file, accumulating stats"""
+    from .metadata_extractor import MetaDataExtractor
+    from .state_name import detect_state_from_text
+
+    profiler = profiler or PatternProfiler()
+    if extractor is None:
+        extractor = MetaDataExtractor(use_gpu=False, debug=False, profiler=profiler)
+    else:
+        extractor.profiler = profiler
+
+    for path in files:
+        with open(path, 'r', encoding='utf-8') as f:
+            text = f.read().strip()
+        if not text:
+            continue
+        state = detect_state_from_text(text)
+        extractor.extract_with_patterns(text, state)
+        profiler.documents += 1
+
+    return profiler
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Profile regex pattern hit-rates and cost across a corpus")
+    parser.add_argument("corpus", help="Directory of output folders (uses */raw_full_text.txt) or a glob")
+    parser.add_argument("--sort", choices=list(PatternProfiler.SORT_KEYS), default="time")
+    parser.add_argument("--top", type=int, default=50)
+    parser.add_argument("--output", help="Write the statistics as JSON to this path")
+    parser.add_argument("--merge", help="Existing statistics JSON to add this run to")
+    args = parser.parse_args()
+
+    files = find_corpus_files(args.corpus)
+    if not files:
+        print(f"❌ No text files found for corpus: {args.corpus}")
+        sys.exit(1)
+
+    print(f"📁 Profiling {len(files)} documents...")
+    profiler = PatternProfiler.load(args.merge) if args.merge and os.path.exists(args.merge) else None
+    profiler = profile_corpus(files, profiler)
+
+    print(profiler.format_report(args.sort, args.top))
+
+    if args.output:
+        profiler.save(args.output)
+        print(f"💾 Statistics saved to: {args.output}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,111 @@
+"""
+Incremental Re-extraction
+Brings stored extraction results up to date after a pattern file changes, without
+re-running the whole corpus.
+
+For every document the stored results (in the extraction result cache) carry the
+pattern version each field was decided under. Documents whose state registry is
+unchanged are skipped outright; for the others only the fields whose pattern
+version changed are recomputed.
+
+Usage:
+    python -m metadata.reextract <corpus_dir_or_glob> [--cache output/.extraction_cache]
+                                 [--write-outputs] [--dry-run]
+"""
+
+import os
+import sys
+import time
+import argparse
+from typing import Any, Dict, Iterable
+
+from .pattern_profiler import find_corpus_files
+from .result_cache import ExtractionResultCache, normalized_text_hash
+
+DEFAULT_CACHE_DIR = os.path.join("output", ".extraction_cache")
+
+
+def reextract_corpus(files: Iterable[str], cache: ExtractionResultCache, extractor=None,
+                     write_outputs: bool = False, dry_run: bool = False) -> Dict[str, Any]:
+    """Re-extract only what the pattern changes affect; returns a summary"""
+    from .metadata_extractor import MetaDataExtractor
+    from .state_name import detect_state_from_text
+
+    if extractor is None:
+        extractor = MetaDataExtractor(use_gpu=False, debug=False, result_cache=cache)
+    else:
+        extractor.result_cache = cache
+
+    summary = {'documents': 0, 'up_to_date': 0, 'incremental': 0, 'full': 0,
+               'fields_recomputed': {}, 'affected_states': set()}
+
+    for path in files:
+        with open(path, 'r', encoding='utf-8') as f:
+            text = f.read().strip()
+        if not text:
+            continue
+        summary['documents'] += 1
+
+        state = detect_state_from_text(text)
+        entry = cache.load_entry(state, normalized_text_hash(text))
+        if entry is not None and entry.get('fingerprint') == extractor._registry_fingerprint(state):
+            summary['up_to_date'] += 1
+            continue
+
+        summary['affected_states'].add(state)
+        if dry_run:
+            continue
+
+        if entry is None:
+            results = extractor.extract(text)
+            summary['full'] += 1
+        else:
+            results, changed = extractor.reextract(text, entry['results'])
+            summary['incremental'] += 1
+            for field in changed:
+                summary['fields_recomputed'][field] = summary['fields_recomputed'].get(field, 0) + 1
+
+        if write_outputs:
+            _write_outputs(os.path.dirname(path), results)
+
+    summary['affected_states'] = sorted(summary['affected_states'])
+    return summary
+
+
+def _write_outputs(output_dir: str, results: Dict[str, Any]):
+    """Rewrite the report and structured JSON of a main.py output folder"""
+    from utils.output_manager import OutputManager
+    OutputManager().save_metadata_results(output_dir, os.path.basename(output_dir.rstrip(os.sep)), results)
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Re-extract only the fields affected by pattern changes")
+    parser.add_argument("corpus", help="Directory of output folders (uses */raw_full_text.txt) or a glob")
+    parser.add_argument("--cache", default=DEFAULT_CACHE_DIR, help="Extraction result cache directory")
+    parser.add_argument("--write-outputs", action="store_true",
+                        help="Rewrite extraction_report.txt and the structured JSON next to each text")
+    parser.add_argument("--dry-run", action="store_true", help="Only report which documents are affected")
+    args = parser.parse_args()
+
+    files = find_corpus_files(args.corpus)
+    if not files:
+        print(f"❌ No text files found for corpus: {args.corpus}")
+        sys.exit(1)
+
+    print(f"📁 Checking {len(files)} documents against the current pattern registry...")
+    start = time.time()
+    summary = reextract_corpus(files, ExtractionResultCache(args.cache),
+                               write_outputs=args.write_outputs, dry_run=args.dry_run)
+
+    print(f"✅ Done in {time.time() - start:.1f}s")
+    print(f"   📄 Documents: {summary['documents']}")
+    print(f"   ♻️ Up to date: {summary['up_to_date']}")
+    print(f"   🔁 Incrementally updated: {summary['incremental']}")
+    print(f"   🆕 Fully extracted (not cached yet): {summary['full']}")
+    print(f"   🗺️ Affected states: {', '.join(summary['affected_states']) or 'none'}")
+    for field, count in sorted(summary['fields_recomputed'].items()):
+        print(f"      {field}: {count} documents")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,136 @@
+"""
+Extraction Result Cache
+Persistent document-level cache of MetaDataExtractor.extract results, so re-uploading
+the same order or re-running main.py does not re-run the regex + AI cascade.
+
+Entries are keyed by the hash of the whitespace-normalised text and stored under the
+detected state. Each entry records a fingerprint of everything that could change the
+answer for that state: its STATE_PATTERNS entry, GENERAL_PATTERNS, the enabled models
+and the extraction fields. Editing one state's pattern file therefore only invalidates
+that state's entries.
+
+Layout:
+    <cache_dir>/<state>/<text hash>.json
+"""
+
+import os
+import re
+import json
+import shutil
+import hashlib
+import logging
+from typing import Any, Dict, Iterable, Optional
+
+logger = logging.getLogger(__name__)
+
+# Bump when the structure of extract() results changes
+CACHE_FORMAT_VERSION = 1
+
+_WHITESPACE = re.compile(r'\s+')
+_UNSAFE = re.compile(r'[^A-Za-z0-9_-]+')
+
+
+def normalized_text_hash(text: str) -> str:
+    """SHA-256 of the text with whitespace runs collapsed (OCR reruns differ mostly in spacing)"""
+    normalized = _WHITESPACE.sub(' ', text).strip()
+    return hashlib.sha256(normalized.encode('utf-8')).hexdigest()
+
+
+def _digest(value: Any) -> str:
+    payload = json.dumps(value, sort_keys=True, ensure_ascii=False, default=str)
+    return hashlib.sha256(payload.encode('utf-8')).hexdigest()
+
+
+def pattern_version(value: Any) -> str:
+    """Short version hash of one registry entry (used for per-field provenance)"""
+    return _digest(value)[:16]
+
+
+def registry_fingerprint(state_patterns: Dict[str, Any], general_patterns: Dict[str, Any],
+                         models: Iterable[str], fields: Iterable[str]) -> str:
+    """Version fingerprint of one state's pattern registry plus the enabled models"""
+    return _digest({
+        'format': CACHE_FORMAT_VERSION,
+        'state': state_patterns,
+        'general': general_patterns,
+        'models': sorted(models),
+        'fields': list(fields),
+    })
+
+
+class ExtractionResultCache:
+    """Directory of JSON extraction results, one file per (state, document)"""
+
+    def __init__(self, cache_dir: str):
+        self.cache_dir = cache_dir
+        self.hits = 0
+        self.misses = 0
+        self.stale = 0
+
+    def _state_dir(self, state: str) -> str:
+        return os.path.join(self.cache_dir, _UNSAFE.sub('_', state or 'unknown'))
+
+    def _path(self, state: str, text_hash: str) -> str:
+        return os.path.join(self._state_dir(state), f"{text_hash}.json")
+
+    def load_entry(self, state: str, text_hash: str) -> Optional[Dict[str, Any]]:
+        """Raw stored entry ({'fingerprint', 'results'}) regardless of its fingerprint"""
+        try:
+            with open(self._path(state, text_hash), 'r', encoding='utf-8') as f:
+                return json.load(f)
+        except (OSError, ValueError):
+            return None
+
+    def get(self, state: str, text_hash: str, fingerprint: str) -> Optional[Dict[str, Any]]:
+        """Stored results, or None if missing or produced by a different registry/model set"""
+        path = self._path(state, text_hash)
+        try:
+            with open(path, 'r', encoding='utf-8') as f:
+                entry = json.load(f)
+        except (OSError, ValueError):
+            self.misses += 1
+            return None
+        if entry.get('fingerprint') != fingerprint:
+            self.stale += 1
+            self.misses += 1
+            return None
+        self.hits += 1
+        return entry.get('results')
+
+    def put(self, state: str, text_hash: str, fingerprint: str, results: Dict[str, Any]):
+        """Store results atomically (write to a temp file, then rename)"""
+        path = self._path(state, text_hash)
+        try:
+            os.makedirs(os.path.dirname(path), exist_ok=True)
+            temp_path = f"{path}.{os.getpid()}.tmp"
+            with open(temp_path, 'w', encoding='utf-8') as f:
+                json.dump({'fingerprint': fingerprint, 'results': results}, f, ensure_ascii=False, default=str)
+            os.replace(temp_path, path)
+        except OSError as e:
+            logger.warning(f"Could not write extraction cache entry {path}: {e}")
+
+    def purge_stale(self, state: str, fingerprint: str) -> int:
+        """Delete a state's entries written under an older fingerprint; returns the number removed"""
+        state_dir = self._state_dir(state)
+        removed = 0
+        if not os.path.isdir(state_dir):
+            return removed
+        for name in os.listdir(state_dir):
+            path = os.path.join(state_dir, name)
+            try:
+                with open(path, 'r', encoding='utf-8') as f:
+                    if json.load(f).get('fingerprint') == fingerprint:
+                        continue
+                os.remove(path)
+                removed += 1
+            except (OSError, ValueError):
+                continue
+        return removed
+
+    def clear(self, state: Optional[str] = None):
+        """Remove every entry, or only one state's entries"""
+        target = self._state_dir(state) if state else self.cache_dir
+        shutil.rmtree(target, ignore_errors=True)
+
+    def stats(self) -> Dict[str, int]:
+        return {'hits': self.hits, 'misses': self.misses, 'stale': self.stale}
@@ -0,0 +1,241 @@
+"""
+Columnar Extraction Result Table
+Compact storage for batch extraction over thousands of documents.
+
+Instead of one nested dict per document (with its own copies of method names,
+state names, source snippets and the whole raw text), the table keeps per-field
+columns:
+
+    value id      interned value (-1 when the field was not extracted)
+    confidence    float
+    method code   interned method name
+    span          start/end offsets of the evidence in the document, when known
+    snippet id    interned source snippet, only for results without a span
+    pattern ver.  interned pattern version the field was decided under (provenance)
+
+Strings are interned once in a shared pool and documents are referenced through a
+document store (file path, or the text itself for in-memory inputs). Per-document
+metadata (models version, AI model list, timestamp, stage schedule) is interned too.
+Rows convert back to the usual extract() dictionary on demand with to_dict(),
+provenance included, so they can be passed to reextract().
+"""
+
+import json
+from array import array
+from typing import Any, Dict, Hashable, Iterator, List, Optional
+
+SNIPPET_LENGTH = 100
+
+
+class StringPool:
+    """Interns values (strings, or JSON-able dicts/lists) and hands out integer ids"""
+
+    def __init__(self):
+        self._ids: Dict[Hashable, int] = {}
+        self._values: List[Any] = []
+
+    def intern(self, value: Any) -> int:
+        key = value if isinstance(value, (str, int, float)) or value is None \
+            else ('json', json.dumps(value, sort_keys=True, ensure_ascii=False, default=str))
+        index = self._ids.get(key)
+        if index is None:
+            index = self._ids[key] = len(self._values)
+            self._values.append(value)
+        return index
+
+    def __getitem__(self, index: int) -> Any:
+        return self._values[index]
+
+    def __len__(self) -> int:
+        return len(self._values)
+
+
+class DocumentStore:
+    """Where each row's text lives: a file path (read on demand) or the text itself"""
+
+    def __init__(self):
+        self._sources: List[str] = []
+        self._is_path = array('b')
+
+    def add(self, text: Optional[str] = None, path: Optional[str] = None) -> int:
+        self._sources.append(path if path else (text or ""))
+        self._is_path.append(1 if path else 0)
+        return len(self._sources) - 1
+
+    def text(self, index: int) -> str:
+        source = self._sources[index]
+        if not self._is_path[index]:
+            return source
+        from .metadata_extractor import MetaDataExtractor
+        return MetaDataExtractor.load_document_text(source).strip()
+
+
+class _FieldColumn:
+    """Parallel arrays for one field across all rows"""
+    __slots__ = ('value_ids', 'confidences', 'method_ids', 'span_starts', 'span_ends', 'snippet_ids',
+                 'pattern_version_ids')
+
+    def __init__(self):
+        self.value_ids = array('l')
+        self.confidences = array('d')
+        self.method_ids = array('l')
+        self.span_starts = array('l')
+        self.span_ends = array('l')
+        self.snippet_ids = array('l')
+        self.pattern_version_ids = array('l')
+
+    def append_missing(self):
+        for column in (self.value_ids, self.method_ids, self.span_starts, self.span_ends, self.snippet_ids,
+                       self.pattern_version_ids):
+            column.append(-1)
+        self.confidences.append(0.0)
+
+
+class ExtractionResultTable:
+    """Columnar store of extract() results for a batch of documents"""
+
+    def __init__(self, fields: Optional[List[str]] = None):
+        # The extractor's field list drives the summary counts; extra keys (petitioner_details) become columns too
+        self.extraction_fields: List[str] = list(fields or [])
+        self.fields: List[str] = list(self.extraction_fields)
+        self.pool = StringPool()
+        self.documents = DocumentStore()
+        self.doc_ids: List[str] = []
+        self.state_ids = array('l')
+        self.text_lengths = array('l')
+        self.average_confidences = array('d')
+        # -1 where the results did not have the entry
+        self.models_version_ids = array('l')
+        self.ai_models_ids = array('l')
+        self.timestamp_ids = array('l')
+        self.schedule_ids = array('l')
+        self._columns: Dict[str, _FieldColumn] = {field: _FieldColumn() for field in self.fields}
+
+    def __len__(self) -> int:
+        return len(self.doc_ids)
+
+    def _column(self, field: str) -> _FieldColumn:
+        column = self._columns.get(field)
+        if column is None:
+            # A field first seen now: backfill earlier rows as missing
+            column = self._columns[field] = _FieldColumn()
+            self.fields.append(field)
+            for _ in range(len(self.doc_ids)):
+                column.append_missing()
+        return column
+
+    def append(self, doc_id: str, results: Dict[str, Any], text: Optional[str] = None,
+               path: Optional[str] = None) -> int:
+        """Add one document's extract() results; returns its row index"""
+        row = len(self.doc_ids)
+        extracted = results.get('extracted_data', {})
+        provenance = results.get('provenance')
+        versions = {field: info.get('pattern_version') for field, info in (provenance or {}).get('fields', {}).items()}
+        # New columns are backfilled for the earlier rows only, so create them before this row is added
+        for field in list(extracted) + list(versions):
+            self._column(field)
+
+        self.doc_ids.append(doc_id)
+        self.documents.add(text=text if path is None else None, path=path)
+        self.state_ids.append(self.pool.intern(results.get('detected_state', '')))
+        self.text_lengths.append(results.get('metadata', {}).get('text_length', len(text or "")))
+        self.average_confidences.append(results.get('extraction_summary', {}).get('average_confidence', 0.0))
+        metadata = results.get('metadata', {})
+        self.models_version_ids.append(self.pool.intern(provenance['models_version']) if provenance else -1)
+        for ids, key in ((self.ai_models_ids, 'available_ai_models'), (self.timestamp_ids, 'processing_timestamp'),
+                         (self.schedule_ids, 'stage_schedule')):
+            ids.append(self.pool.intern(metadata[key]) if key in metadata else -1)
+        for field, column in self._columns.items():
+            data = extracted.get(field)
+            if data is None:
+                column.append_missing()
+                continue
+            column.value_ids.append(self.pool.intern(data.get('value')))
+            column.confidences.append(float(data.get('confidence', 0.0)))
+            column.method_ids.append(self.pool.intern(data.get('method', '')))
+            span = data.get('source_span')
+            if span:
+                column.span_starts.append(span[0])
+                column.span_ends.append(span[1])
+                column.snippet_ids.append(-1)
+            else:
+                column.span_starts.append(-1)
+                column.span_ends.append(-1)
+                column.snippet_ids.append(self.pool.intern(data.get('source_text', '')))
+            column.pattern_version_ids.append(-1)
+        for field, version in versions.items():
+            if version is not None:
+                self._columns[field].pattern_version_ids[row] = self.pool.intern(version)
+        return row
+
+    def value(self, row: int, field: str) -> Any:
+        """Extracted value of one field (None when missing)"""
+        column = self._columns.get(field)
+        if column is None or column.value_ids[row] < 0:
+            return None
+        return self.pool[column.value_ids[row]]
+
+    def column_values(self, field: str) -> List[Any]:
+        """Values of one field for every row"""
+        return [self.value(row, field) for row in range(len(self))]
+
+    def to_dict(self, row: int, include_text: bool = False) -> Dict[str, Any]:
+        """Rebuild the extract() dictionary for one row"""
+        text = None
+        extracted_data = {}
+        for field, column in self._columns.items():
+            if column.value_ids[row] < 0:
+                continue
+            start, end = column.span_starts[row], column.span_ends[row]
+            if start >= 0:
+                if text is None:
+                    text = self.documents.text(row)
+                snippet = text[start:end]
+                source_text = snippet[:SNIPPET_LENGTH] + "..." if len(snippet) > SNIPPET_LENGTH else snippet
+            else:
+                source_text = self.pool[column.snippet_ids[row]]
+            extracted_data[field] = {
+                'value': self.pool[column.value_ids[row]],
+                'confidence': column.confidences[row],
+                'method': self.pool[column.method_ids[row]],
+                'source_text': source_text,
+            }
+            if start >= 0:
+                extracted_data[field]['source_span'] = [start, end]
+
+        metadata = {'text_length': self.text_lengths[row]}
+        for ids, key in ((self.ai_models_ids, 'available_ai_models'), (self.timestamp_ids, 'processing_timestamp'),
+                         (self.schedule_ids, 'stage_schedule')):
+            if ids[row] >= 0:
+                metadata[key] = self.pool[ids[row]]
+
+        results = {
+            'detected_state': self.pool[self.state_ids[row]],
+            'extraction_summary': {
+                'total_fields': len(self.extraction_fields),
+                'extracted_fields': len(extracted_data),
+                'missing_fields': len([field for field in self.extraction_fields if field not in extracted_data]),
+                'extraction_methods': sorted({data['method'] for data in extracted_data.values()}),
+                'average_confidence': self.average_confidences[row],
+            },
+            'extracted_data': extracted_data,
+            'metadata': metadata,
+        }
+        if self.models_version_ids[row] >= 0:
+            results['provenance'] = {
+                'models_version': self.pool[self.models_version_ids[row]],
+                'fields': {
+                    field: {
+                        'pattern_version': self.pool[column.pattern_version_ids[row]],
+                        'method': extracted_data[field]['method'] if field in extracted_data else None
+                    }
+                    for field, column in self._columns.items() if column.pattern_version_ids[row] >= 0
+                }
+            }
+        if include_text:
+            results['raw_text'] = text if text is not None else self.documents.text(row)
+        return results
+
+    def __iter__(self) -> Iterator[Dict[str, Any]]:
+        for row in range(len(self)):
+            yield self.to_dict(row)
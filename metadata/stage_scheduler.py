@@ -0,0 +1,293 @@
+"""
+Stage Scheduler
+Decides which fallback stages (gazetteer, SpaCy, QA, legal QA, NER, dateparser) run
+for a document after the regex stage.
+
+Each stage declares which fields it can produce (STAGE_CAPABILITIES) and carries a
+measured cost (seconds per document, exponentially averaged over the run). For every
+missing field only the cheapest available stage able to produce it is run; when that
+stage comes back empty the next cheapest capable stage gets the field. Scheduling stops
+once every field is filled, no stage can help any more, or the per-document time
+budget is used up. Stages that did not run are reported with the reason.
+
+run_concurrent() is the latency-oriented alternative: every stage that can fill a
+missing field is dispatched at once on a thread pool (SpaCy, dateparser and the
+transformer pipelines spend most of their time in native code that releases the GIL)
+and the results are merged by cascade precedence, so a document waits for the slowest
+stage instead of the sum of all of them. Python threads cannot be interrupted: a stage
+still running when the budget ends keeps its worker until it returns. Stages that have
+not started yet are cancelled, and a stage is not dispatched again while an earlier
+document's run of it is still in flight, so one slow stage cannot pile up work and
+push every later document over its budget.
+"""
+
+import os
+import json
+import time
+import logging
+import threading
+from concurrent.futures import Future, ThreadPoolExecutor, wait
+from dataclasses import dataclass, field, asdict
+from typing import Any, Callable, Dict, Iterable, List, Optional, Set, Tuple
+
+logger = logging.getLogger(__name__)
+
+# Which fields each stage is able to produce
+STAGE_CAPABILITIES: Dict[str, Set[str]] = {
+    'gazetteer': {'police_station', 'statutes_offences', 'judge_name'},
+    'spacy': {'judge_name', 'petitioner_name', 'order_date', 'court_name'},
+    'qa': {'case_number', 'order_date', 'judge_name', 'court_name', 'petitioner_name',
+           'respondent_name', 'advocates', 'crime_details', 'judgment', 'decision'},
+    'legal': {'advocates', 'crime_details', 'judgment', 'statutes_offences', 'directions'},
+    'ner': {'judge_name', 'petitioner_name', 'court_name'},
+    'date': {'order_date'},
+}
+
+# Original cascade order; breaks cost ties and decides precedence when stages run concurrently
+STAGE_ORDER = ['gazetteer', 'spacy', 'qa', 'legal', 'ner', 'date']
+
+# Starting cost estimates (seconds per document on CPU) until real timings are measured
+DEFAULT_STAGE_COSTS = {
+    'gazetteer': 0.01,
+    'date': 0.05,
+    'spacy': 0.5,
+    'ner': 2.0,
+    'qa': 6.0,
+    'legal': 6.0,
+}
+
+
+class StageCosts:
+    """Exponentially averaged per-stage cost in seconds per document"""
+
+    def __init__(self, initial: Optional[Dict[str, float]] = None, smoothing: float = 0.3):
+        self.costs = dict(DEFAULT_STAGE_COSTS)
+        self.costs.update(initial or {})
+        self.samples: Dict[str, int] = {}
+        self.smoothing = smoothing
+
+    def estimate(self, stage: str) -> float:
+        return self.costs.get(stage, max(self.costs.values()))
+
+    def observe(self, stage: str, seconds: float):
+        """Fold one measured run into the stage's cost"""
+        count = self.samples.get(stage, 0)
+        if count == 0:
+            # The first real measurement replaces the default guess
+            self.costs[stage] = seconds
+        else:
+            self.costs[stage] += self.smoothing * (seconds - self.costs[stage])
+        self.samples[stage] = count + 1
+
+    def to_dict(self) -> Dict[str, Any]:
+        return {'costs': dict(self.costs), 'samples': dict(self.samples)}
+
+    def save(self, path: str):
+        """Persist measured costs as JSON"""
+        with open(path, 'w', encoding='utf-8') as f:
+            json.dump(self.to_dict(), f, indent=2)
+
+    @classmethod
+    def load(cls, path: str) -> "StageCosts":
+        """Load costs previously written by save()"""
+        with open(path, 'r', encoding='utf-8') as f:
+            data = json.load(f)
+        costs = cls(data.get('costs'))
+        costs.samples = data.get('samples', {})
+        return costs
+
+
+@dataclass
+class StageRun:
+    """One stage executed for a document"""
+    stage: str
+    fields: List[str]
+    filled: List[str]
+    seconds: float
+
+
+@dataclass
+class ScheduleReport:
+    """What the scheduler ran, skipped and why"""
+    ran: List[StageRun] = field(default_factory=list)
+    skipped: Dict[str, str] = field(default_factory=dict)  # stage -> reason
+    unfillable: List[str] = field(default_factory=list)  # missing fields no available stage produces
+    elapsed_seconds: float = 0.0
+    budget_seconds: Optional[float] = None
+    budget_exhausted: bool = False
+
+    def to_dict(self) -> Dict[str, Any]:
+        return asdict(self)
+
+
+class StageScheduler:
+    """Runs the cheapest capable fallback stage per missing field within a time budget"""
+
+    def __init__(self, capabilities: Optional[Dict[str, Set[str]]] = None,
+                 costs: Optional[StageCosts] = None, time_budget: Optional[float] = None):
+        self.capabilities = capabilities or STAGE_CAPABILITIES
+        self.costs = costs or StageCosts()
+        self.time_budget = time_budget
+        self.max_workers = len(self.capabilities)
+        self._executor: Optional[ThreadPoolExecutor] = None
+        self._executor_lock = threading.Lock()
+        self._executor_pid = None
+        self._in_flight: Dict[str, Future] = {}  # stage -> its latest dispatched run
+
+    def _rank(self, stage: str) -> Tuple[float, int]:
+        order = STAGE_ORDER.index(stage) if stage in STAGE_ORDER else len(STAGE_ORDER)
+        return self.costs.estimate(stage), order
+
+    def cheapest_stage(self, field_name: str, stages: Iterable[str]) -> Optional[str]:
+        """Cheapest of the given stages that can produce the field"""
+        capable = [stage for stage in stages if field_name in self.capabilities.get(stage, ())]
+        return min(capable, key=self._rank) if capable else None
+
+    def plan(self, missing_fields: List[str], stages: Iterable[str]) -> Dict[str, List[str]]:
+        """Assign every missing field to its cheapest capable stage"""
+        assignment: Dict[str, List[str]] = {}
+        stages = list(stages)
+        for field_name in missing_fields:
+            stage = self.cheapest_stage(field_name, stages)
+            if stage is not None:
+                assignment.setdefault(stage, []).append(field_name)
+        return assignment
+
+    def run(self, missing_fields: List[str], runners: Dict[str, Callable[[List[str]], Dict[str, Any]]],
+            time_budget: Optional[float] = None) -> Tuple[Dict[str, Any], ScheduleReport]:
+        """
+        Run stages until the fields are filled or the budget runs out.
+        runners maps each available stage to a callable taking the fields assigned to
+        it and returning {field: result}. Returns the merged results and a report.
+        """
+        budget = time_budget if time_budget is not None else self.time_budget
+        report = ScheduleReport(budget_seconds=budget)
+        results: Dict[str, Any] = {}
+        missing = list(missing_fields)
+        remaining_stages = [stage for stage in runners if stage in self.capabilities]
+        for stage in self.capabilities:
+            if stage not in runners:
+                report.skipped[stage] = "unavailable"
+        report.unfillable = [f for f in missing if self.cheapest_stage(f, remaining_stages) is None]
+        start = time.perf_counter()
+
+        while missing and remaining_stages:
+            assignment = self.plan(missing, remaining_stages)
+            if not assignment:
+                break
+            stage = min(assignment, key=self._rank)
+            fields = assignment[stage]
+            remaining_stages.remove(stage)
+
+            elapsed = time.perf_counter() - start
+            if budget is not None and elapsed + self.costs.estimate(stage) > budget:
+                report.skipped[stage] = "time_budget"
+                report.budget_exhausted = True
+                continue
+
+            logger.info(f"🧭 Stage {stage} (~{self.costs.estimate(stage):.2f}s) for {fields}")
+            stage_start = time.perf_counter()
+            try:
+                stage_results = runners[stage](fields) or {}
+            except Exception as e:
+                logger.warning(f"Stage {stage} failed: {e}")
+                stage_results = {}
+            seconds = time.perf_counter() - stage_start
+            self.costs.observe(stage, seconds)
+
+            filled = [f for f in fields if f in stage_results and f not in results]
+            for f in filled:
+                results[f] = stage_results[f]
+            report.ran.append(StageRun(stage, fields, filled, seconds))
+            missing = [f for f in missing if f not in results]
+
+        for stage in remaining_stages:
+            report.skipped.setdefault(stage, "fields_filled" if not missing else "no_missing_capability")
+        report.elapsed_seconds = time.perf_counter() - start
+        return results, report
+
+    def _get_executor(self) -> ThreadPoolExecutor:
+        with self._executor_lock:
+            # A pool inherited through fork (extract_many workers) has no live threads
+            if self._executor is None or self._executor_pid != os.getpid():
+                self._executor_pid = os.getpid()
+                self._executor = ThreadPoolExecutor(max_workers=self.max_workers, thread_name_prefix="ai-stage")
+                self._in_flight = {}
+            return self._executor
+
+    def run_concurrent(self, missing_fields: List[str], runners: Dict[str, Callable[[List[str]], Dict[str, Any]]],
+                       time_budget: Optional[float] = None) -> Tuple[Dict[str, Any], ScheduleReport]:
+        """
+        Dispatch every stage able to fill a missing field on the thread pool at once.
+        Results are merged in STAGE_ORDER precedence (gazetteer > spacy > qa > legal > ner > date).
+        Stages still running when the time budget ends are reported and their results
+        are dropped; queued ones are cancelled. A stage whose run for an earlier document
+        has not finished yet is skipped as "still_running".
+        """
+        budget = time_budget if time_budget is not None else self.time_budget
+        report = ScheduleReport(budget_seconds=budget)
+        for stage in self.capabilities:
+            if stage not in runners:
+                report.skipped[stage] = "unavailable"
+
+        assignment = {}
+        for stage in runners:
+            fields = [f for f in missing_fields if f in self.capabilities.get(stage, ())]
+            if fields:
+                assignment[stage] = fields
+            elif stage in self.capabilities:
+                report.skipped[stage] = "no_missing_capability"
+        report.unfillable = [f for f in missing_fields if not any(f in fields for fields in assignment.values())]
+
+        start = time.perf_counter()
+        executor = self._get_executor()
+        futures = {}
+        with self._executor_lock:
+            for stage in list(assignment):
+                previous = self._in_flight.get(stage)
+                if previous is not None and not previous.done():
+                    report.skipped[stage] = "still_running"
+                    del assignment[stage]
+                    continue
+                futures[stage] = self._in_flight[stage] = executor.submit(self._timed, runners[stage],
+                                                                           assignment[stage])
+        wait(list(futures.values()), timeout=budget)
+
+        stage_outputs = {}
+        for stage, future in futures.items():
+            if not future.done():
+                future.cancel()
+                report.skipped[stage] = "time_budget"
+                report.budget_exhausted = True
+                continue
+            try:
+                stage_outputs[stage], seconds = future.result()
+            except Exception as e:
+                logger.warning(f"Stage {stage} failed: {e}")
+                stage_outputs[stage], seconds = {}, time.perf_counter() - start
+            self.costs.observe(stage, seconds)
+            report.ran.append(StageRun(stage, assignment[stage], [], seconds))
+
+        # Merge by cascade precedence regardless of completion order
+        results: Dict[str, Any] = {}
+        runs = {stage_run.stage: stage_run for stage_run in report.ran}
+        for stage in sorted(stage_outputs, key=lambda s: STAGE_ORDER.index(s) if s in STAGE_ORDER else len(STAGE_ORDER)):
+            for f in assignment[stage]:
+                if f in stage_outputs[stage] and f not in results:
+                    results[f] = stage_outputs[stage][f]
+                    runs[stage].filled.append(f)
+
+        report.elapsed_seconds = time.perf_counter() - start
+        return results, report
+
+    @staticmethod
+    def _timed(runner: Callable[[List[str]], Dict[str, Any]], fields: List[str]) -> Tuple[Dict[str, Any], float]:
+        stage_start = time.perf_counter()
+        return runner(fields) or {}, time.perf_counter() - stage_start
+
+    def shutdown(self):
+        """Stop the stage thread pool"""
+        with self._executor_lock:
+            if self._executor is not None:
+                self._executor.shutdown(wait=False)
+                self._executor = None
@@ -1,6 +1,9 @@
 import re
+from dataclasses import dataclass
 from typing import Tuple, Optional
 
+from .aho_corasick import AhoCorasick
+
 # 28 States
 INDIAN_STATES = [
     "Andhra Pradesh","Arunachal Pradesh","Assam","Bihar","Chhattisgarh","Goa","Gujarat",
@@ -35,6 +38,39 @@ ALIASES = {
 }
 
 ALL_REGIONS = INDIAN_STATES + INDIAN_UNION_TERRITORIES
+
+# High Courts whose name does not contain the region they sit for → canonical region
+HIGH_COURT_SEATS = {
+    "bombay": "Maharashtra",
+    "madras": "Tamil Nadu",
+    "calcutta": "West Bengal",
+    "gauhati": "Assam",
+    "allahabad": "Uttar Pradesh",
+    "patna": "Bihar",
+    "hyderabad": "Telangana",
+    "punjab and haryana": "Punjab",
+    "jammu and kashmir and ladakh": "Jammu and Kashmir",
+}
+
+# Courts and tribunals that are not tied to one region → (canonical name, kind)
+NATIONAL_FORUMS = {
+    "supreme court of india": ("Supreme Court of India", "supreme_court"),
+    "income tax appellate tribunal": ("Income Tax Appellate Tribunal", "tribunal"),
+    "national company law tribunal": ("National Company Law Tribunal", "tribunal"),
+    "national company law appellate tribunal": ("National Company Law Appellate Tribunal", "tribunal"),
+    "national green tribunal": ("National Green Tribunal", "tribunal"),
+    "central administrative tribunal": ("Central Administrative Tribunal", "tribunal"),
+    "armed forces tribunal": ("Armed Forces Tribunal", "tribunal"),
+    "debts recovery tribunal": ("Debts Recovery Tribunal", "tribunal"),
+    "customs, excise and service tax appellate tribunal": ("Customs, Excise and Service Tax Appellate Tribunal", "tribunal"),
+}
+
+# Match priorities: a court or tribunal name beats a bare region mention anywhere
+COURT_PRIORITY = 2
+REGION_PRIORITY = 1
+
+# Only the first pages are scanned when they already name the jurisdiction
+DEFAULT_HEAD_CHARS = 6000
 REGEX = re.compile(
     r'\b(' + '|'.join(map(re.escape, ALL_REGIONS + list(ALIASES.keys()))) + r')\b',
     re.IGNORECASE
@@ -62,42 +98,99 @@ def match_union_territory(text: str) -> str:
     name, kind = match_region(text)
     return name if kind == "union_territory" else ""
 
+def _region_type(canonical: str) -> Optional[str]:
+    if canonical in INDIAN_STATES:
+        return "state"
+    if canonical in INDIAN_UNION_TERRITORIES:
+        return "union_territory"
+    return None
+
+
+@dataclass
+class JurisdictionMatch:
+    """Detected jurisdiction and the text span it was read from"""
+    name: str  # canonical region, or the forum name for national courts/tribunals
+    kind: str  # 'state', 'union_territory', 'high_court', 'supreme_court' or 'tribunal'
+    region: str  # canonical state/UT ("" for national forums)
+    region_type: Optional[str]
+    priority: int
+    start: int
+    end: int
+    evidence: str
+
+
+_JURISDICTION_AUTOMATON: Optional[AhoCorasick] = None
+
+
+def get_jurisdiction_automaton() -> AhoCorasick:
+    """Automaton over every court name, alias, tribunal and region, built once per process"""
+    global _JURISDICTION_AUTOMATON
+    if _JURISDICTION_AUTOMATON is None:
+        automaton = AhoCorasick()
+        region_names = {name.lower(): name for name in ALL_REGIONS}
+        region_names.update(ALIASES)
+        seats = dict(region_names)
+        seats.update(HIGH_COURT_SEATS)
+        
+        for alias, canonical in region_names.items():
+            automaton.add(alias, (canonical, _region_type(canonical), REGION_PRIORITY))
+        for seat, canonical in seats.items():
+            court = (canonical, "high_court", COURT_PRIORITY)
+            for template in ("high court of {}", "high court of judicature at {}", "high court at {}", "{} high court"):
+                automaton.add(template.format(seat), court)
+        for forum, (name, kind) in NATIONAL_FORUMS.items():
+            automaton.add(forum, (name, kind, COURT_PRIORITY))
+        
+        automaton.build()
+        _JURISDICTION_AUTOMATON = automaton
+    return _JURISDICTION_AUTOMATON
+
+
+def detect_jurisdiction(text: str, head_chars: int = DEFAULT_HEAD_CHARS,
+                        require_region: bool = False) -> Optional[JurisdictionMatch]:
+    """
+    Single pass over the text with the jurisdiction automaton.
+    The highest-priority match wins, earliest first. Scanning stops at the first court
+    name, or at head_chars once a region has been found, so usually only the header
+    is read.
+    With require_region, only a state/UT is returned: if the deciding forum is a national
+    court or tribunal, the result is None rather than a region from a cited case
+    ("State of Punjab v. ..." in a Supreme Court judgment).
+    """
+    if not text:
+        return None
+    best = None
+    for match in get_jurisdiction_automaton().iter_matches(text):
+        if best is not None and match.start >= head_chars:
+            break
+        name, kind, priority = match.payload
+        region = name if kind != "supreme_court" and kind != "tribunal" else ""
+        if require_region and not region:
+            if priority == COURT_PRIORITY and (best is None or best.priority < COURT_PRIORITY):
+                # The first court named is a national forum: any region is from a citation
+                return None
+            continue
+        if best is None or priority > best.priority:
+            best = JurisdictionMatch(
+                name=name, kind=kind, region=region,
+                region_type=_region_type(region) if region else None,
+                priority=priority, start=match.start, end=match.end, evidence=match.phrase,
+            )
+            # Nothing later can outrank the first court name (normally the cause-title header)
+            if priority == COURT_PRIORITY:
+                break
+    return best
+
+
 def detect_state_from_text(text: str) -> str:
     """
     Comprehensive state detection from court document text
     Returns the detected state/UT name or "not in document"
     """
-    import re
+    match = detect_jurisdiction(text, require_region=True)
+    if match is None:
+        print("No region found in document")
+        return "not in document"
     
-    # Try to find court name first
-    court_match = re.search(r'(?:IN THE )?HIGH COURT OF (?:JUDICATURE AT )?([A-Z\s&]+?)(?:\s+AT|\n|$)', text, re.IGNORECASE)
-
-    if court_match:
-        court_str = court_match.group(1).strip()
-        print(f"Found court string: '{court_str}'")
-        
-        # Use match_region for efficient single-call matching
-        region_name, region_type = match_region(court_str)
-        if region_name:
-            state = region_name
-            print(f"Matched {region_type}: '{state}'")
-            return state
-        else:
-            # fallback: try whole text
-            region_name, region_type = match_region(text)
-            state = region_name if region_name else ""
-            if state:
-                print(f"Matched {region_type} from full text: '{state}'")
-                return state
-            else:
-                print("No region found in full text")
-                return "not in document"
-    else:
-        print("No court match found")
-        region_name, region_type = match_region(text)
-        state = region_name if region_name else "not in document"
-        if region_name:
-            print(f"Matched {region_type} from full text: '{state}'")
-        else:
-            print("No region found in full text")
-        return state
\ No newline at end of file
+    print(f"Matched {match.region_type} from '{match.evidence}' at {match.start}: '{match.region}'")
+    return match.region
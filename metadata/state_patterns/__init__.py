@@ -10,7 +10,8 @@ from .gujarat import GUJARAT_PATTERNS
 from .maharashtra import MAHARASHTRA_PATTERNS
 from .tamil_nadu import TAMIL_NADU_PATTERNS
 from .karnataka import KARNATAKA_PATTERNS
-from .general import GENERAL_PATTERNS, PARTY_TYPE_PATTERNS, COMMON_PATTERNS
+from .general import GENERAL_PATTERNS, PARTY_TYPE_PATTERNS, INSTITUTION_TYPE_PATTERNS, COMMON_PATTERNS
+from ..party_classifier import PartyClassifier
 
 # Create the main STATE_PATTERNS dictionary here
 STATE_PATTERNS = {
@@ -22,16 +23,16 @@ STATE_PATTERNS = {
     "Karnataka": KARNATAKA_PATTERNS,
 }
 
+PARTY_CLASSIFIER = PartyClassifier(PARTY_TYPE_PATTERNS, default="individual")
+INSTITUTION_CLASSIFIER = PartyClassifier(INSTITUTION_TYPE_PATTERNS, default="institution")
+
 def classify_party_type(party_name: str, additional_info: str = "") -> str:
     """Classify party type based on name and additional information"""
-    combined_text = f"{party_name} {additional_info}".lower()
-    
-    for party_type, patterns in PARTY_TYPE_PATTERNS.items():
-        for pattern in patterns:
-            if re.search(pattern, combined_text, re.IGNORECASE):
-                return party_type
-    
-    return "individual"  # default
+    return PARTY_CLASSIFIER.classify(party_name, additional_info)
+
+def classify_institution_type(party_name: str) -> str:
+    """Classify an institutional party (trust, educational_institution, company, institution)"""
+    return INSTITUTION_CLASSIFIER.classify(party_name)
 
 def get_state_patterns(state: str) -> Dict[str, Any]:
     """Get patterns for a specific state"""
@@ -70,8 +71,10 @@ __all__ = [
     'KARNATAKA_PATTERNS',
     'GENERAL_PATTERNS',
     'PARTY_TYPE_PATTERNS',
+    'INSTITUTION_TYPE_PATTERNS',
     'COMMON_PATTERNS',
     'classify_party_type',
+    'classify_institution_type',
     'get_state_patterns',
     'get_available_states',
     'extract_field_with_patterns',
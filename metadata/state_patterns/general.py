@@ -158,6 +158,23 @@ PARTY_TYPE_PATTERNS = {
     ]
 }
 
+# Kind of institution for institutional petitioners (writ petitions)
+INSTITUTION_TYPE_PATTERNS = {
+    "trust": [
+        r'trust'
+    ],
+    "educational_institution": [
+        r'college',
+        r'school',
+        r'university'
+    ],
+    "company": [
+        r'company',
+        r'corporation',
+        r'ltd'
+    ]
+}
+
 # Additional utility patterns for common extractions
 COMMON_PATTERNS = {
     "email": [
@@ -16,18 +16,22 @@ from ocr.loading_ocr_models import initialize_ocr_offline
 class AdvancedLegalOCR:
     """Advanced OCR system for legal documents with text processing"""
     
-    def __init__(self, pdf_path: str, output_dir: str = "output", dpi: int = 500, max_size: tuple = (1500, 1500)):
+    def __init__(self, pdf_path: str, output_dir: str = "output", dpi: int = 500, max_size: tuple = (1500, 1500),
+                 ocr_engine=None):
         self.pdf_path = pdf_path
         self.output_dir = output_dir
         self.dpi = dpi
         self.max_size = max_size
         
-        # Initialize processors
-        print("🚀 Initializing offline OCR models...")
-        self.ocr = initialize_ocr_offline()
-        if not self.ocr:
-            print("❌ Failed to initialize offline OCR, falling back to default")
-            self.ocr = PaddleOCR(use_textline_orientation=False, lang='en')  # Auto-detects GPU
+        # Initialize processors (batch workers pass in one engine shared by all their documents)
+        if ocr_engine is not None:
+            self.ocr = ocr_engine
+        else:
+            print("🚀 Initializing offline OCR models...")
+            self.ocr = initialize_ocr_offline()
+            if not self.ocr:
+                print("❌ Failed to initialize offline OCR, falling back to default")
+                self.ocr = PaddleOCR(use_textline_orientation=False, lang='en')  # Auto-detects GPU
         self.text_processor = LegalTextProcessor()
         
         # Stats trackers
@@ -51,12 +55,36 @@ class AdvancedLegalOCR:
     def process_pdf(self):
         """Main method to process PDF with OCR and legal text processing"""
         
+        for page_text in self.read_pages():
+            # Clean the page text using legal processor
+            cleaned_page_text = self.text_processor.clean_raw_text(page_text)
+            self.raw_full_text += page_text + "\n"
+            self.full_text += cleaned_page_text + "\n"
+        
+        # Save full text
+        with open(os.path.join(self.output_dir, "full_text.txt"), "w", encoding="utf-8") as f:
+            f.write(self.full_text.strip())
+        
+        # Save raw full text
+        with open(os.path.join(self.output_dir, "raw_full_text.txt"), "w", encoding="utf-8") as f:
+            f.write(self.raw_full_text.strip())
+        
+        # Generate and return stats
+        # processing_stats = self._generate_stats()
+        
+        # Return the required values
+        return self.full_text.strip(), self.raw_full_text.strip()
+    
+    def read_pages(self) -> List[str]:
+        """Raw text of every page: the PDF text layer, or OCR for scanned pages"""
+        
         print("\n📄 Reading PDF...")
         doc = fitz.open(self.pdf_path)
         page_count = len(doc)
         print(f"✅ Found {page_count} page(s)")
         
         # Process each page
+        pages = []
         for i in range(page_count):
             page_start = time.time()
             page = doc.load_page(i)
@@ -87,28 +115,12 @@ class AdvancedLegalOCR:
                 avg_conf = sum(scores) / len(scores) if scores else 0
                 print(f"   📊 OCR Confidence: {avg_conf:.2%}")
             
-            # Clean the page text using legal processor
-            cleaned_page_text = self.text_processor.clean_raw_text(page_text)
-            self.raw_full_text += page_text + "\n"
-            self.full_text += cleaned_page_text + "\n"
+            pages.append(page_text)
             self.page_times.append(time.time() - page_start)
             print(f"✅ Page {i+1}: {method} in {self.page_times[-1]:.2f} sec")
         
         doc.close()
-        
-        # Save full text
-        with open(os.path.join(self.output_dir, "full_text.txt"), "w", encoding="utf-8") as f:
-            f.write(self.full_text.strip())
-        
-        # Save raw full text
-        with open(os.path.join(self.output_dir, "raw_full_text.txt"), "w", encoding="utf-8") as f:
-            f.write(self.raw_full_text.strip())
-        
-        # Generate and return stats
-        # processing_stats = self._generate_stats()
-        
-        # Return the required values
-        return self.full_text.strip(), self.raw_full_text.strip()
+        return pages
 
     def _generate_stats(self):
         """Generate and display final statistics"""
@@ -7,15 +7,16 @@ Processes chat requests from the frontend and returns responses using LLaMA mode
 import sys
 import json
 import os
+import time
 from pathlib import Path
 
-# Add the scripts directory to Python path
-scripts_dir = Path(__file__).parent
-sys.path.insert(0, str(scripts_dir))
+# Add the repository root to Python path so the shared utils package is importable
+repo_root = Path(__file__).resolve().parent.parent
+sys.path.insert(0, str(repo_root))
 
 # Import the llama functions
 try:
-    from llama import interactive_qa_session, general_legal_chat
+    from utils.llama import answer_from_data, answer_from_data_stream, general_legal_chat, general_legal_chat_stream
 except ImportError as e:
     print(f"Error importing llama functions: {e}", file=sys.stderr)
     sys.exit(1)
@@ -35,7 +36,7 @@ def process_chat_message(message, mode='general', document_text=None):
     try:
         if mode == 'document' and document_text:
             # Use document-specific Q&A
-            answer = interactive_qa_session(document_text, message, single_question=True)
+            answer = answer_from_data(document_text, message)
         else:
             # Use general legal chat
             answer = general_legal_chat(message)
@@ -58,9 +59,50 @@ def process_chat_message(message, mode='general', document_text=None):
             'error': str(e)
         }
 
+def stream_chat_message(message, mode='general', document_text=None):
+    """
+    Stream a chat answer as events for newline-delimited JSON output:
+    one 'start', a 'token' per generated piece, then 'done' (or 'error').
+    """
+    start_time = time.time()
+    yield {'type': 'start', 'mode': mode}
+    parts = []
+    first_token_time = None
+    try:
+        if mode == 'document' and document_text:
+            tokens = answer_from_data_stream(document_text, message)
+        else:
+            tokens = general_legal_chat_stream(message)
+        for token in tokens:
+            if first_token_time is None:
+                first_token_time = time.time() - start_time
+            parts.append(token)
+            yield {'type': 'token', 'text': token}
+    except Exception as e:
+        print(f"Error streaming message: {e}", file=sys.stderr)
+        yield {
+            'type': 'error',
+            'response': "".join(parts) or "I apologize, but I'm experiencing technical difficulties. Please try again later or rephrase your question.",
+            'mode': mode,
+            'success': False,
+            'error': str(e)
+        }
+        return
+    
+    yield {
+        'type': 'done',
+        'response': "".join(parts),
+        'mode': mode,
+        'success': True,
+        'time_to_first_token': first_token_time,
+        'processing_time': time.time() - start_time
+    }
+
 def main():
     """
     Main function to handle input/output with the Node.js API.
+    With "stream": true in the input, the answer is written as newline-delimited
+    JSON events while it is generated.
     """
     try:
         # Read input from stdin
@@ -83,6 +125,11 @@ def main():
         if not message:
             raise ValueError("Message is required")
         
+        if data.get('stream'):
+            for event in stream_chat_message(message, mode, document_text):
+                print(json.dumps(event, ensure_ascii=False), flush=True)
+            return
+        
         # Process the message
         result = process_chat_message(message, mode, document_text)
         
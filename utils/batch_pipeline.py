@@ -0,0 +1,470 @@
+"""
+Streaming Batch Pipeline
+Processes an archive directory of court-order PDFs as a chain of stages connected
+by bounded queues:
+
+    feeder → OCR → clean → metadata extraction → summary (optional) → writer
+
+- Every stage has its own worker count. OCR and extraction run in process pools so
+  they use every core; cleaning, summarisation (Ollama calls) and writing use threads.
+- Queues are bounded, so a slow stage blocks the ones feeding it (backpressure)
+  instead of piling documents up in memory.
+- Each completed file is appended to batch_progress.jsonl and the running totals in
+  batch_processing_summary.json are refreshed; a throughput report is printed at the end.
+- With rag_index, the writer also saves each document's retrieval index for Q&A
+  (utils/rag_index.py) in its output folder.
+- With corpus_index, the writer adds each document to the corpus-wide index for
+  questions across documents (utils/corpus_index.py); it is flushed at the end.
+
+Usage:
+    python -m utils.batch_pipeline <pdf_directory> [--output output] [--ocr-workers N]
+                                   [--extract-workers N] [--summarize] [--summary-workers N] [--rag-index]
+                                   [--corpus-index]
+"""
+
+import os
+import sys
+import json
+import time
+import queue
+import argparse
+import threading
+import multiprocessing
+from concurrent.futures import ProcessPoolExecutor
+from datetime import datetime
+from typing import Any, Callable, Dict, Iterable, Iterator, List, Optional
+
+from utils.output_manager import OutputManager
+
+_DONE = object()
+
+# OCR engine of an OCR worker process, created the first time a scanned page needs it
+_OCR_ENGINE = None
+
+
+class _LazyOCREngine:
+    """Stands in for PaddleOCR so text-layer PDFs never load the OCR models"""
+
+    def predict(self, *args, **kwargs):
+        global _OCR_ENGINE
+        if _OCR_ENGINE is None:
+            from ocr.loading_ocr_models import initialize_ocr_offline
+            _OCR_ENGINE = initialize_ocr_offline()
+            if not _OCR_ENGINE:
+                from paddleocr import PaddleOCR
+                _OCR_ENGINE = PaddleOCR(use_textline_orientation=False, lang='en')
+        return _OCR_ENGINE.predict(*args, **kwargs)
+
+
+def _noop():
+    return None
+
+
+def _start_workers(pool: ProcessPoolExecutor, workers: int):
+    """Have the pool start its worker processes (they are otherwise started on first submit)"""
+    for future in [pool.submit(_noop) for _ in range(workers)]:
+        future.result()
+
+
+def _ocr_document(pdf_path: str, output_dir: str) -> Dict[str, Any]:
+    """OCR worker: raw text of every page"""
+    from ocr.ocr import AdvancedLegalOCR
+    ocr_system = AdvancedLegalOCR(pdf_path, output_dir, ocr_engine=_LazyOCREngine())
+    pages = ocr_system.read_pages()
+    return {'pages': pages, 'page_seconds': sum(ocr_system.page_times)}
+
+
+class StageStats:
+    """Counters for one pipeline stage"""
+
+    def __init__(self, name: str, workers: int):
+        self.name = name
+        self.workers = workers
+        self.processed = 0
+        self.failed = 0
+        self.busy_seconds = 0.0
+        self.max_queue_depth = 0
+        self._lock = threading.Lock()
+
+    def record(self, seconds: float, failed: bool):
+        with self._lock:
+            self.processed += 1
+            self.busy_seconds += seconds
+            if failed:
+                self.failed += 1
+
+    def observe_queue(self, depth: int):
+        if depth > self.max_queue_depth:
+            self.max_queue_depth = depth
+
+    def to_dict(self, wall_seconds: float) -> Dict[str, Any]:
+        return {
+            'workers': self.workers,
+            'processed': self.processed,
+            'failed': self.failed,
+            'busy_seconds': round(self.busy_seconds, 2),
+            'avg_seconds_per_doc': round(self.busy_seconds / self.processed, 3) if self.processed else 0.0,
+            'utilization': round(self.busy_seconds / (wall_seconds * self.workers), 3) if wall_seconds else 0.0,
+            'max_queue_depth': self.max_queue_depth,
+        }
+
+
+class _Stage:
+    """A pool of threads moving documents from one bounded queue to the next
+
+    Documents that already failed upstream are passed straight through, unless the
+    stage handles failures itself (the writer, which records them).
+    """
+
+    def __init__(self, name: str, func: Callable[[Dict[str, Any]], None], workers: int,
+                 inbox: "queue.Queue", outbox: Optional["queue.Queue"], stats: Optional[StageStats],
+                 handles_failures: bool = False):
+        self.name = name
+        self.handles_failures = handles_failures
+        self.func = func
+        self.inbox = inbox
+        self.outbox = outbox
+        self.stats = stats
+        self.threads = [threading.Thread(target=self._work, name=f"{name}-{i}", daemon=True)
+                        for i in range(max(1, workers))]
+        self.closer = threading.Thread(target=self._close, name=f"{name}-closer", daemon=True)
+
+    def start(self):
+        for thread in self.threads:
+            thread.start()
+        self.closer.start()
+
+    def _work(self):
+        while True:
+            item = self.inbox.get()
+            if item is _DONE:
+                # Let sibling workers see the end of input too
+                self.inbox.put(_DONE)
+                return
+            if self.handles_failures:
+                self.func(item)
+                continue
+            self.stats.observe_queue(self.inbox.qsize())
+            if not item.get('error'):
+                start = time.perf_counter()
+                try:
+                    self.func(item)
+                except Exception as e:
+                    item['error'] = str(e)
+                    item['failed_stage'] = self.name
+                seconds = time.perf_counter() - start
+                item['timings'][self.name] = round(seconds, 3)
+                self.stats.record(seconds, bool(item.get('error')))
+            if self.outbox is not None:
+                self.outbox.put(item)
+
+    def _close(self):
+        for thread in self.threads:
+            thread.join()
+        if self.outbox is not None:
+            self.outbox.put(_DONE)
+
+    def join(self):
+        self.closer.join()
+
+
+class BatchPipeline:
+    """OCR → clean → extract → summarise → write, streamed through bounded queues"""
+
+    def __init__(self, output_dir: str = "output", ocr_workers: Optional[int] = None,
+                 extract_workers: int = 1, summarize: bool = False, summary_workers: int = 2,
+                 writer_workers: int = 2, queue_size: int = 8, extractor=None, use_gpu: bool = False,
+                 rag_index: bool = False, corpus_index: bool = False):
+        cpus = os.cpu_count() or 2
+        self.output_dir = output_dir
+        self.ocr_workers = ocr_workers or max(1, cpus - extract_workers)
+        self.extract_workers = extract_workers
+        self.summarize = summarize
+        self.summary_workers = summary_workers
+        self.writer_workers = writer_workers
+        self.queue_size = queue_size
+        self.extractor = extractor
+        self.use_gpu = use_gpu
+        self.rag_index = rag_index
+        self.corpus_index = corpus_index
+        self.output_manager = OutputManager(output_dir)
+
+        self.results: List[Dict[str, Any]] = []
+        self.stats: Dict[str, StageStats] = {}
+        self._results_lock = threading.Lock()
+        self._pages = 0
+        self._start = 0.0
+        self._input_directory = ""
+
+    # ---- stage functions -------------------------------------------------
+
+    def _ocr(self, item: Dict[str, Any]):
+        ocr_output_dir = os.path.join(self.output_dir, os.path.splitext(item['filename'])[0])
+        ocr_output = self._ocr_pool.submit(_ocr_document, item['pdf_file'], ocr_output_dir).result()
+        item['pages'] = ocr_output['pages']
+
+    def _clean(self, item: Dict[str, Any]):
+        from ocr.text_processor import LegalTextProcessor
+        processor = getattr(self._thread_state, 'processor', None)
+        if processor is None:
+            processor = self._thread_state.processor = LegalTextProcessor()
+        pages = item.pop('pages')
+        item['page_count'] = len(pages)
+        item['raw_text'] = "\n".join(pages).strip()
+        item['full_text'] = "\n".join(processor.clean_raw_text(page) for page in pages).strip()
+        if not item['full_text']:
+            raise ValueError("Text extraction failed - no text extracted")
+
+    def _extract(self, item: Dict[str, Any]):
+        if self._extract_pool is not None:
+            from metadata.metadata_extractor import _extract_batch_item
+            record = self._extract_pool.submit(_extract_batch_item, item['filename'], item['raw_text'], False).result()
+        else:
+            record = self._run_local_extraction(item)
+        if not record['success']:
+            raise RuntimeError(record['error'])
+        item['result'] = record['result']
+
+    def _run_local_extraction(self, item: Dict[str, Any]) -> Dict[str, Any]:
+        from metadata.metadata_extractor import _run_batch_item
+        # One in-process extractor; its models are not safe to share across threads
+        with self._extractor_lock:
+            return _run_batch_item(self.extractor, item['filename'], item['raw_text'], False)
+
+    def _summarise(self, item: Dict[str, Any]):
+        from utils.llama import generate_court_order_summary
+        item['summary'] = generate_court_order_summary(item['full_text'])
+
+    def _write(self, item: Dict[str, Any]):
+        filename_prefix = os.path.splitext(item['filename'])[0]
+        output_dir = item['output_dir'] = self.output_manager.create_output_folder(item['pdf_file'])
+        files = {}
+        files.update(self.output_manager.save_ocr_results(output_dir, item['full_text'], item['raw_text'],
+                                                          item.get('summary', '')))
+        files.update(self.output_manager.save_metadata_results(output_dir, filename_prefix, item['result']))
+        if self.rag_index:
+            from utils.rag_index import build_document_index
+            index_dir = build_document_index(output_dir, item['full_text'], item['result'].get('extracted_data'))
+            if index_dir:
+                files['rag_index'] = index_dir
+        if self.corpus_index:
+            from utils.corpus_index import add_to_corpus
+            metadata = dict(item['result'].get('extracted_data') or {})
+            metadata['detected_state'] = item['result'].get('detected_state', '')
+            add_to_corpus(filename_prefix, item['full_text'], metadata, output_dir)
+        item['files'] = files
+
+    # ---- bookkeeping -----------------------------------------------------
+
+    def _finish(self, item: Dict[str, Any]):
+        """Final stage: record the document and refresh the progress files"""
+        if not item.get('error'):
+            self.stats['write'].observe_queue(self._writer_queue.qsize())
+            start = time.perf_counter()
+            try:
+                self._write(item)
+            except Exception as e:
+                item['error'] = str(e)
+                item['failed_stage'] = 'write'
+            seconds = time.perf_counter() - start
+            item['timings']['write'] = round(seconds, 3)
+            self.stats['write'].record(seconds, bool(item.get('error')))
+
+        record = {
+            'pdf_file': item['pdf_file'],
+            'filename': item['filename'],
+            'success': not item.get('error'),
+            'timings': item['timings'],
+        }
+        if item.get('error'):
+            record['error'] = item['error']
+            record['failed_stage'] = item.get('failed_stage')
+            print(f"   ❌ {item['filename']}: {item['error']} ({item.get('failed_stage')})")
+        else:
+            record['output_folder'] = item['output_dir']
+            record['files'] = item.get('files', {})
+            record['summary'] = item['result']['extraction_summary']
+            print(f"   ✅ {item['filename']} → {item['output_dir']}")
+
+        with self._results_lock:
+            self.results.append(record)
+            self._pages += item.get('page_count', 0)
+            with open(os.path.join(self.output_dir, "batch_progress.jsonl"), 'a', encoding='utf-8') as f:
+                f.write(json.dumps(record, ensure_ascii=False) + "\n")
+            self._write_summary(include_results=False)
+
+    def _write_summary(self, include_results: bool):
+        wall = time.time() - self._start
+        successes = sum(1 for r in self.results if r['success'])
+        summary = {
+            'processing_timestamp': datetime.now().isoformat(),
+            'input_directory': self._input_directory,
+            'output_directory': self.output_dir,
+            'total_files': len(self.results),
+            'successful_extractions': successes,
+            'failed_extractions': len(self.results) - successes,
+            'throughput': self.throughput(wall),
+        }
+        if include_results:
+            summary['results'] = self.results
+        path = os.path.join(self.output_dir, "batch_processing_summary.json")
+        temp_path = path + ".tmp"
+        with open(temp_path, 'w', encoding='utf-8') as f:
+            json.dump(summary, f, indent=2, ensure_ascii=False)
+        os.replace(temp_path, path)
+
+    def throughput(self, wall_seconds: float) -> Dict[str, Any]:
+        done = len(self.results)
+        report = {
+            'wall_seconds': round(wall_seconds, 2),
+            'documents_per_minute': round(done * 60 / wall_seconds, 2) if wall_seconds else 0.0,
+            'pages_per_second': round(self._pages / wall_seconds, 2) if wall_seconds else 0.0,
+            'stages': {name: stats.to_dict(wall_seconds) for name, stats in self.stats.items()},
+        }
+        if self.summarize:
+            from utils.llm_client import get_llm_client
+            report['llm'] = get_llm_client().metrics()
+        if self.corpus_index:
+            from utils.corpus_index import get_corpus_index
+            corpus = get_corpus_index()
+            if corpus is not None:
+                report['corpus'] = corpus.stats()
+        return report
+
+    def format_report(self) -> str:
+        report = self.throughput(time.time() - self._start)
+        output = "📊 BATCH THROUGHPUT REPORT\n" + "=" * 78 + "\n"
+        output += (f"📄 {len(self.results)} documents, {self._pages} pages in {report['wall_seconds']:.1f}s "
+                   f"({report['documents_per_minute']:.1f} docs/min, {report['pages_per_second']:.2f} pages/s)\n\n")
+        output += f"{'stage':<10} {'workers':>7} {'done':>6} {'failed':>6} {'avg s/doc':>10} {'util':>6} {'max queue':>10}\n"
+        output += "-" * 78 + "\n"
+        for name, stats in report['stages'].items():
+            output += (f"{name:<10} {stats['workers']:>7} {stats['processed']:>6} {stats['failed']:>6} "
+                       f"{stats['avg_seconds_per_doc']:>10.3f} {stats['utilization']:>6.0%} {stats['max_queue_depth']:>10}\n")
+        if 'llm' in report:
+            llm = report['llm']['total']
+            output += (f"\n🦙 LLM: {llm['calls']} calls, avg {llm['avg_seconds']:.2f}s, p95 {llm['p95_seconds']:.2f}s, "
+                       f"{llm['cold_loads']} cold loads, {llm['errors']} errors\n")
+        if 'corpus' in report:
+            corpus = report['corpus']
+            output += (f"\n🔎 Corpus index: {corpus['documents']} documents, {corpus['chunks']} chunks "
+                       f"({corpus['indexed_rows']} rows in FAISS)\n")
+        return output
+
+    # ---- driver ----------------------------------------------------------
+
+    @staticmethod
+    def find_pdfs(pdf_directory: str) -> Iterator[str]:
+        """PDFs in the directory, yielded lazily in name order"""
+        for name in sorted(os.listdir(pdf_directory)):
+            path = os.path.join(pdf_directory, name)
+            if name.lower().endswith('.pdf') and os.path.isfile(path):
+                yield path
+
+    def run(self, pdf_directory: str, pdf_files: Optional[Iterable[str]] = None) -> List[Dict[str, Any]]:
+        """Process every PDF and return one record per file"""
+        os.makedirs(self.output_dir, exist_ok=True)
+        progress_path = os.path.join(self.output_dir, "batch_progress.jsonl")
+        if os.path.exists(progress_path):
+            os.remove(progress_path)
+        self._input_directory = pdf_directory
+        self._start = time.time()
+        self._thread_state = threading.local()
+        self._extractor_lock = threading.Lock()
+
+        # Start-method choice mirrors extract_many: fork shares loaded models, CUDA needs spawn
+        start_method = 'fork' if 'fork' in multiprocessing.get_all_start_methods() and not self.use_gpu else 'spawn'
+        context = multiprocessing.get_context(start_method)
+        self._ocr_pool = ProcessPoolExecutor(max_workers=self.ocr_workers, mp_context=context)
+        self._extract_pool = None
+        if self.extract_workers > 1 or self.extractor is None:
+            import metadata.metadata_extractor as metadata_extractor
+            config = {'use_gpu': self.use_gpu, 'debug': False,
+                      'result_cache': getattr(self.extractor, 'result_cache', None)}
+            if self.extractor is not None and start_method == 'fork':
+                metadata_extractor._BATCH_EXTRACTOR = self.extractor
+            self._extract_pool = ProcessPoolExecutor(max_workers=max(1, self.extract_workers), mp_context=context,
+                                                     initializer=metadata_extractor._init_batch_worker,
+                                                     initargs=(config,))
+        # Fork every worker now, while this is the only thread: forking later from the stage
+        # threads, next to the LLM warmup thread and the embedders' thread pools, can copy
+        # a held lock (logging, OpenMP) into the child and deadlock it
+        _start_workers(self._ocr_pool, self.ocr_workers)
+        if self._extract_pool is not None:
+            _start_workers(self._extract_pool, max(1, self.extract_workers))
+
+        stage_specs = [('ocr', self._ocr, self.ocr_workers),
+                       ('clean', self._clean, 1),
+                       ('extract', self._extract, self.extract_workers)]
+        if self.summarize:
+            stage_specs.append(('summary', self._summarise, self.summary_workers))
+            # Load the model on the Ollama server while the first documents are still in OCR
+            from utils.llm_client import get_llm_client
+            get_llm_client().warmup_in_background()
+
+        queues = [queue.Queue(maxsize=self.queue_size) for _ in range(len(stage_specs) + 1)]
+        stages = []
+        for index, (name, func, workers) in enumerate(stage_specs):
+            self.stats[name] = StageStats(name, workers)
+            stages.append(_Stage(name, func, workers, queues[index], queues[index + 1], self.stats[name]))
+        self.stats['write'] = StageStats('write', self.writer_workers)
+        self._writer_queue = queues[-1]
+        writer = _Stage('write', self._finish, self.writer_workers, queues[-1], None, None, handles_failures=True)
+
+        print(f"🚀 Batch pipeline: {self.ocr_workers} OCR, {self.extract_workers} extraction"
+              f"{f', {self.summary_workers} summary' if self.summarize else ''}, {self.writer_workers} writer workers")
+
+        try:
+            for stage in stages + [writer]:
+                stage.start()
+            # Feeder: blocks on the bounded OCR queue, so the directory is walked only as fast as it is processed
+            for pdf_file in (pdf_files if pdf_files is not None else self.find_pdfs(pdf_directory)):
+                queues[0].put({'pdf_file': pdf_file, 'filename': os.path.basename(pdf_file), 'timings': {}})
+            queues[0].put(_DONE)
+            writer.join()
+        finally:
+            self._ocr_pool.shutdown()
+            if self._extract_pool is not None:
+                self._extract_pool.shutdown()
+                import metadata.metadata_extractor as metadata_extractor
+                metadata_extractor._BATCH_EXTRACTOR = None
+
+        if self.corpus_index:
+            from utils.corpus_index import get_corpus_index
+            corpus = get_corpus_index()
+            if corpus is not None:
+                corpus.flush()
+        self._write_summary(include_results=True)
+        print(self.format_report())
+        return self.results
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Streaming OCR → extraction → summary batch pipeline")
+    parser.add_argument("pdf_directory")
+    parser.add_argument("--output", default="output")
+    parser.add_argument("--ocr-workers", type=int, default=None, help="Default: CPU count minus extraction workers")
+    parser.add_argument("--extract-workers", type=int, default=max(1, (os.cpu_count() or 2) // 4))
+    parser.add_argument("--summarize", action="store_true", help="Generate LLaMA summaries")
+    parser.add_argument("--summary-workers", type=int, default=2)
+    parser.add_argument("--writer-workers", type=int, default=2)
+    parser.add_argument("--queue-size", type=int, default=8)
+    parser.add_argument("--gpu", action="store_true")
+    parser.add_argument("--rag-index", action="store_true", help="Save a retrieval index per document for Q&A")
+    parser.add_argument("--corpus-index", action="store_true", help="Add documents to the corpus-wide Q&A index")
+    args = parser.parse_args()
+
+    if not os.path.isdir(args.pdf_directory):
+        print(f"❌ Directory not found: {args.pdf_directory}")
+        sys.exit(1)
+
+    pipeline = BatchPipeline(output_dir=args.output, ocr_workers=args.ocr_workers,
+                             extract_workers=args.extract_workers, summarize=args.summarize,
+                             summary_workers=args.summary_workers, writer_workers=args.writer_workers,
+                             queue_size=args.queue_size, use_gpu=args.gpu, rag_index=args.rag_index,
+                             corpus_index=args.corpus_index)
+    pipeline.run(args.pdf_directory)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,700 @@
+"""
+Corpus Vector Index
+One persistent index over the chunks of every processed document, for questions that
+span the archive ("which Kerala bail orders this year denied bail for Explosive
+Substances Act offences").
+
+Storage (LEGAL_CORPUS_INDEX_DIR, default <project>/output/.corpus_index):
+    vectors.f16    chunk embeddings as a memory-mapped float16 matrix; row number = chunk id
+    corpus.sqlite  documents (state, court, order date, document type, Acts, case number),
+                   chunk texts, and bookkeeping
+    index.faiss    FAISS IVF index (HNSW coarse quantiser, 8-bit scalar quantised vectors)
+                   over the chunk ids it has been given so far
+
+Documents are added (or replaced) as they are processed and can be deleted. New rows
+first form an unindexed tail that is searched exactly; once the tail is large, or the
+corpus is big enough to train the IVF index, flush() folds it into index.faiss. A
+chunk deleted from the database is never returned, and is also removed from the
+FAISS index at the next flush.
+
+Metadata filters (state, court, date range, statute, document type) are resolved in
+SQLite before the vector search. Small candidate sets are scored exactly on the
+memory-mapped vectors; large ones go through the IVF index with an id selector.
+Without FAISS every search is exact, which stays usable for small archives.
+
+Latency: searching opens index.faiss memory-mapped, so a query touches only the
+inverted lists it probes. The web app's chat handler is still a new Python process
+per request, though. Each request loads the embedding model (a second or more on
+CPU) and reopens the index before it can search. So the sub-second target for a
+million-chunk corpus holds only for a long-running process that keeps a CorpusIndex
+(e.g. the batch pipeline or a resident API worker), not for per-request processes.
+"""
+
+import os
+import re
+import json
+import time
+import sqlite3
+import logging
+import threading
+from contextlib import contextmanager
+from dataclasses import dataclass, asdict
+from datetime import date
+from typing import Any, Dict, Iterator, List, Optional, Tuple
+
+from .rag_index import (EMBEDDING_MODEL, INDEX_DIRNAME, NUMPY_AVAILABLE, FAISS_AVAILABLE,
+                        EMBEDDINGS_AVAILABLE, DocumentIndex, chunk_document, embed,
+                        flatten_metadata, get_embedder, text_hash)
+
+if NUMPY_AVAILABLE:
+    import numpy as np
+if FAISS_AVAILABLE:
+    import faiss  # type: ignore
+
+try:
+    import fcntl
+except ImportError:  # Windows: single-writer use only
+    fcntl = None
+
+logger = logging.getLogger(__name__)
+
+DEFAULT_CORPUS_DIR = os.environ.get(
+    "LEGAL_CORPUS_INDEX_DIR",
+    os.path.join(os.path.dirname(os.path.dirname(os.path.abspath(__file__))), "output", ".corpus_index"))
+
+# Chunks retrieved for a corpus question
+CORPUS_TOP_K = int(os.environ.get("LEGAL_CORPUS_TOP_K", "12"))
+# The IVF index is trained once the corpus has this many chunks
+TRAIN_MIN_ROWS = 20000
+# Unindexed rows are folded into the IVF index once there are this many
+TAIL_MAX_ROWS = 50000
+# Filtered candidate sets up to this size are scored exactly instead of through IVF
+EXACT_MAX_ROWS = 50000
+NPROBE = 32
+BLOCK_ROWS = 65536
+INITIAL_CAPACITY = 4096
+
+# Field names of the extractors (root and web app) for each filterable attribute
+STATE_FIELDS = ('detected_state', 'state')
+# What state detection returns when no state/UT applies (e.g. Supreme Court judgments)
+NO_STATE_VALUES = {'not in document', 'general'}
+COURT_FIELDS = ('court_name', 'court')
+DATE_FIELDS = ('order_date', 'judgment_date', 'date')
+TYPE_FIELDS = ('document_type', 'case_type')
+STATUTE_FIELDS = ('statutes_offences', 'statutes_sections', 'statutes', 'acts_sections')
+
+_MONTHS = {name: number for number, names in enumerate(
+    [('january', 'jan'), ('february', 'feb'), ('march', 'mar'), ('april', 'apr'), ('may',), ('june', 'jun'),
+     ('july', 'jul'), ('august', 'aug'), ('september', 'sep', 'sept'), ('october', 'oct'),
+     ('november', 'nov'), ('december', 'dec')], 1) for name in names}
+_MONTH = '(' + '|'.join(sorted(_MONTHS, key=len, reverse=True)) + r')\.?'
+_DATE_ISO = re.compile(r'\b(\d{4})-(\d{1,2})-(\d{1,2})\b')
+_DATE_NUMERIC = re.compile(r'\b(\d{1,2})[./-](\d{1,2})[./-](\d{4})\b')
+_DATE_DAY_MONTH = re.compile(r'\b(\d{1,2})(?:st|nd|rd|th)?(?:\s+day\s+of)?\s+' + _MONTH + r',?\s+(\d{4})\b', re.IGNORECASE)
+_DATE_MONTH_DAY = re.compile(r'\b' + _MONTH + r'\s+(\d{1,2})(?:st|nd|rd|th)?,?\s+(\d{4})\b', re.IGNORECASE)
+
+# "Explosive Substances Act, 1908", "Indian Penal Code", "N.D.P.S. Act"
+_ACT = re.compile(r"\b((?:[A-Z][A-Za-z()&.'-]*\s+(?:of\s+|and\s+|the\s+)?){1,8}(?:Act|Code|Sanhita|Adhiniyam))\b")
+# "Code of Criminal Procedure, 1973", "Code of Civil Procedure"
+_CODE = re.compile(r"\b(Code\s+of\s+(?:[A-Z][A-Za-z]*\s+(?:and\s+)?){0,3}[A-Z][A-Za-z]*)")
+_ACT_ABBREVIATIONS = re.compile(r'(?<![A-Za-z.])(I\.?\s?P\.?\s?C|Cr\.?\s?P\.?\s?C|N\.?\s?D\.?\s?P\.?\s?S|POCSO|UAPA|BNSS|BNS|BSA)'
+                                r'(?![A-Za-z])\.?', re.IGNORECASE)
+# Letters written with dots ("N.D.P.S.", "N. I.")
+_DOTTED_LETTERS = re.compile(r'\b(?:[A-Za-z]\.\s?){2,}')
+# Full names stored under their usual abbreviation, so "IPC" and "Indian Penal Code" filter alike
+ACT_ABBREVIATIONS = {
+    'indian penal code': 'ipc',
+    'code of criminal procedure': 'crpc',
+    'narcotic drugs and psychotropic substances act': 'ndps',
+    'ndps act': 'ndps',
+    'protection of children from sexual offences act': 'pocso',
+    'pocso act': 'pocso',
+    'unlawful activities prevention act': 'uapa',
+    'uapa act': 'uapa',
+    'bharatiya nyaya sanhita': 'bns',
+    'bharatiya nagarik suraksha sanhita': 'bnss',
+    'bharatiya sakshya adhiniyam': 'bsa',
+}
+# Abbreviations short enough to need an explicit allow-list for matching questions
+SHORT_ACT_NAMES = set(ACT_ABBREVIATIONS.values())
+
+# Words the Act pattern picks up in front of the name ("under the ... Act", "Sections 4 & 5 of the ... Act")
+_ACT_LEADING_WORDS = {'under', 'u', 's', 'section', 'sections', 'of', 'and', 'offence', 'offences', 'charged'}
+
+_YEAR_PHRASE = re.compile(r'\b(?:in|of|during|for)\s+((?:19|20)\d{2})\b', re.IGNORECASE)
+_SINCE_PHRASE = re.compile(r'\b(?:since|after|from)\s+((?:19|20)\d{2})\b', re.IGNORECASE)
+_BETWEEN_PHRASE = re.compile(r'\bbetween\s+((?:19|20)\d{2})\s+and\s+((?:19|20)\d{2})\b', re.IGNORECASE)
+
+
+def _safe_date(year: int, month: int, day: int) -> Optional[str]:
+    try:
+        return date(year, month, day).isoformat()
+    except ValueError:
+        return None
+
+
+def normalize_date(value: str) -> Optional[str]:
+    """ISO date (YYYY-MM-DD) of the first date in a metadata value; day-first for numeric dates"""
+    if not value:
+        return None
+    match = _DATE_ISO.search(value)
+    if match:
+        return _safe_date(int(match.group(1)), int(match.group(2)), int(match.group(3)))
+    match = _DATE_NUMERIC.search(value)
+    if match:
+        return _safe_date(int(match.group(3)), int(match.group(2)), int(match.group(1)))
+    match = _DATE_DAY_MONTH.search(value)
+    if match:
+        return _safe_date(int(match.group(3)), _MONTHS[match.group(2).lower()], int(match.group(1)))
+    match = _DATE_MONTH_DAY.search(value)
+    if match:
+        return _safe_date(int(match.group(3)), _MONTHS[match.group(1).lower()], int(match.group(2)))
+    return None
+
+
+def normalize_act(name: str) -> str:
+    """Lower-cased Act name without the year and punctuation ("explosive substances act"; "ipc" for abbreviated Acts)"""
+    name = _DOTTED_LETTERS.sub(lambda match: re.sub(r'[.\s]', '', match.group(0)) + ' ', name)
+    words = [word for word in re.sub(r'[^a-z0-9 ]+', ' ', name.lower()).split() if word != 'the']
+    while words and words[0] in _ACT_LEADING_WORDS:
+        words.pop(0)
+    act = " ".join(word for word in words if not re.fullmatch(r'(?:19|20)\d{2}', word))
+    return ACT_ABBREVIATIONS.get(act, act)
+
+
+def extract_acts(statutes: str) -> List[str]:
+    """Normalised names of the Acts mentioned in a statutes/offences value"""
+    acts = [normalize_act(match.group(1)) for pattern in (_ACT, _CODE) for match in pattern.finditer(statutes)]
+    acts += [re.sub(r'[^a-z]', '', match.group(1).lower()) for match in _ACT_ABBREVIATIONS.finditer(statutes)]
+    return sorted({act for act in acts if act})
+
+
+def _first(metadata: Dict[str, str], fields: Tuple[str, ...]) -> str:
+    for field in fields:
+        if metadata.get(field):
+            return metadata[field]
+    return ""
+
+
+def _state(metadata: Dict[str, str]) -> str:
+    """State/UT of a document; "" for national forums and placeholders ("not in document")"""
+    state = _first(metadata, STATE_FIELDS)
+    return "" if state.strip().lower() in NO_STATE_VALUES else state
+
+
+@dataclass
+class CorpusHit:
+    """One retrieved chunk with the document it belongs to"""
+    doc_id: str
+    chunk_no: int
+    text: str
+    score: float
+    case_number: str
+    court: str
+    state: str
+    order_date: str
+    document_type: str
+    output_dir: str
+
+    def to_dict(self) -> Dict[str, Any]:
+        return asdict(self)
+
+
+class CorpusIndex:
+    """Persistent chunk index over all processed documents"""
+
+    def __init__(self, directory: str = DEFAULT_CORPUS_DIR, embedder=None):
+        self.directory = directory
+        self.embedder = embedder
+        self._lock = threading.RLock()
+        self._connection: Optional[sqlite3.Connection] = None
+        self._pid = None
+        self._vectors = None
+        self._vector_capacity = 0
+        self._index = None
+        self._index_version = None
+        self._index_mmapped = False
+        os.makedirs(directory, exist_ok=True)
+
+    # ---- storage ---------------------------------------------------------
+
+    @property
+    def _vectors_path(self) -> str:
+        return os.path.join(self.directory, "vectors.f16")
+
+    @property
+    def _index_path(self) -> str:
+        return os.path.join(self.directory, "index.faiss")
+
+    def _db(self) -> sqlite3.Connection:
+        # Connections must not be shared with forked children, so reopen per process
+        if self._connection is None or self._pid != os.getpid():
+            self._connection = sqlite3.connect(os.path.join(self.directory, "corpus.sqlite"), timeout=60,
+                                               check_same_thread=False, isolation_level=None)
+            self._connection.execute("PRAGMA journal_mode=WAL")
+            self._connection.executescript("""
+                CREATE TABLE IF NOT EXISTS meta (key TEXT PRIMARY KEY, value TEXT);
+                CREATE TABLE IF NOT EXISTS documents (
+                    doc_id TEXT PRIMARY KEY, text_hash TEXT, state TEXT, court TEXT, order_date TEXT,
+                    document_type TEXT, case_number TEXT, output_dir TEXT, added REAL);
+                CREATE INDEX IF NOT EXISTS documents_state ON documents (state);
+                CREATE INDEX IF NOT EXISTS documents_date ON documents (order_date);
+                CREATE TABLE IF NOT EXISTS document_acts (doc_id TEXT, act TEXT);
+                CREATE INDEX IF NOT EXISTS document_acts_act ON document_acts (act);
+                CREATE INDEX IF NOT EXISTS document_acts_doc ON document_acts (doc_id);
+                CREATE TABLE IF NOT EXISTS chunks (id INTEGER PRIMARY KEY, doc_id TEXT, chunk_no INTEGER,
+                                                   start INTEGER, text TEXT);
+                CREATE INDEX IF NOT EXISTS chunks_doc ON chunks (doc_id);
+                CREATE TABLE IF NOT EXISTS pending_removals (id INTEGER PRIMARY KEY);
+            """)
+            self._pid = os.getpid()
+        return self._connection
+
+    def _meta(self, key: str, default: Any = None) -> Any:
+        row = self._db().execute("SELECT value FROM meta WHERE key = ?", (key,)).fetchone()
+        return json.loads(row[0]) if row else default
+
+    def _set_meta(self, key: str, value: Any):
+        self._db().execute("INSERT OR REPLACE INTO meta VALUES (?, ?)", (key, json.dumps(value)))
+
+    @contextmanager
+    def _writer(self) -> Iterator[None]:
+        """Exclusive write access across threads and processes"""
+        with self._lock:
+            with open(os.path.join(self.directory, "write.lock"), 'w') as lock_file:
+                if fcntl is not None:
+                    fcntl.flock(lock_file, fcntl.LOCK_EX)
+                try:
+                    yield
+                finally:
+                    if fcntl is not None:
+                        fcntl.flock(lock_file, fcntl.LOCK_UN)
+
+    def _map_vectors(self, dimension: int, capacity: int):
+        """(Re)open the memory-mapped matrix with at least the given capacity"""
+        if self._vectors is not None and self._vector_capacity >= capacity:
+            return self._vectors
+        capacity = max(capacity, os.path.getsize(self._vectors_path) // (2 * dimension)
+                       if os.path.exists(self._vectors_path) else 0)
+        with open(self._vectors_path, 'ab') as f:
+            if f.tell() < capacity * dimension * 2:
+                f.truncate(capacity * dimension * 2)
+        self._vectors = np.memmap(self._vectors_path, dtype=np.float16, mode='r+', shape=(capacity, dimension))
+        self._vector_capacity = capacity
+        return self._vectors
+
+    def _append_vectors(self, vectors) -> int:
+        """Write rows at the end of the matrix; returns the id of the first one"""
+        dimension = self._meta('dimension')
+        if dimension is None:
+            dimension = int(vectors.shape[1])
+            self._set_meta('dimension', dimension)
+            self._set_meta('model', EMBEDDING_MODEL)
+        first = self._meta('rows', 0)
+        needed = first + len(vectors)
+        capacity = max(self._meta('capacity', 0), INITIAL_CAPACITY)
+        while capacity < needed:
+            capacity *= 2
+        matrix = self._map_vectors(dimension, capacity)
+        matrix[first:needed] = vectors.astype(np.float16)
+        matrix.flush()
+        self._set_meta('capacity', capacity)
+        self._set_meta('rows', needed)
+        return first
+
+    def _matrix(self):
+        """Memory-mapped matrix covering every row written so far (by any process)"""
+        dimension = self._meta('dimension')
+        if dimension is None:
+            return None
+        return self._map_vectors(dimension, self._meta('capacity', 0))
+
+    # ---- documents ---------------------------------------------------------
+
+    def _embedder(self):
+        return self.embedder or get_embedder()
+
+    def _embed_document(self, text: str, output_dir: Optional[str]):
+        """Chunks and embeddings, reusing the document's saved RAG index when it matches"""
+        if output_dir:
+            saved = DocumentIndex.load(os.path.join(output_dir, INDEX_DIRNAME), text_hash(text))
+            if saved is not None:
+                return saved.chunks, np.asarray(saved.embeddings, dtype=np.float32)
+        chunks = chunk_document(text)
+        if not chunks:
+            return [], None
+        return chunks, embed([chunk for _, chunk in chunks], self._embedder())
+
+    def add_document(self, doc_id: str, text: str, metadata: Optional[Dict[str, Any]] = None,
+                     output_dir: Optional[str] = None, flush: bool = True) -> int:
+        """Add or replace a document; returns the number of chunks indexed"""
+        if not EMBEDDINGS_AVAILABLE or self._embedder() is None:
+            return 0
+        doc_hash = text_hash(text)
+        existing = self._db().execute("SELECT text_hash FROM documents WHERE doc_id = ?", (doc_id,)).fetchone()
+        if existing and existing[0] == doc_hash:
+            return 0
+        chunks, vectors = self._embed_document(text, output_dir)
+        if not chunks:
+            return 0
+        model = self._meta('model')
+        if model not in (None, EMBEDDING_MODEL):
+            raise ValueError(f"Corpus index {self.directory} was built with {model}, not {EMBEDDING_MODEL}")
+
+        flat = flatten_metadata(metadata)
+        acts = extract_acts(_first(flat, STATUTE_FIELDS))
+        with self._writer():
+            db = self._db()
+            db.execute("BEGIN IMMEDIATE")
+            try:
+                self._delete_rows(doc_id)
+                first = self._append_vectors(vectors)
+                db.execute("INSERT INTO documents VALUES (?, ?, ?, ?, ?, ?, ?, ?, ?)",
+                           (doc_id, doc_hash, _state(flat), _first(flat, COURT_FIELDS),
+                            normalize_date(_first(flat, DATE_FIELDS)), _first(flat, TYPE_FIELDS),
+                            flat.get('case_number', ''), output_dir or '', time.time()))
+                db.executemany("INSERT INTO document_acts VALUES (?, ?)", [(doc_id, act) for act in acts])
+                db.executemany("INSERT INTO chunks VALUES (?, ?, ?, ?, ?)",
+                               [(first + n, doc_id, n, start, chunk) for n, (start, chunk) in enumerate(chunks)])
+                db.execute("COMMIT")
+            except Exception:
+                db.execute("ROLLBACK")
+                raise
+            if flush:
+                self._flush_locked(force=False)
+        return len(chunks)
+
+    def _delete_rows(self, doc_id: str) -> bool:
+        db = self._db()
+        db.execute("INSERT OR IGNORE INTO pending_removals SELECT id FROM chunks WHERE doc_id = ?", (doc_id,))
+        db.execute("DELETE FROM chunks WHERE doc_id = ?", (doc_id,))
+        db.execute("DELETE FROM document_acts WHERE doc_id = ?", (doc_id,))
+        return db.execute("DELETE FROM documents WHERE doc_id = ?", (doc_id,)).rowcount > 0
+
+    def delete_document(self, doc_id: str) -> bool:
+        """Remove a document from search results (its vectors leave the FAISS index at the next flush)"""
+        with self._writer():
+            db = self._db()
+            db.execute("BEGIN IMMEDIATE")
+            deleted = self._delete_rows(doc_id)
+            db.execute("COMMIT")
+        return deleted
+
+    # ---- FAISS maintenance -----------------------------------------------
+
+    def _live_rows(self, start: int = 0, end: Optional[int] = None):
+        query, params = "SELECT id FROM chunks WHERE id >= ?", [start]
+        if end is not None:
+            query += " AND id < ?"
+            params.append(end)
+        return np.fromiter((row[0] for row in self._db().execute(query + " ORDER BY id", params)), dtype=np.int64)
+
+    def _add_rows_to_index(self, index, rows):
+        matrix = self._matrix()
+        for offset in range(0, len(rows), BLOCK_ROWS):
+            block = rows[offset:offset + BLOCK_ROWS]
+            index.add_with_ids(np.asarray(matrix[block], dtype=np.float32), block)
+
+    def _flush_locked(self, force: bool):
+        if not FAISS_AVAILABLE:
+            return
+        rows = self._meta('rows', 0)
+        indexed = self._meta('indexed_rows', 0)
+        index = self._load_index(writable=True)
+        if index is None:
+            live_count = self._db().execute("SELECT COUNT(*) FROM chunks").fetchone()[0]
+            if live_count < TRAIN_MIN_ROWS and not (force and live_count >= 256):
+                return
+            live = self._live_rows()
+            # Train the IVF index on (a sample of) every live chunk
+            nlist = int(min(65536, max(64, 4 * len(live) ** 0.5)))
+            nlist = min(nlist, max(1, len(live) // 39))
+            dimension = self._meta('dimension')
+            index = faiss.index_factory(dimension, f"IVF{nlist}_HNSW32,SQ8", faiss.METRIC_INNER_PRODUCT)
+            sample = live if len(live) <= nlist * 64 else np.sort(np.random.choice(live, nlist * 64, replace=False))
+            index.train(np.asarray(self._matrix()[sample], dtype=np.float32))
+            self._add_rows_to_index(index, live)
+        else:
+            if rows - indexed < TAIL_MAX_ROWS and not force:
+                return
+            pending = np.fromiter((row[0] for row in self._db().execute("SELECT id FROM pending_removals")),
+                                  dtype=np.int64)
+            if len(pending):
+                index.remove_ids(pending)
+            self._add_rows_to_index(index, self._live_rows(indexed, rows))
+        self._db().execute("DELETE FROM pending_removals WHERE id < ?", (rows,))
+
+        temp_path = self._index_path + f".{os.getpid()}.tmp"
+        faiss.write_index(index, temp_path)
+        os.replace(temp_path, self._index_path)
+        version = self._meta('index_version', 0) + 1
+        self._set_meta('indexed_rows', rows)
+        self._set_meta('index_version', version)
+        self._index, self._index_version, self._index_mmapped = index, version, False
+
+    def flush(self, force: bool = True):
+        """Fold unindexed rows into the FAISS index (training it if needed) and apply deletions"""
+        with self._writer():
+            self._flush_locked(force)
+
+    def _load_index(self, writable: bool = False):
+        """FAISS index as last saved (reloaded when another process rewrote it)
+
+        For searching, the inverted lists are memory-mapped (IO_FLAG_MMAP), so opening the
+        index does not read the whole file and the OS page cache is shared between the
+        processes that query it. flush() needs a writable, fully loaded copy.
+        """
+        if not FAISS_AVAILABLE:
+            return None
+        version = self._meta('index_version')
+        if version is None:
+            return None
+        if self._index is None or self._index_version != version or (writable and self._index_mmapped):
+            try:
+                if writable:
+                    self._index, self._index_mmapped = faiss.read_index(self._index_path), False
+                else:
+                    self._index, self._index_mmapped = self._read_index_mmap(), True
+                self._index_version = version
+            except RuntimeError as e:
+                logger.warning(f"Could not read corpus index {self._index_path}: {e}")
+                return None
+        return self._index
+
+    def _read_index_mmap(self):
+        try:
+            return faiss.read_index(self._index_path, faiss.IO_FLAG_MMAP)
+        except RuntimeError:
+            # FAISS builds without mmap support for this index type
+            return faiss.read_index(self._index_path)
+
+    # ---- search ------------------------------------------------------------
+
+    def candidate_rows(self, filters: Optional[Dict[str, Any]]):
+        """Chunk ids of the documents matching the metadata filters (None when there are no filters)
+
+        filters: state, court (substring), date_from / date_to (ISO), statute (Act name,
+        or part of the normalised name; abbreviations match exactly), document_type (substring), doc_ids (list)
+        """
+        clauses, params = [], []
+        filters = filters or {}
+        if filters.get('state'):
+            states = filters['state'] if isinstance(filters['state'], (list, tuple)) else [filters['state']]
+            clauses.append(f"d.state COLLATE NOCASE IN ({', '.join('?' * len(states))})")
+            params += states
+        if filters.get('court'):
+            clauses.append("d.court LIKE ?")
+            params.append(f"%{filters['court']}%")
+        if filters.get('date_from'):
+            clauses.append("d.order_date >= ?")
+            params.append(filters['date_from'])
+        if filters.get('date_to'):
+            clauses.append("d.order_date <= ?")
+            params.append(filters['date_to'])
+        if filters.get('statute'):
+            act = normalize_act(filters['statute'])
+            if ' ' in act:
+                # "explosive substances" also finds "explosive substances act"
+                clauses.append("d.doc_id IN (SELECT doc_id FROM document_acts WHERE act LIKE ?)")
+                params.append(f"%{act}%")
+            else:
+                # Abbreviations match exactly ("ipc" must not match "municipal ... act")
+                clauses.append("d.doc_id IN (SELECT doc_id FROM document_acts WHERE act = ?)")
+                params.append(act)
+        if filters.get('document_type'):
+            clauses.append("d.document_type LIKE ?")
+            params.append(f"%{filters['document_type']}%")
+        if filters.get('doc_ids'):
+            clauses.append(f"d.doc_id IN ({', '.join('?' * len(filters['doc_ids']))})")
+            params += list(filters['doc_ids'])
+        if not clauses:
+            return None
+        query = ("SELECT c.id FROM chunks c JOIN documents d ON d.doc_id = c.doc_id WHERE "
+                 + " AND ".join(clauses) + " ORDER BY c.id")
+        return np.fromiter((row[0] for row in self._db().execute(query, params)), dtype=np.int64)
+
+    def _exact(self, query, rows, k: int) -> List[Tuple[int, float]]:
+        """Exact inner-product top-k over the given rows (all written rows when rows is None)"""
+        matrix = self._matrix()
+        if matrix is None:
+            return []
+        total = self._meta('rows', 0)
+        best_ids, best_scores = np.empty(0, dtype=np.int64), np.empty(0, dtype=np.float32)
+        blocks = ((np.arange(start, min(start + BLOCK_ROWS, total)) for start in range(0, total, BLOCK_ROWS))
+                  if rows is None else (rows[start:start + BLOCK_ROWS] for start in range(0, len(rows), BLOCK_ROWS)))
+        for block in blocks:
+            if not len(block):
+                continue
+            scores = np.asarray(matrix[block], dtype=np.float32) @ query
+            best_ids = np.concatenate([best_ids, block])
+            best_scores = np.concatenate([best_scores, scores])
+            if len(best_ids) > k:
+                keep = np.argpartition(-best_scores, k)[:k]
+                best_ids, best_scores = best_ids[keep], best_scores[keep]
+        return [(int(i), float(s)) for i, s in zip(best_ids, best_scores)]
+
+    def _ann(self, index, query, rows, k: int) -> List[Tuple[int, float]]:
+        """Approximate top-k through the IVF index, restricted to rows when given"""
+        ivf = faiss.extract_index_ivf(index)
+        params = faiss.SearchParametersIVF()
+        params.nprobe = min(NPROBE, ivf.nlist)
+        # Kept in a local so the selector outlives the search call
+        selector = faiss.IDSelectorBatch(rows) if rows is not None else None
+        if selector is not None:
+            params.sel = selector
+        scores, ids = index.search(query.reshape(1, -1), k, params=params)
+        return [(int(i), float(s)) for i, s in zip(ids[0], scores[0]) if i >= 0]
+
+    def search(self, question: str, k: int = 10, filters: Optional[Dict[str, Any]] = None) -> List[CorpusHit]:
+        """Chunks most similar to the question among the documents matching the filters"""
+        embedder = self._embedder() if EMBEDDINGS_AVAILABLE else None
+        if embedder is None or self._meta('rows', 0) == 0:
+            return []
+        query = embed([question], embedder)[0]
+        rows = self.candidate_rows(filters)
+        if rows is not None and not len(rows):
+            return []
+        # Deleted rows stay in the FAISS index until the next flush: over-fetch and drop them
+        fetch = k * 2 + 10
+        index = self._load_index()
+        if index is None or (rows is not None and len(rows) <= EXACT_MAX_ROWS):
+            scored = self._exact(query, rows, fetch)
+        else:
+            indexed = self._meta('indexed_rows', 0)
+            total = self._meta('rows', 0)
+            if rows is None:
+                head, tail = None, (np.arange(indexed, total) if total > indexed else np.empty(0, dtype=np.int64))
+            else:
+                split = np.searchsorted(rows, indexed)
+                head, tail = rows[:split], rows[split:]
+            scored = self._ann(index, query, head, fetch) if head is None or len(head) else []
+            if len(tail):
+                scored += self._exact(query, tail, fetch)
+        scored.sort(key=lambda item: -item[1])
+        return self._hits(scored, k)
+
+    def _hits(self, scored: List[Tuple[int, float]], k: int) -> List[CorpusHit]:
+        hits = []
+        for start in range(0, len(scored), 500):
+            batch = scored[start:start + 500]
+            placeholders = ', '.join('?' * len(batch))
+            rows = {row[0]: row[1:] for row in self._db().execute(
+                "SELECT c.id, c.doc_id, c.chunk_no, c.text, d.case_number, d.court, d.state, d.order_date, "
+                f"d.document_type, d.output_dir FROM chunks c JOIN documents d ON d.doc_id = c.doc_id "
+                f"WHERE c.id IN ({placeholders})", [row_id for row_id, _ in batch])}
+            for row_id, score in batch:
+                if row_id in rows:
+                    doc_id, chunk_no, text, case_number, court, state, order_date, document_type, output_dir = rows[row_id]
+                    hits.append(CorpusHit(doc_id, chunk_no, text, score, case_number or '', court or '',
+                                          state or '', order_date or '', document_type or '', output_dir or ''))
+                    if len(hits) == k:
+                        return hits
+        return hits
+
+    # ---- questions ---------------------------------------------------------
+
+    def filters_from_question(self, question: str, today: Optional[date] = None) -> Dict[str, Any]:
+        """Filters stated in a question: known states and Acts, and date ranges ("this year", "in 2023")"""
+        today = today or date.today()
+        lowered = question.lower()
+        filters: Dict[str, Any] = {}
+        states = [row[0] for row in self._db().execute("SELECT DISTINCT state FROM documents WHERE state != ''")]
+        mentioned = [state for state in states if re.search(r'\b' + re.escape(state.lower()) + r'\b', lowered)]
+        if mentioned:
+            filters['state'] = mentioned
+        acts = [row[0] for row in self._db().execute("SELECT DISTINCT act FROM document_acts")]
+        question_acts = set(extract_acts(question))
+        normalized_question = normalize_act(question)
+        # Multi-word names may be written in lower case; abbreviations must be recognised as one
+        mentioned_acts = [act for act in acts if act in question_acts or (
+            (' ' in act or act in SHORT_ACT_NAMES) and re.search(r'\b' + re.escape(act) + r'\b', normalized_question))]
+        if mentioned_acts:
+            filters['statute'] = max(mentioned_acts, key=len)
+
+        between = _BETWEEN_PHRASE.search(question)
+        since = _SINCE_PHRASE.search(question)
+        year = _YEAR_PHRASE.search(question)
+        if 'this year' in lowered:
+            filters['date_from'], filters['date_to'] = f"{today.year}-01-01", today.isoformat()
+        elif 'last year' in lowered:
+            filters['date_from'], filters['date_to'] = f"{today.year - 1}-01-01", f"{today.year - 1}-12-31"
+        elif between:
+            filters['date_from'], filters['date_to'] = f"{between.group(1)}-01-01", f"{between.group(2)}-12-31"
+        elif since:
+            filters['date_from'] = f"{since.group(1)}-01-01"
+        elif year:
+            filters['date_from'], filters['date_to'] = f"{year.group(1)}-01-01", f"{year.group(1)}-12-31"
+        return filters
+
+    @staticmethod
+    def format_context(hits: List[CorpusHit]) -> str:
+        """Retrieved chunks grouped per document, with each document's details, as prompt data"""
+        documents: Dict[str, List[CorpusHit]] = {}
+        for hit in hits:
+            documents.setdefault(hit.doc_id, []).append(hit)
+        parts = []
+        for number, (doc_id, doc_hits) in enumerate(documents.items(), 1):
+            first = doc_hits[0]
+            details = ", ".join(value for value in (first.case_number, first.court, first.state, first.order_date) if value)
+            excerpts = "\n".join(f"- {hit.text}" for hit in sorted(doc_hits, key=lambda hit: hit.chunk_no))
+            parts.append(f"[Document {number}] {doc_id}" + (f" ({details})" if details else "") + f"\n{excerpts}")
+        return "\n\n".join(parts)
+
+    def stats(self) -> Dict[str, Any]:
+        db = self._db()
+        return {
+            'documents': db.execute("SELECT COUNT(*) FROM documents").fetchone()[0],
+            'chunks': db.execute("SELECT COUNT(*) FROM chunks").fetchone()[0],
+            'rows': self._meta('rows', 0),
+            'indexed_rows': self._meta('indexed_rows', 0),
+            'model': self._meta('model'),
+            'faiss': self._meta('index_version') is not None,
+        }
+
+
+_CORPUS: Optional[CorpusIndex] = None
+_CORPUS_LOCK = threading.Lock()
+
+
+def get_corpus_index() -> Optional[CorpusIndex]:
+    """Process-wide corpus index, or None when the embedding stack is not installed"""
+    global _CORPUS
+    if not EMBEDDINGS_AVAILABLE:
+        return None
+    with _CORPUS_LOCK:
+        if _CORPUS is None:
+            _CORPUS = CorpusIndex()
+    return _CORPUS
+
+
+def add_to_corpus(doc_id: str, text: str, metadata: Optional[Dict[str, Any]] = None,
+                  output_dir: Optional[str] = None, flush: bool = True) -> int:
+    """Ingest step: add a processed document to the corpus index; returns the chunks added"""
+    corpus = get_corpus_index()
+    if corpus is None:
+        return 0
+    try:
+        return corpus.add_document(doc_id, text, metadata, output_dir, flush=flush)
+    except Exception as e:
+        logger.warning(f"Could not add {doc_id} to the corpus index: {e}")
+        return 0
+
+
+def search_corpus(question: str, filters: Optional[Dict[str, Any]] = None,
+                  k: int = CORPUS_TOP_K) -> Tuple[Dict[str, Any], List[CorpusHit]]:
+    """Filters applied (stated in the question, overridden by explicit ones) and the retrieved chunks"""
+    corpus = get_corpus_index()
+    if corpus is None:
+        return dict(filters or {}), []
+    applied = corpus.filters_from_question(question)
+    applied.update({key: value for key, value in (filters or {}).items() if value})
+    return applied, corpus.search(question, k, applied)
+
+
+def hit_sources(hits: List[CorpusHit]) -> List[Dict[str, str]]:
+    """One entry per document the hits come from, in order of first appearance"""
+    sources: Dict[str, Dict[str, str]] = {}
+    for hit in hits:
+        sources.setdefault(hit.doc_id, {'doc_id': hit.doc_id, 'case_number': hit.case_number, 'court': hit.court,
+                                        'state': hit.state, 'order_date': hit.order_date})
+    return list(sources.values())
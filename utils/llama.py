@@ -1,56 +1,101 @@
-from langchain_ollama.llms import OllamaLLM # type: ignore
+from typing import Iterator
 
-def generate_court_order_summary(document_text: str) -> str:
+from utils.llm_client import get_llm_client
+from utils.summarizer import summarize_court_order
+from utils.rag_index import retrieval_context
+from utils.corpus_index import CorpusIndex, search_corpus
+
+def generate_court_order_summary(document_text: str, length: str = "medium") -> str:
     """
     Generate a clear and concise summary of a court order following specific format requirements.
-    Creates a 100-120 word summary covering essential elements.
+    Creates a 100-120 word summary covering essential elements ("short" and "long" give 60-80
+    and 200-250 words). Long judgments are summarised chunk by chunk, then combined.
     """
-    llm = OllamaLLM(model="llama3.1:8b")
-    
-    # Special prompt for court order summarization
-    prompt = f"""
-You are a legal document summarization expert. Create a clear and concise summary of the court order provided below.
+    return summarize_court_order(document_text, length)
 
-SUMMARIZATION REQUIREMENTS:
-- Generate a summary of 100-120 words that captures essential elements
-- Include details from the final judgement including fines, penalties, prison sentences with exact numbers
-- Mention any contingencies mentioned in the judgement
-- Cover any directions issued or acquittals
-- Use simple and understandable language
-- Focus on key facts: date, case number, parties, charges, court decision, and specific outcomes
+def _answer_prompt(data_text: str, question: str, index_dir: str = None, metadata: dict = None) -> str:
+    # Long documents: only the extracted details and the most relevant excerpts
+    data = retrieval_context(data_text, question, index_dir, metadata=metadata) or data_text
+    
+    # Create a prompt that includes the data and question
+    return f"""
+Based on the following data, please answer the question accurately. Only use information from the provided data.
 
-COURT ORDER DOCUMENT:
-{document_text}
+DATA:
+{data}
 
-EXAMPLE FORMAT (for reference):
-"On 2 February 2024, Bail Application No. 41 of 2024 filed by Ibrahim, aged 36 accused in Crime No. 922/2023 of Vengara Police Station. He is charged under Section 286 IPC and Sections 4(b) & 5 of the Explosive Substances Act, 1908. for allegedly conducting illegal quarrying and blasting granite without a license, endangering life and property. The court noted his ownership of the site, a pending similar offence, the need for proper investigation. Anticipatory bail was denied. but directions were issued for him to surrender within two weeks. after which his bail request could be considered on merits."
+QUESTION: {question}
 
-Please provide a summary following this style and format, ensuring it's clear, factual, and within 100-120 words:
+ANSWER: Please provide a clear, accurate answer based only on the information in the data above. If the answer cannot be found in the data, say "The information is not available in the provided data."
 """
-    
-    response = llm.invoke(prompt)
+
+def answer_from_data(data_text: str, question: str, index_dir: str = None, metadata: dict = None) -> str:
+    """
+    Answer questions based on provided data using Llama.
+    For long documents only the extracted details and the most relevant excerpts are sent
+    (see rag_index; index_dir is the document's saved index, e.g. output/<name>/rag_index,
+    metadata the extracted details, used when that index has to be rebuilt).
+    """
+    llm = get_llm_client()
+    response = llm.invoke(_answer_prompt(data_text, question, index_dir, metadata), temperature=0, label="qa")
     return response
 
-def answer_from_data(data_text: str, question: str) -> str:
+def answer_from_data_stream(data_text: str, question: str, index_dir: str = None,
+                            metadata: dict = None) -> Iterator[str]:
     """
-    Answer questions based on provided data using Llama
+    Same answer as answer_from_data, yielded token by token
     """
-    llm = OllamaLLM(model="llama3.1:8b")
-    
-    # Create a prompt that includes the data and question
+    return get_llm_client().stream(_answer_prompt(data_text, question, index_dir, metadata), temperature=0,
+                                   label="qa")
+
+def answer_from_corpus(question: str, filters: dict = None) -> str:
+    """
+    Answer a question across all processed documents (see corpus_index). filters narrow the
+    documents by state, court, date range (date_from/date_to) or statute.
+    """
+    _, hits = search_corpus(question, filters)
     prompt = f"""
-Based on the following data, please answer the question accurately. Only use information from the provided data.
+Below are excerpts from several processed court orders, grouped by document. Answer the question using only these excerpts.
+Name the documents (case number or court and date) that each part of your answer relies on. If the excerpts do not answer the question, say "The information is not available in the processed documents."
 
-DATA:
-{data_text}
+EXCERPTS:
+{CorpusIndex.format_context(hits)}
 
 QUESTION: {question}
 
-ANSWER: Please provide a clear, accurate answer based only on the information in the data above. If the answer cannot be found in the data, say "The information is not available in the provided data."
+ANSWER:
 """
-    
-    response = llm.invoke(prompt)
-    return response
+    return get_llm_client().invoke(prompt, temperature=0, label="corpus_qa")
+
+def _general_chat_prompt(question: str) -> str:
+    return f"""
+You are an expert legal AI assistant with comprehensive knowledge of Indian law, legal procedures, and case law. You provide helpful, accurate, and informative responses about legal topics.
+
+GUIDELINES:
+- Provide clear, accurate legal information
+- Reference relevant laws, acts, and sections when applicable
+- Explain legal concepts in simple terms
+- For case scenarios, provide step-by-step legal analysis
+- Always mention that this is for informational purposes and suggest consulting a qualified lawyer for specific legal advice
+- Be professional and helpful in your responses
+
+USER QUESTION: {question}
+
+LEGAL ASSISTANT RESPONSE:
+"""
+
+def general_legal_chat(question: str) -> str:
+    """
+    General legal chat for discussing legal concepts, case scenarios, and providing legal information.
+    Sampled at the model's default temperature, so not cached.
+    """
+    return get_llm_client().invoke(_general_chat_prompt(question), label="chat")
+
+def general_legal_chat_stream(question: str) -> Iterator[str]:
+    """
+    Same answer as general_legal_chat, yielded token by token
+    """
+    return get_llm_client().stream(_general_chat_prompt(question), label="chat")
 
 def interactive_qa_session():
     """
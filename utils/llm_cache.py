@@ -0,0 +1,194 @@
+"""
+LLM Response Cache
+Persistent cache in front of the shared LLM client, so summarising or querying the
+same document again returns the stored answer instead of re-running the model.
+
+Entries are keyed by the hash of (model, rendered prompt, temperature, options) and
+kept in a single SQLite file. The cache is bounded in size: once the stored responses
+exceed the limit, the least recently used ones are evicted. Triggers keep the running
+total of the stored sizes in a meta row, so an insert does not sum the whole table. Entries can optionally
+expire after a TTL. Only calls pinned to temperature 0 are cached: calls that sample
+(temperature > 0, or no temperature, which means the model default of 0.8 in Ollama)
+bypass the cache, since each of them is expected to produce a different answer.
+
+Environment:
+    LEGAL_LLM_CACHE          set to 0 to disable the cache
+    LEGAL_LLM_CACHE_DIR      cache directory (default <project>/output/.llm_cache)
+    LEGAL_LLM_CACHE_MAX_MB   size limit of the stored responses (default 256)
+    LEGAL_LLM_CACHE_TTL      seconds after which an entry expires (default 0: never)
+"""
+
+import os
+import json
+import time
+import sqlite3
+import hashlib
+import logging
+import threading
+from typing import Any, Dict, Optional
+
+logger = logging.getLogger(__name__)
+
+# Bump when the way prompts are rendered or responses are stored changes
+CACHE_FORMAT_VERSION = 1
+
+DEFAULT_CACHE_DIR = os.environ.get(
+    "LEGAL_LLM_CACHE_DIR",
+    os.path.join(os.path.dirname(os.path.dirname(os.path.abspath(__file__))), "output", ".llm_cache"))
+DEFAULT_MAX_BYTES = int(float(os.environ.get("LEGAL_LLM_CACHE_MAX_MB", "256")) * 1024 * 1024)
+DEFAULT_TTL = float(os.environ.get("LEGAL_LLM_CACHE_TTL", "0"))
+CACHE_ENABLED = os.environ.get("LEGAL_LLM_CACHE", "1").lower() not in ("0", "false", "no", "off")
+
+# Eviction trims down to this fraction of the limit, so it does not run on every insert
+EVICTION_TARGET = 0.9
+
+
+def response_cache_key(model: str, prompt: str, temperature: Optional[float],
+                       options: Optional[Dict[str, Any]] = None) -> str:
+    """SHA-256 of everything that determines a deterministic completion"""
+    options = {key: value for key, value in (options or {}).items() if key != 'temperature'}
+    payload = json.dumps({'format': CACHE_FORMAT_VERSION, 'model': model, 'prompt': prompt,
+                          'temperature': temperature, 'options': options},
+                         sort_keys=True, ensure_ascii=False, default=str)
+    return hashlib.sha256(payload.encode('utf-8')).hexdigest()
+
+
+def is_cacheable(temperature: Optional[float]) -> bool:
+    """Only greedy (temperature 0) calls are cached; None leaves sampling to the model default"""
+    return temperature is not None and temperature <= 0
+
+
+class LLMResponseCache:
+    """Size-bounded LRU cache of LLM responses in a SQLite file"""
+
+    def __init__(self, cache_dir: str = DEFAULT_CACHE_DIR, max_bytes: int = DEFAULT_MAX_BYTES,
+                 ttl_seconds: float = DEFAULT_TTL):
+        self.cache_dir = cache_dir
+        self.path = os.path.join(cache_dir, "responses.sqlite")
+        self.max_bytes = max_bytes
+        self.ttl_seconds = ttl_seconds
+        self.hits = 0
+        self.misses = 0
+        self.bypassed = 0
+        self.expired = 0
+        self.evictions = 0
+        self._lock = threading.Lock()
+        self._connection: Optional[sqlite3.Connection] = None
+        self._pid = None
+
+    def _db(self) -> sqlite3.Connection:
+        # A connection must not be shared with forked children, so reopen per process
+        if self._connection is None or self._pid != os.getpid():
+            os.makedirs(self.cache_dir, exist_ok=True)
+            self._connection = sqlite3.connect(self.path, timeout=30, check_same_thread=False,
+                                               isolation_level=None)
+            self._connection.execute("PRAGMA journal_mode=WAL")
+            # Rows replaced by INSERT OR REPLACE only fire the delete trigger with this on
+            self._connection.execute("PRAGMA recursive_triggers=ON")
+            self._create_schema(self._connection)
+            self._pid = os.getpid()
+        return self._connection
+
+    @staticmethod
+    def _create_schema(db: sqlite3.Connection):
+        db.execute("BEGIN IMMEDIATE")
+        try:
+            db.execute("CREATE TABLE IF NOT EXISTS responses (key TEXT PRIMARY KEY, model TEXT, response TEXT, "
+                       "size INTEGER, created REAL, accessed REAL)")
+            db.execute("CREATE INDEX IF NOT EXISTS responses_accessed ON responses (accessed)")
+            # Running total of the stored sizes (seeded from caches written before it existed)
+            db.execute("CREATE TABLE IF NOT EXISTS cache_meta (name TEXT PRIMARY KEY, value INTEGER)")
+            db.execute("INSERT OR IGNORE INTO cache_meta SELECT 'total_size', COALESCE(SUM(size), 0) FROM responses")
+            db.execute("CREATE TRIGGER IF NOT EXISTS responses_size_insert AFTER INSERT ON responses BEGIN "
+                       "UPDATE cache_meta SET value = value + NEW.size WHERE name = 'total_size'; END")
+            db.execute("CREATE TRIGGER IF NOT EXISTS responses_size_delete AFTER DELETE ON responses BEGIN "
+                       "UPDATE cache_meta SET value = value - OLD.size WHERE name = 'total_size'; END")
+            db.execute("CREATE TRIGGER IF NOT EXISTS responses_size_update AFTER UPDATE OF size ON responses BEGIN "
+                       "UPDATE cache_meta SET value = value + NEW.size - OLD.size WHERE name = 'total_size'; END")
+            db.execute("COMMIT")
+        except sqlite3.Error:
+            db.execute("ROLLBACK")
+            raise
+
+    def total_bytes(self) -> int:
+        """Size of the stored responses"""
+        with self._lock:
+            return self._total_bytes(self._db())
+
+    @staticmethod
+    def _total_bytes(db: sqlite3.Connection) -> int:
+        row = db.execute("SELECT value FROM cache_meta WHERE name = 'total_size'").fetchone()
+        return row[0] if row else 0
+
+    def get(self, key: str) -> Optional[str]:
+        """Stored response, or None if missing or expired"""
+        now = time.time()
+        with self._lock:
+            try:
+                db = self._db()
+                row = db.execute("SELECT response, created FROM responses WHERE key = ?", (key,)).fetchone()
+                if row is None:
+                    self.misses += 1
+                    return None
+                response, created = row
+                if self.ttl_seconds and now - created > self.ttl_seconds:
+                    db.execute("DELETE FROM responses WHERE key = ?", (key,))
+                    self.expired += 1
+                    self.misses += 1
+                    return None
+                db.execute("UPDATE responses SET accessed = ? WHERE key = ?", (now, key))
+            except sqlite3.Error as e:
+                logger.warning(f"LLM cache read failed ({self.path}): {e}")
+                self.misses += 1
+                return None
+            self.hits += 1
+            return response
+
+    def put(self, key: str, model: str, response: str):
+        """Store a response, evicting the least recently used entries beyond the size limit"""
+        now = time.time()
+        size = len(response.encode('utf-8'))
+        with self._lock:
+            try:
+                db = self._db()
+                db.execute("INSERT OR REPLACE INTO responses VALUES (?, ?, ?, ?, ?, ?)",
+                           (key, model, response, size, now, now))
+                total = self._total_bytes(db)
+                if total > self.max_bytes:
+                    self._evict(db, total)
+            except sqlite3.Error as e:
+                logger.warning(f"LLM cache write failed ({self.path}): {e}")
+
+    def _evict(self, db: sqlite3.Connection, total: int):
+        target = self.max_bytes * EVICTION_TARGET
+        doomed = []
+        for key, size in db.execute("SELECT key, size FROM responses ORDER BY accessed"):
+            if total <= target:
+                break
+            doomed.append((key,))
+            total -= size
+        db.executemany("DELETE FROM responses WHERE key = ?", doomed)
+        self.evictions += len(doomed)
+
+    def record_bypass(self):
+        with self._lock:
+            self.bypassed += 1
+
+    def clear(self):
+        with self._lock:
+            try:
+                self._db().execute("DELETE FROM responses")
+            except sqlite3.Error as e:
+                logger.warning(f"LLM cache clear failed ({self.path}): {e}")
+
+    def stats(self) -> Dict[str, Any]:
+        with self._lock:
+            lookups = self.hits + self.misses
+            return {
+                'hits': self.hits,
+                'misses': self.misses,
+                'bypassed': self.bypassed,
+                'expired': self.expired,
+                'evictions': self.evictions,
+                'hit_rate': round(self.hits / lookups, 3) if lookups else 0.0,
+            }
@@ -0,0 +1,248 @@
+"""
+Shared Ollama LLM Client
+One client per process for every LLaMA call (summaries, document Q&A, general chat,
+metadata fallback extraction).
+
+- The underlying ollama.Client keeps a pooled HTTP connection to the Ollama server,
+  instead of each call building a new OllamaLLM with its own connection.
+- Every request carries keep_alive (LEGAL_LLM_KEEP_ALIVE, default 30m) so the model
+  stays loaded on the server between sporadic requests; warmup() loads it up front
+  when a worker starts.
+- Each call records its latency plus the timings Ollama reports (model load time,
+  prompt and generated token counts), available per call site through metrics().
+- Deterministic calls (temperature=0) are answered from the persistent response
+  cache in llm_cache.py when the same prompt was seen before. Calls without a
+  temperature sample at the model's default and always go to the model.
+
+Environment:
+    LEGAL_LLM_MODEL        model name (default llama3.1:8b)
+    LEGAL_LLM_KEEP_ALIVE   how long Ollama keeps the model loaded after a request (default 30m)
+    LEGAL_LLM_TIMEOUT      request timeout in seconds (default 300)
+    OLLAMA_HOST            Ollama server address (read by the ollama client)
+"""
+
+import os
+import time
+import threading
+from collections import deque
+from typing import Any, Deque, Dict, Iterator, Optional
+
+from .llm_cache import CACHE_ENABLED, LLMResponseCache, is_cacheable, response_cache_key
+
+DEFAULT_MODEL = os.environ.get("LEGAL_LLM_MODEL", "llama3.1:8b")
+DEFAULT_KEEP_ALIVE = os.environ.get("LEGAL_LLM_KEEP_ALIVE", "30m")
+DEFAULT_TIMEOUT = float(os.environ.get("LEGAL_LLM_TIMEOUT", "300"))
+
+# A call whose model load took longer than this is counted as a cold start
+COLD_LOAD_SECONDS = 1.0
+LATENCY_WINDOW = 512
+
+
+def _field(response: Any, name: str) -> Any:
+    """Read a field from an ollama response (dict in older clients, model object in newer ones)"""
+    if isinstance(response, dict):
+        return response.get(name)
+    return getattr(response, name, None)
+
+
+class CallStats:
+    """Latency counters for one call site"""
+
+    def __init__(self):
+        self.calls = 0
+        self.errors = 0
+        self.cold_loads = 0
+        self.total_seconds = 0.0
+        self.load_seconds = 0.0
+        self.prompt_tokens = 0
+        self.output_tokens = 0
+        self.latencies: Deque[float] = deque(maxlen=LATENCY_WINDOW)
+
+    def record(self, seconds: float, response: Any = None, error: bool = False):
+        self.calls += 1
+        self.total_seconds += seconds
+        self.latencies.append(seconds)
+        if error:
+            self.errors += 1
+        if response is None:
+            return
+        load_seconds = (_field(response, 'load_duration') or 0) / 1e9
+        self.load_seconds += load_seconds
+        if load_seconds > COLD_LOAD_SECONDS:
+            self.cold_loads += 1
+        self.prompt_tokens += _field(response, 'prompt_eval_count') or 0
+        self.output_tokens += _field(response, 'eval_count') or 0
+
+    def to_dict(self) -> Dict[str, Any]:
+        ordered = sorted(self.latencies)
+
+        def percentile(fraction: float) -> float:
+            return round(ordered[min(len(ordered) - 1, int(fraction * len(ordered)))], 3) if ordered else 0.0
+
+        return {
+            'calls': self.calls,
+            'errors': self.errors,
+            'cold_loads': self.cold_loads,
+            'avg_seconds': round(self.total_seconds / self.calls, 3) if self.calls else 0.0,
+            'p50_seconds': percentile(0.50),
+            'p95_seconds': percentile(0.95),
+            'load_seconds': round(self.load_seconds, 3),
+            'prompt_tokens': self.prompt_tokens,
+            'output_tokens': self.output_tokens,
+        }
+
+
+class LLMClient:
+    """Pooled, keep-alive Ollama client with per-call latency metrics"""
+
+    def __init__(self, model: str = DEFAULT_MODEL, host: Optional[str] = None,
+                 keep_alive: str = DEFAULT_KEEP_ALIVE, timeout: float = DEFAULT_TIMEOUT,
+                 options: Optional[Dict[str, Any]] = None, cache: Optional[LLMResponseCache] = None):
+        self.model = model
+        self.host = host
+        self.keep_alive = keep_alive
+        self.timeout = timeout
+        self.options = dict(options or {})
+        self.cache = cache
+        self._client = None
+        self._lock = threading.Lock()
+        self._stats: Dict[str, CallStats] = {}
+
+    @property
+    def client(self):
+        """ollama.Client, created on first use (holds the pooled HTTP connection)"""
+        if self._client is None:
+            with self._lock:
+                if self._client is None:
+                    from ollama import Client  # type: ignore
+                    self._client = Client(host=self.host, timeout=self.timeout)
+        return self._client
+
+    def _options(self, temperature: Optional[float], options: Optional[Dict[str, Any]]) -> Dict[str, Any]:
+        merged = dict(self.options)
+        merged.update(options or {})
+        if temperature is not None:
+            merged['temperature'] = temperature
+        return merged
+
+    def _cache_key(self, prompt: str, options: Dict[str, Any], use_cache: bool) -> Optional[str]:
+        """Cache key for a call, or None when the call must go to the model"""
+        if self.cache is None or not use_cache:
+            return None
+        if not is_cacheable(options.get('temperature')):
+            self.cache.record_bypass()
+            return None
+        return response_cache_key(self.model, prompt, options.get('temperature'), options)
+
+    def _record(self, label: str, seconds: float, response: Any = None, error: bool = False):
+        with self._lock:
+            self._stats.setdefault(label, CallStats()).record(seconds, response, error)
+
+    def invoke(self, prompt: str, temperature: Optional[float] = None, options: Optional[Dict[str, Any]] = None,
+               label: str = "generate", use_cache: bool = True) -> str:
+        """Generate a completion for the prompt (same call shape as OllamaLLM.invoke)"""
+        options = self._options(temperature, options)
+        key = self._cache_key(prompt, options, use_cache)
+        if key is not None:
+            cached = self.cache.get(key)
+            if cached is not None:
+                return cached
+        started = time.perf_counter()
+        try:
+            response = self.client.generate(model=self.model, prompt=prompt, options=options,
+                                            keep_alive=self.keep_alive)
+        except Exception:
+            self._record(label, time.perf_counter() - started, error=True)
+            raise
+        self._record(label, time.perf_counter() - started, response)
+        text = _field(response, 'response') or ""
+        if key is not None and text:
+            self.cache.put(key, self.model, text)
+        return text
+
+    def stream(self, prompt: str, temperature: Optional[float] = None, options: Optional[Dict[str, Any]] = None,
+               label: str = "generate", use_cache: bool = True) -> Iterator[str]:
+        """Yield the completion token by token as Ollama produces it (a cached answer comes in one piece)"""
+        options = self._options(temperature, options)
+        key = self._cache_key(prompt, options, use_cache)
+        if key is not None:
+            cached = self.cache.get(key)
+            if cached is not None:
+                yield cached
+                return
+        started = time.perf_counter()
+        final = None
+        tokens = []
+        try:
+            for chunk in self.client.generate(model=self.model, prompt=prompt, stream=True, options=options,
+                                              keep_alive=self.keep_alive):
+                if _field(chunk, 'done'):
+                    final = chunk
+                token = _field(chunk, 'response')
+                if token:
+                    tokens.append(token)
+                    yield token
+        except Exception:
+            self._record(label, time.perf_counter() - started, error=True)
+            raise
+        self._record(label, time.perf_counter() - started, final)
+        if key is not None and final is not None and tokens:
+            self.cache.put(key, self.model, "".join(tokens))
+
+    def warmup(self) -> bool:
+        """Load the model on the Ollama server (an empty prompt only loads it); False if unreachable"""
+        started = time.perf_counter()
+        try:
+            response = self.client.generate(model=self.model, prompt="", keep_alive=self.keep_alive)
+        except Exception:
+            self._record('warmup', time.perf_counter() - started, error=True)
+            return False
+        self._record('warmup', time.perf_counter() - started, response)
+        return True
+
+    def warmup_in_background(self) -> threading.Thread:
+        """Start warmup() on a daemon thread so worker start-up does not wait for the model load"""
+        thread = threading.Thread(target=self.warmup, name="llm-warmup", daemon=True)
+        thread.start()
+        return thread
+
+    def metrics(self) -> Dict[str, Any]:
+        """Latency metrics per call site, plus totals over all of them"""
+        with self._lock:
+            per_label = {label: stats.to_dict() for label, stats in self._stats.items()}
+            total = CallStats()
+            for stats in self._stats.values():
+                total.calls += stats.calls
+                total.errors += stats.errors
+                total.cold_loads += stats.cold_loads
+                total.total_seconds += stats.total_seconds
+                total.load_seconds += stats.load_seconds
+                total.prompt_tokens += stats.prompt_tokens
+                total.output_tokens += stats.output_tokens
+                total.latencies.extend(stats.latencies)
+        metrics = {'model': self.model, 'keep_alive': self.keep_alive,
+                   'total': total.to_dict(), 'calls': per_label}
+        if self.cache is not None:
+            metrics['cache'] = self.cache.stats()
+        return metrics
+
+
+_CLIENTS: Dict[str, LLMClient] = {}
+_CLIENTS_LOCK = threading.Lock()
+_CACHE: Optional[LLMResponseCache] = None
+
+
+def get_llm_client(model: Optional[str] = None) -> LLMClient:
+    """Process-wide client for a model, created on first use"""
+    global _CACHE
+    model = model or DEFAULT_MODEL
+    client = _CLIENTS.get(model)
+    if client is None:
+        with _CLIENTS_LOCK:
+            client = _CLIENTS.get(model)
+            if client is None:
+                # One response cache per process, shared by every model (the model is part of the key)
+                if _CACHE is None and CACHE_ENABLED:
+                    _CACHE = LLMResponseCache()
+                client = _CLIENTS[model] = LLMClient(model, cache=_CACHE)
+    return client
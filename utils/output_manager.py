@@ -4,6 +4,7 @@ import shutil
 from datetime import datetime
 from pathlib import Path
 from typing import Dict, Any, Optional
+from metadata.output_formatter import format_structured_output
 
 class OutputManager:
     """Centralized output management for all processing phases"""
@@ -93,11 +94,8 @@ class OutputManager:
                 f.write(text_output)
             saved_files['extraction_report'] = text_file
             
-            # Use the enhanced professional structured output from metadata_extractor
-            # Import the MetaDataExtractor to use its enhanced formatting
-            from metadata.metadata_extractor import MetaDataExtractor
-            temp_extractor = MetaDataExtractor(use_gpu=False, debug=False)
-            structured_output = temp_extractor.format_structured_output(metadata_results)
+            # Use the enhanced professional structured output (model-free formatter)
+            structured_output = format_structured_output(metadata_results)
             
             json_file = os.path.join(output_dir, f"{filename_prefix}.json")
             with open(json_file, 'w', encoding='utf-8') as f:
@@ -133,9 +131,7 @@ class OutputManager:
     def _format_metadata_output(self, results: Dict[str, Any]) -> str:
         """Format extraction results in the exact format specified"""
         # Get the structured output for detailed information
-        from metadata.metadata_extractor import MetaDataExtractor
-        temp_extractor = MetaDataExtractor(use_gpu=False, debug=False)
-        structured_data = temp_extractor.format_structured_output(results)
+        structured_data = format_structured_output(results)
         
         output = "🤖 Court Order Extraction Report\n"
         output += "=" * 50 + "\n\n"
@@ -0,0 +1,330 @@
+"""
+Document RAG Index
+Per-document retrieval index for question answering, so a question about a long
+judgment sends LLaMA only the paragraphs that matter instead of the whole text.
+
+At ingest the document is cut into paragraph chunks, the chunks are embedded with a
+small CPU-friendly SentenceTransformer model and the vectors go into a FAISS index
+(exact inner-product search; IVF once a document has thousands of chunks). The
+index is saved next to the other outputs of the document. At question time the
+top-k chunks, together with the extracted metadata, make up the prompt's data, so
+the prompt size no longer grows with the document.
+
+Short documents are still sent whole. Without sentence-transformers the callers fall
+back to the full text; without FAISS the saved embeddings are searched directly.
+
+Layout:
+    <output_dir>/rag_index/manifest.json    text hash, embedding model, chunks, metadata
+    <output_dir>/rag_index/embeddings.npy   normalised chunk embeddings (float32)
+    <output_dir>/rag_index/index.faiss      FAISS index over the embeddings
+
+Environment:
+    LEGAL_RAG_MODEL    embedding model (default all-MiniLM-L6-v2)
+    LEGAL_RAG_TOP_K    chunks sent per question (default 5)
+"""
+
+import os
+import re
+import json
+import hashlib
+import logging
+import importlib.util
+import threading
+from collections import OrderedDict
+from typing import Any, Dict, List, Optional, Tuple
+
+logger = logging.getLogger(__name__)
+
+try:
+    import numpy as np
+    NUMPY_AVAILABLE = True
+except ImportError:
+    NUMPY_AVAILABLE = False
+
+try:
+    import faiss  # type: ignore
+    FAISS_AVAILABLE = True
+except ImportError:
+    FAISS_AVAILABLE = False
+
+# sentence_transformers pulls in torch and transformers (seconds of start-up), so it is only
+# looked up here and imported when an embedder is first needed
+EMBEDDINGS_AVAILABLE = NUMPY_AVAILABLE and importlib.util.find_spec("sentence_transformers") is not None
+
+INDEX_DIRNAME = "rag_index"
+INDEX_FORMAT_VERSION = 1
+EMBEDDING_MODEL = os.environ.get("LEGAL_RAG_MODEL", "all-MiniLM-L6-v2")
+TOP_K = int(os.environ.get("LEGAL_RAG_TOP_K", "5"))
+
+CHUNK_CHARS = 800
+# Documents up to this size are answered from the full text
+FULL_TEXT_CHARS = 6000
+# Exact search is fast enough for any single document below this many chunks
+IVF_MIN_CHUNKS = 4096
+MEMO_SIZE = 8
+
+_WHITESPACE = re.compile(r'\s+')
+# Blank lines, or a newline followed by a numbered paragraph ("12." / "(iv)")
+_PARAGRAPH_BREAK = re.compile(r'\n\s*\n|\n(?=\s*(?:\d{1,3}\.|\([ivxlc]+\))\s)')
+_SENTENCE_BREAK = re.compile(r'(?<=[.;:])\s+')
+_MISSING = {"", "not found", "none", "null", "n/a"}
+
+
+def text_hash(text: str) -> str:
+    """SHA-256 of the text with whitespace runs collapsed (identifies the document an index belongs to)"""
+    return hashlib.sha256(_WHITESPACE.sub(' ', text).strip().encode('utf-8')).hexdigest()
+
+
+def chunk_document(text: str, max_chars: int = CHUNK_CHARS) -> List[Tuple[int, str]]:
+    """Paragraph chunks of at most max_chars as (start offset, text); short paragraphs are merged"""
+    chunks: List[Tuple[int, str]] = []
+    current_start, current = 0, ""
+    position = 0
+    boundaries = [(match.start(), match.end()) for match in _PARAGRAPH_BREAK.finditer(text)] + [(len(text), len(text))]
+    for end, next_start in boundaries:
+        paragraph = _WHITESPACE.sub(' ', text[position:end]).strip()
+        start, position = position, next_start
+        if not paragraph:
+            continue
+        pieces = [paragraph]
+        if len(paragraph) > max_chars:
+            # Long paragraphs are cut on sentence boundaries (hard cut for run-on OCR text)
+            pieces, piece = [], ""
+            for sentence in _SENTENCE_BREAK.split(paragraph):
+                while len(sentence) > max_chars:
+                    pieces.append(sentence[:max_chars])
+                    sentence = sentence[max_chars:]
+                if piece and len(piece) + len(sentence) + 1 > max_chars:
+                    pieces.append(piece)
+                    piece = ""
+                piece = f"{piece} {sentence}" if piece else sentence
+            if piece:
+                pieces.append(piece)
+        for piece in pieces:
+            if current and len(current) + len(piece) + 1 > max_chars:
+                chunks.append((current_start, current))
+                current = ""
+            if not current:
+                current_start = start
+            current = f"{current}\n{piece}" if current else piece
+    if current:
+        chunks.append((current_start, current))
+    return chunks
+
+
+def flatten_metadata(metadata: Optional[Dict[str, Any]]) -> Dict[str, str]:
+    """{field: value} from extract() style ({'value': ...}) or plain metadata, without missing fields"""
+    flat = {}
+    for field, value in (metadata or {}).items():
+        if isinstance(value, dict) and 'value' in value:
+            value = value['value']
+        if isinstance(value, (list, tuple)):
+            value = "; ".join(str(item) for item in value if item)
+        elif isinstance(value, dict):
+            value = json.dumps(value, ensure_ascii=False)
+        if value is None or str(value).strip().lower() in _MISSING:
+            continue
+        flat[field] = str(value)
+    return flat
+
+
+_EMBEDDER = None
+_EMBEDDER_LOCK = threading.Lock()
+
+
+def get_embedder():
+    """Process-wide SentenceTransformer on CPU, or None when it cannot be loaded"""
+    global _EMBEDDER
+    if not EMBEDDINGS_AVAILABLE:
+        return None
+    if _EMBEDDER is None:
+        with _EMBEDDER_LOCK:
+            if _EMBEDDER is None:
+                try:
+                    from sentence_transformers import SentenceTransformer  # type: ignore
+                    _EMBEDDER = SentenceTransformer(EMBEDDING_MODEL, device="cpu")
+                except Exception as e:
+                    logger.warning(f"Could not load embedding model {EMBEDDING_MODEL}: {e}")
+                    _EMBEDDER = False
+    return _EMBEDDER or None
+
+
+def embed(texts: List[str], embedder=None):
+    """Normalised float32 embeddings of the texts (rows)"""
+    embedder = embedder or get_embedder()
+    vectors = embedder.encode(texts, batch_size=32, normalize_embeddings=True, show_progress_bar=False)
+    return np.asarray(vectors, dtype=np.float32)
+
+
+def _faiss_index(embeddings):
+    """Inner-product FAISS index (cosine similarity on normalised vectors); IVF for very long documents"""
+    dimension = embeddings.shape[1]
+    if len(embeddings) < IVF_MIN_CHUNKS:
+        index = faiss.IndexFlatIP(dimension)
+    else:
+        nlist = int(4 * len(embeddings) ** 0.5)
+        index = faiss.IndexIVFFlat(faiss.IndexFlatIP(dimension), dimension, nlist, faiss.METRIC_INNER_PRODUCT)
+        index.train(embeddings)
+        index.nprobe = min(nlist, 16)
+    index.add(embeddings)
+    return index
+
+
+class DocumentIndex:
+    """Chunks of one document with their embeddings and search index"""
+
+    def __init__(self, doc_hash: str, model: str, chunks: List[Tuple[int, str]], embeddings,
+                 metadata: Optional[Dict[str, str]] = None, index=None):
+        self.doc_hash = doc_hash
+        self.model = model
+        self.chunks = chunks
+        self.embeddings = embeddings
+        self.metadata = metadata or {}
+        self.index = index
+        if self.index is None and FAISS_AVAILABLE and len(chunks):
+            self.index = _faiss_index(embeddings)
+
+    @classmethod
+    def build(cls, text: str, metadata: Optional[Dict[str, Any]] = None, embedder=None) -> Optional["DocumentIndex"]:
+        """Chunk and embed a document; None when no embedding model is available"""
+        embedder = embedder or get_embedder()
+        if embedder is None:
+            return None
+        chunks = chunk_document(text)
+        if not chunks:
+            return None
+        embeddings = embed([chunk for _, chunk in chunks], embedder)
+        return cls(text_hash(text), EMBEDDING_MODEL, chunks, embeddings, flatten_metadata(metadata))
+
+    def search(self, question: str, k: int = TOP_K) -> List[Tuple[int, str, float]]:
+        """Top-k chunks for the question as (start offset, text, score), in document order"""
+        k = min(k, len(self.chunks))
+        if k == 0:
+            return []
+        query = embed([question])
+        if self.index is not None:
+            scores, ids = self.index.search(query, k)
+            hits = [(int(i), float(s)) for i, s in zip(ids[0], scores[0]) if i >= 0]
+        else:
+            similarities = self.embeddings @ query[0]
+            top = np.argsort(-similarities)[:k]
+            hits = [(int(i), float(similarities[i])) for i in top]
+        return [(self.chunks[i][0], self.chunks[i][1], score) for i, score in sorted(hits)]
+
+    def context(self, question: str, k: int = TOP_K) -> str:
+        """Extracted details plus the top-k excerpts, formatted as the data of a Q&A prompt"""
+        parts = []
+        if self.metadata:
+            parts.append("EXTRACTED DETAILS:\n" + "\n".join(f"- {field}: {value}" for field, value in self.metadata.items()))
+        excerpts = [f"[Excerpt {n}] {chunk}" for n, (_, chunk, _) in enumerate(self.search(question, k), 1)]
+        parts.append("RELEVANT EXCERPTS FROM THE DOCUMENT:\n" + "\n\n".join(excerpts))
+        return "\n\n".join(parts)
+
+    def save(self, directory: str):
+        """Write the index files (manifest last, so a half-written index is never picked up)"""
+        os.makedirs(directory, exist_ok=True)
+        np.save(os.path.join(directory, "embeddings.npy"), self.embeddings)
+        if self.index is not None:
+            faiss.write_index(self.index, os.path.join(directory, "index.faiss"))
+        manifest = {
+            'format': INDEX_FORMAT_VERSION,
+            'text_hash': self.doc_hash,
+            'model': self.model,
+            'chunks': [{'start': start, 'text': chunk} for start, chunk in self.chunks],
+            'metadata': self.metadata,
+        }
+        temp_path = os.path.join(directory, "manifest.json.tmp")
+        with open(temp_path, 'w', encoding='utf-8') as f:
+            json.dump(manifest, f, ensure_ascii=False)
+        os.replace(temp_path, os.path.join(directory, "manifest.json"))
+
+    @classmethod
+    def load(cls, directory: str, doc_hash: Optional[str] = None) -> Optional["DocumentIndex"]:
+        """Saved index, or None if missing, built with another model or (given doc_hash) for another text"""
+        if not NUMPY_AVAILABLE:
+            return None
+        try:
+            with open(os.path.join(directory, "manifest.json"), 'r', encoding='utf-8') as f:
+                manifest = json.load(f)
+            if manifest.get('format') != INDEX_FORMAT_VERSION or manifest.get('model') != EMBEDDING_MODEL:
+                return None
+            if doc_hash is not None and manifest.get('text_hash') != doc_hash:
+                return None
+            embeddings = np.load(os.path.join(directory, "embeddings.npy"))
+            index = None
+            faiss_path = os.path.join(directory, "index.faiss")
+            if FAISS_AVAILABLE and os.path.exists(faiss_path):
+                index = faiss.read_index(faiss_path)
+        except (OSError, ValueError, RuntimeError) as e:
+            logger.warning(f"Could not load RAG index {directory}: {e}")
+            return None
+        chunks = [(chunk['start'], chunk['text']) for chunk in manifest['chunks']]
+        return cls(manifest['text_hash'], manifest['model'], chunks, embeddings, manifest.get('metadata'), index)
+
+    @staticmethod
+    def saved_metadata(directory: str) -> Dict[str, str]:
+        """Extracted details stored with a saved index, whatever text or model it was built for"""
+        try:
+            with open(os.path.join(directory, "manifest.json"), 'r', encoding='utf-8') as f:
+                return json.load(f).get('metadata') or {}
+        except (OSError, ValueError, AttributeError):
+            return {}
+
+
+_MEMO: "OrderedDict[str, DocumentIndex]" = OrderedDict()
+_MEMO_LOCK = threading.Lock()
+
+
+def build_document_index(output_dir: str, text: str, metadata: Optional[Dict[str, Any]] = None) -> Optional[str]:
+    """Ingest step: build and save the index of a document in its output folder; returns the index directory"""
+    if not EMBEDDINGS_AVAILABLE or len(text) <= FULL_TEXT_CHARS:
+        return None
+    directory = os.path.join(output_dir, INDEX_DIRNAME)
+    try:
+        index = DocumentIndex.build(text, metadata)
+        if index is None:
+            return None
+        index.save(directory)
+    except Exception as e:
+        logger.warning(f"Could not build RAG index for {output_dir}: {e}")
+        return None
+    return directory
+
+
+def load_or_build_index(text: str, index_dir: Optional[str] = None,
+                        metadata: Optional[Dict[str, Any]] = None) -> Optional[DocumentIndex]:
+    """
+    Index for a document: memoised in this process, else loaded from index_dir, else built in memory.
+    A rebuilt index carries metadata, or else the details saved with the stale index in index_dir;
+    it is never written over index_dir, which only the ingest step (build_document_index) fills.
+    """
+    doc_hash = text_hash(text)
+    with _MEMO_LOCK:
+        index = _MEMO.get(doc_hash)
+        if index is not None:
+            _MEMO.move_to_end(doc_hash)
+            return index
+    index = DocumentIndex.load(index_dir, doc_hash) if index_dir else None
+    if index is None:
+        if not metadata and index_dir:
+            metadata = DocumentIndex.saved_metadata(index_dir)
+        index = DocumentIndex.build(text, metadata)
+    if index is not None:
+        with _MEMO_LOCK:
+            _MEMO[doc_hash] = index
+            while len(_MEMO) > MEMO_SIZE:
+                _MEMO.popitem(last=False)
+    return index
+
+
+def retrieval_context(text: str, question: str, index_dir: Optional[str] = None, k: int = TOP_K,
+                      metadata: Optional[Dict[str, Any]] = None) -> Optional[str]:
+    """Prompt data for a question: details plus top-k excerpts, or None to use the full text"""
+    if len(text) <= FULL_TEXT_CHARS or not EMBEDDINGS_AVAILABLE:
+        return None
+    try:
+        index = load_or_build_index(text, index_dir, metadata)
+        return index.context(question, k) if index is not None else None
+    except Exception as e:
+        logger.warning(f"RAG retrieval failed, using the full text: {e}")
+        return None
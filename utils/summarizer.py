@@ -0,0 +1,235 @@
+"""
+Court Order Summarizer
+Summaries in the 100-120 word house style, for documents of any length.
+
+Short orders are summarised in a single prompt. Longer judgments would overflow the
+model's context window (and prefill time grows with the prompt), so they are
+summarised map-reduce style:
+
+    split   the text is cut into chunks on zone boundaries (JUDGMENT, ORDER, FACTS,
+            "In the result", ...) and paragraph boundaries, never mid-paragraph unless
+            a single paragraph is longer than a chunk
+    map     each chunk is condensed into factual notes; chunks run concurrently
+    reduce  the notes, in document order, are written up as the final summary (notes
+            that are themselves too long are first combined in groups)
+
+Every step runs at temperature 0, so it is reproducible and cached. Chunk prompts do
+not depend on the requested summary length, so their answers come from the LLM
+response cache when a document is summarised again with another length, and only
+the reduce step runs.
+"""
+
+import os
+import re
+import threading
+from concurrent.futures import ThreadPoolExecutor
+from typing import Callable, Iterator, List, Optional
+
+from .llm_client import get_llm_client
+
+# progress(stage, done, total), called from worker threads as map/reduce calls finish
+Progress = Callable[[str, int, int], None]
+
+# Sized for Ollama's default context window: a chunk plus the prompt stays well under it
+CHUNK_CHARS = 4000
+SINGLE_PASS_CHARS = 4500
+# A zone heading only starts a new chunk if the current one already has this much text
+MIN_CHUNK_CHARS = 1000
+MAP_WORKERS = int(os.environ.get("LEGAL_LLM_MAP_WORKERS", "4"))
+
+SUMMARY_LENGTHS = {'short': '60-80', 'medium': '100-120', 'long': '200-250'}
+
+_ZONE_HEADING = re.compile(
+    r'^[ \t]*(?:J\s?U\s?D\s?G\s?M\s?E\s?N\s?T|(?:COMMON\s+|FINAL\s+|ORAL\s+)?O\s?R\s?D\s?E\s?R|'
+    r'FACTS(?:\s+OF\s+THE\s+CASE)?|BACKGROUND|SUBMISSIONS?|ARGUMENTS?|DISCUSSION|ANALYSIS|FINDINGS?|'
+    r'CONCLUSIONS?|In\s+the\s+result|In\s+view\s+of\s+the\s+(?:above|foregoing)|'
+    r'For\s+the\s+(?:foregoing|aforesaid|above)\s+reasons)\b',
+    re.MULTILINE)
+# Blank lines, or the start of a numbered paragraph ("12. ", "(iv) ")
+_PARAGRAPH_BREAK = re.compile(r'\n[ \t]*\n|\n(?=[ \t]*(?:\d{1,3}\.|\([ivxlc]+\)|\(\d{1,3}\))[ \t])')
+_SENTENCE_BREAK = re.compile(r'(?<=[.;:])\s+')
+
+SUMMARY_PROMPT = """
+You are a legal document summarization expert. Create a clear and concise summary of the court order provided below.
+
+SUMMARIZATION REQUIREMENTS:
+- Generate a summary of {words} words that captures essential elements
+- Include details from the final judgement including fines, penalties, prison sentences with exact numbers
+- Mention any contingencies mentioned in the judgement
+- Cover any directions issued or acquittals
+- Use simple and understandable language
+- Focus on key facts: date, case number, parties, charges, court decision, and specific outcomes
+
+{heading}:
+{document}
+
+EXAMPLE FORMAT (for reference):
+"On 2 February 2024, Bail Application No. 41 of 2024 filed by Ibrahim, aged 36 accused in Crime No. 922/2023 of Vengara Police Station. He is charged under Section 286 IPC and Sections 4(b) & 5 of the Explosive Substances Act, 1908. for allegedly conducting illegal quarrying and blasting granite without a license, endangering life and property. The court noted his ownership of the site, a pending similar offence, the need for proper investigation. Anticipatory bail was denied. but directions were issued for him to surrender within two weeks. after which his bail request could be considered on merits."
+
+Please provide a summary following this style and format, ensuring it's clear, factual, and within {words} words:
+"""
+
+CHUNK_PROMPT = """
+You are a legal document analyst. Below is part {index} of {total} of a court judgment.
+
+Write factual notes of at most 120 words on what this part contains: case number, date, court, judge, parties,
+charges and sections, key facts, arguments, and any decision, sentence, fine, penalty, direction, acquittal or
+contingency. Keep exact names, dates and numbers. Leave out anything that is not in this part and add no commentary.
+
+PART {index} OF {total}:
+{chunk}
+
+NOTES:
+"""
+
+COMBINE_PROMPT = """
+You are a legal document analyst. Below are notes on consecutive parts of one court judgment, in document order.
+
+Merge them into a single set of factual notes of at most 200 words. Keep every decision, sentence, fine, penalty,
+direction, acquittal and contingency with exact names, dates and numbers; drop repetition.
+
+NOTES:
+{notes}
+
+MERGED NOTES:
+"""
+
+
+def _paragraphs(zone: str) -> List[str]:
+    """Paragraphs of a zone; paragraphs longer than a chunk are cut on sentence boundaries"""
+    paragraphs = []
+    for paragraph in _PARAGRAPH_BREAK.split(zone):
+        if not paragraph.strip():
+            continue
+        if len(paragraph) <= CHUNK_CHARS:
+            paragraphs.append(paragraph)
+            continue
+        piece = ""
+        for sentence in _SENTENCE_BREAK.split(paragraph):
+            while len(sentence) > CHUNK_CHARS:
+                # A run-on "sentence" (OCR tables, lists without full stops): hard cut
+                paragraphs.append(sentence[:CHUNK_CHARS])
+                sentence = sentence[CHUNK_CHARS:]
+            if piece and len(piece) + len(sentence) + 1 > CHUNK_CHARS:
+                paragraphs.append(piece)
+                piece = ""
+            piece = f"{piece} {sentence}" if piece else sentence
+        if piece:
+            paragraphs.append(piece)
+    return paragraphs
+
+
+def split_into_chunks(text: str, chunk_chars: int = CHUNK_CHARS) -> List[str]:
+    """Cut a document into chunks of at most chunk_chars on zone and paragraph boundaries"""
+    starts = [0] + [match.start() for match in _ZONE_HEADING.finditer(text) if match.start() > 0]
+    zones = [text[start:end] for start, end in zip(starts, starts[1:] + [len(text)])]
+
+    chunks: List[str] = []
+    current = ""
+    for zone in zones:
+        if len(current) >= MIN_CHUNK_CHARS:
+            chunks.append(current)
+            current = ""
+        for paragraph in _paragraphs(zone):
+            paragraph = paragraph.strip()
+            if current and len(current) + len(paragraph) + 2 > chunk_chars:
+                chunks.append(current)
+                current = ""
+            current = f"{current}\n\n{paragraph}" if current else paragraph
+    if current.strip():
+        chunks.append(current)
+    return chunks
+
+
+def summary_prompt(document: str, length: str = "medium", heading: str = "COURT ORDER DOCUMENT") -> str:
+    """The house-style summary prompt for a document (or for notes on one)"""
+    words = SUMMARY_LENGTHS.get(length, SUMMARY_LENGTHS['medium'])
+    return SUMMARY_PROMPT.format(words=words, heading=heading, document=document)
+
+
+def _counter(progress: Optional[Progress], stage: str, total: int) -> Callable[[], None]:
+    """Thread-safe 'one more call finished' reporter for a stage"""
+    lock = threading.Lock()
+    done = [0]
+
+    def finished():
+        if progress is None:
+            return
+        with lock:
+            done[0] += 1
+            progress(stage, done[0], total)
+    return finished
+
+
+def _map_chunks(llm, chunks: List[str], workers: int, progress: Optional[Progress] = None) -> List[str]:
+    finished = _counter(progress, "map", len(chunks))
+
+    def summarize_chunk(indexed):
+        index, chunk = indexed
+        notes = llm.invoke(CHUNK_PROMPT.format(index=index, total=len(chunks), chunk=chunk), temperature=0,
+                           label="summary_map")
+        finished()
+        return notes.strip()
+
+    with ThreadPoolExecutor(max_workers=max(1, min(workers, len(chunks)))) as executor:
+        return list(executor.map(summarize_chunk, enumerate(chunks, 1)))
+
+
+def _combine_notes(llm, notes: List[str], workers: int, progress: Optional[Progress] = None) -> str:
+    """Join chunk notes, merging them group-wise until they fit in one prompt"""
+    while True:
+        joined = "\n\n".join(f"[Part {index}] {note}" for index, note in enumerate(notes, 1))
+        if len(joined) <= SINGLE_PASS_CHARS or len(notes) == 1:
+            return joined
+        groups, group = [], []
+        for note in notes:
+            if group and sum(len(n) for n in group) + len(note) > CHUNK_CHARS:
+                groups.append(group)
+                group = []
+            group.append(note)
+        groups.append(group)
+        if len(groups) == len(notes):
+            # Every note fills a chunk on its own; nothing left to merge
+            return joined
+        finished = _counter(progress, "reduce", sum(1 for group in groups if len(group) > 1))
+
+        def combine(group_notes):
+            if len(group_notes) == 1:
+                return group_notes[0]
+            merged = llm.invoke(COMBINE_PROMPT.format(notes="\n\n".join(group_notes)), temperature=0,
+                                label="summary_reduce")
+            finished()
+            return merged.strip()
+
+        with ThreadPoolExecutor(max_workers=max(1, min(workers, len(groups)))) as executor:
+            notes = list(executor.map(combine, groups))
+
+
+def _final_prompt(llm, document_text: str, length: str, workers: Optional[int],
+                  progress: Optional[Progress] = None) -> str:
+    """Prompt that produces the summary: the document itself, or the combined notes on its chunks"""
+    if len(document_text) <= SINGLE_PASS_CHARS:
+        return summary_prompt(document_text, length)
+    workers = workers or MAP_WORKERS
+    notes = _map_chunks(llm, split_into_chunks(document_text), workers, progress)
+    combined = _combine_notes(llm, notes, workers, progress)
+    return summary_prompt(combined, length, heading="NOTES ON THE COURT ORDER (in document order)")
+
+
+def summarize_court_order(document_text: str, length: str = "medium", llm=None,
+                          workers: Optional[int] = None) -> str:
+    """Summary of a court order; long documents go through map-reduce"""
+    llm = llm or get_llm_client()
+    return llm.invoke(_final_prompt(llm, document_text, length, workers), temperature=0, label="summary")
+
+
+def stream_court_order_summary(document_text: str, length: str = "medium", llm=None,
+                               workers: Optional[int] = None, progress: Optional[Progress] = None) -> Iterator[str]:
+    """Same as summarize_court_order, with the final step yielded token by token
+
+    No token comes out until the map/reduce calls on a long document are done; progress
+    is told about each of them as it finishes.
+    """
+    llm = llm or get_llm_client()
+    yield from llm.stream(_final_prompt(llm, document_text, length, workers, progress), temperature=0,
+                          label="summary")